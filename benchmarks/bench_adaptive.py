@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# Runs normal_scanner's async engine against a local server that simulates
+# congestion: it serves at most `capacity` requests at once and queues the
+# rest, so too many in-flight probes turn into timeouts. Compares fixed
+# concurrency levels with the adaptive AIMD controller.
+#
+# Usage: python benchmarks/bench_adaptive.py [probes] [capacity] [service_ms]
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "modules"))
+
+from aiohttp import web
+import normal_scanner
+from concurrency import AIMDController
+
+
+def start_congested_server(capacity, service_time):
+    # aiohttp server on 127.0.0.1 in a background thread, returns its port
+    ready = threading.Event()
+    state = {}
+
+    async def serve():
+        slots = asyncio.Semaphore(capacity)
+
+        async def handler(request):
+            async with slots:
+                await asyncio.sleep(service_time)
+            return web.Response(text="ok", headers={"Server": "congested"})
+
+        app = web.Application()
+        app.router.add_route("*", "/", handler)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0, backlog=8192)
+        await site.start()
+        state["port"] = site._server.sockets[0].getsockname()[1]
+        ready.set()
+        await asyncio.Event().wait()
+
+    threading.Thread(target=lambda: asyncio.run(serve()), daemon=True).start()
+    ready.wait()
+    return state["port"]
+
+
+def bench(name, port, probes, concurrency, adaptive=False):
+    counts = {"ok": 0}
+    controller = AIMDController(concurrency, interval=0.5) if adaptive else None
+
+    def on_result(target, record):
+        if record:
+            counts["ok"] += 1
+
+    targets = normal_scanner.iter_targets(["127.0.0.1"] * probes, [str(port)])
+    start = time.perf_counter()
+    normal_scanner.run_async_engine(targets, "GET", concurrency, on_result, controller=controller)
+    elapsed = time.perf_counter() - start
+    level = f" | final level {controller.limit}" if controller else ""
+    print(f"{name:<14} ok {counts['ok']}/{probes} | {elapsed:.2f}s | {counts['ok'] / elapsed:.0f} ok/s{level}")
+
+
+def main():
+    probes = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    capacity = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    service_time = (int(sys.argv[3]) if len(sys.argv) > 3 else 20) / 1000
+
+    # Short timeout so congestion shows up quickly
+    normal_scanner.DEFAULT_TIMEOUT = 1
+    port = start_congested_server(capacity, service_time)
+    print(f"Server capacity {capacity} concurrent, service {service_time * 1000:.0f}ms, timeout 1s")
+
+    bench("fixed 10", port, probes, 10)
+    bench("fixed 2000", port, probes, 2000)
+    bench("adaptive", port, probes, 10, adaptive=True)
+
+
+if __name__ == "__main__":
+    main()
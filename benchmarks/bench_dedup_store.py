@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# DedupStore across runs: each run adds a batch of names (half of them
+# already seen) to an existing output file and its index. COMPACT_MIN is
+# set low so most runs merge the appended hashes into the sorted part at
+# close; a final run checks every name is still known and none written twice.
+#
+# Usage: python benchmarks/bench_dedup_store.py [names_per_run] [runs] [compact_min]
+import os
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "modules"))
+
+import dedup_store
+from dedup_store import DedupStore, HEADER
+
+
+def run(output_file, names):
+    start = time.perf_counter()
+    with DedupStore(output_file) as store:
+        fresh = store.add_new(names)
+        with open(output_file, "a", encoding="utf-8") as file:
+            file.write("".join(f"{name}\n" for name in fresh))
+    with open(store.path, "rb") as file:
+        _, _, sorted_count = HEADER.unpack(file.read(HEADER.size))
+    return time.perf_counter() - start, len(fresh), sorted_count
+
+
+def main():
+    per_run = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    runs = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    dedup_store.COMPACT_MIN = int(sys.argv[3]) if len(sys.argv) > 3 else 2
+
+    with tempfile.TemporaryDirectory() as tmp:
+        output_file = os.path.join(tmp, "subdomains.txt")
+        print(f"{runs} runs of {per_run} names, half new, COMPACT_MIN {dedup_store.COMPACT_MIN}")
+        for index in range(runs):
+            first = index * per_run // 2
+            names = [f"sub{i}.target.com" for i in range(first, first + per_run)]
+            elapsed, new, sorted_count = run(output_file, names)
+            print(f"  run {index + 1}  {elapsed:6.2f}s  {new} new, {sorted_count} hashes in the sorted part")
+
+        total = (runs + 1) * per_run // 2
+        with DedupStore(output_file) as store:
+            missing = sum(1 for i in range(total) if f"sub{i}.target.com" not in store)
+        with open(output_file, encoding="utf-8") as file:
+            lines = file.read().split()
+        print(f"  check    {len(lines)} written, {len(set(lines))} distinct, {missing} of {total} missing")
+        if missing or len(lines) != len(set(lines)) or len(lines) != total:
+            sys.exit("dedup index lost or duplicated names")
+
+
+if __name__ == "__main__":
+    main()
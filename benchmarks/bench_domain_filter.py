@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# Candidates per second through the subdomain filters: the per-name
+# helpers api_subd used before (regex compiled per call, per-line findall
+# pattern for CDX) against the cached DomainFilter single and batch APIs.
+#
+# Usage: python benchmarks/bench_domain_filter.py [candidates] [repeats]
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "modules"))
+
+from domain_filter import domain_filter
+
+DOMAIN = "example.com"
+WORDS = ["www", "mail", "api", "cdn", "dev", "staging", "shop", "m", "static", "auth", "vpn", "eu", "us"]
+
+
+def old_validate_domain(domain):
+    domain_pattern = re.compile(r"^(?:[a-zA-Z0-9-]+\.)+[a-zA-Z]{2,63}$")
+    return bool(domain_pattern.match(domain))
+
+def old_io_clean(item, domain):
+    item = item.strip()
+    if item.startswith("*."):
+        item = item[2:]
+    if item.endswith(f".{domain}") and old_validate_domain(item):
+        return item
+    return None
+
+def old_parse_webarchive(lines, domain):
+    subdomains = set()
+    for line in lines:
+        if domain in line:
+            for part in re.findall(r'(?:[a-zA-Z0-9-]+\.)+' + re.escape(domain), line):
+                sub = old_io_clean(part, domain)
+                if sub:
+                    subdomains.add(sub)
+    return subdomains
+
+
+def make_candidates(count):
+    # Source-like mix: valid names, wildcards, other domains, junk cells
+    rng = random.Random(42)
+    names = []
+    for _ in range(count):
+        kind = rng.random()
+        name = ".".join(rng.choice(WORDS) + str(rng.randint(0, 99)) for _ in range(rng.randint(1, 3)))
+        if kind < 0.6:
+            names.append(f"{name}.{DOMAIN}")
+        elif kind < 0.7:
+            names.append(f"*.{name}.{DOMAIN}")
+        elif kind < 0.85:
+            names.append(f"{name}.example.net")
+        else:
+            names.append(f"{rng.randint(1, 223)}.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}")
+    return names
+
+def make_cdx_lines(count):
+    rng = random.Random(7)
+    return [f"http://{rng.choice(WORDS)}{rng.randint(0, 999)}.{DOMAIN}:80/path/{rng.randint(0, 10 ** 6)}?q=1"
+            for _ in range(count)]
+
+
+def bench(name, func, items, repeats):
+    best = None
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = func(items)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    print(f"  {name:<22} {len(items) / best / 1e6:7.2f} M candidates/s  ({len(result)} kept)")
+    return result
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500000
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    domain = domain_filter(DOMAIN)
+
+    names = make_candidates(count)
+    print(f"Name candidates ({count}):")
+    bench("old io_clean", lambda items: {s for s in (old_io_clean(i, DOMAIN) for i in items) if s}, names, repeats)
+    bench("DomainFilter.clean", lambda items: {s for s in map(domain.clean, items) if s}, names, repeats)
+    bench("DomainFilter.clean_many", domain.clean_many, names, repeats)
+
+    lines = make_cdx_lines(count)
+    print(f"CDX lines ({count}):")
+    old = bench("old parse_webarchive", lambda items: old_parse_webarchive(items, DOMAIN), lines, repeats)
+    new = bench("DomainFilter.extract", domain.extract, lines, repeats)
+    print(f"  same result: {old == new}")
+
+
+if __name__ == "__main__":
+    main()
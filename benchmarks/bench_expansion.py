@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+# Permutation expansion against a stand-in DNS: a synthetic zone where a
+# share of the permutations exist, plus a wildcard sub-zone that answers
+# everything. Reports candidates/s, what was found or dropped as wildcard,
+# and peak traced memory, which should stay flat as the seed set grows.
+#
+# Usage: python benchmarks/bench_expansion.py [seed_names] [latency_ms] [rounds]
+import asyncio
+import os
+import random
+import sys
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "modules"))
+
+from dns_resolver import resolver
+from expansion import DEFAULT_WORDS, Expander
+
+DOMAIN = "example.com"
+WILDCARD_ZONE = f"cdn.{DOMAIN}"
+WILDCARD_IP = "10.9.9.9"
+
+
+def build_zone(seeds, rng):
+    # Seeds plus about one existing permutation per seed
+    zone = {name: f"10.0.{i % 250}.{i % 200}" for i, name in enumerate(seeds)}
+    for i, name in enumerate(seeds):
+        first, parent = name.split(".", 1)
+        word = rng.choice(DEFAULT_WORDS)
+        hidden = rng.choice([f"{word}-{first}.{parent}", f"{first}-{word}.{parent}", f"{word}.{name}"])
+        zone.setdefault(hidden, f"10.1.{i % 250}.{i % 200}")
+    return zone
+
+def install_stand_in(zone, latency):
+    # Replaces the resolver's getaddrinfo with a lookup in `zone`
+    async def lookup(host):
+        await asyncio.sleep(latency)
+        if host in zone:
+            ip = zone[host]
+        elif host.endswith(f".{WILDCARD_ZONE}"):
+            ip = WILDCARD_IP
+        else:
+            resolver.store(host, None)
+            return None
+        resolver.store(host, ip)
+        return ip
+
+    resolver._agetaddrinfo = lookup
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    latency = (int(sys.argv[2]) if len(sys.argv) > 2 else 5) / 1000
+    rounds = int(sys.argv[3]) if len(sys.argv) > 3 else 1
+
+    rng = random.Random(1)
+    seeds = {f"{rng.choice(['api', 'web', 'shop', 'app', 'mx'])}{i}.{DOMAIN}" for i in range(count)}
+    seeds |= {f"img{i}.{WILDCARD_ZONE}" for i in range(count // 10)}
+    zone = build_zone(sorted(seeds), rng)
+    install_stand_in(zone, latency)
+    hidden = len(zone) - len(seeds)
+
+    expander = Expander(rounds=rounds)
+    found = {}
+    tracemalloc.start()
+    start = time.perf_counter()
+    expander.expand(DOMAIN, seeds, found.__setitem__)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+
+    wrong = [name for name in found if name not in zone]
+    print(f"{len(seeds)} seeds, {hidden} hidden names, latency {latency * 1000:.0f}ms, {rounds} round(s)")
+    print(f"  {expander.status()}")
+    print(f"  {expander.tried / elapsed:,.0f} candidates/s, {elapsed:.2f}s, peak traced memory {peak / 2 ** 20:.1f} MB")
+    print(f"  hidden names found: {len(found) - len(wrong)}/{hidden}, wildcard names kept: {len(wrong)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# FlashScan wrapper blocking on the process (results only once it exits) vs
+# LiveScan following the output file while the scan runs, against the
+# stand-in binary (fixtures/fake_flashscan.py). Reports when the first hit
+# reaches a consumer, how many hits arrived before the scan ended, what
+# following costs in wall time, and how close the ETA shown at 25/50/75%
+# was to the time actually left.
+#
+# The stall run pauses the stand-in for `pause` seconds half way and
+# checks that the status line flagged it (stall threshold 1s here).
+#
+# Usage: python benchmarks/bench_flashscan_live.py [hosts] [threads] [pause]
+from contextlib import redirect_stdout
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "modules"))
+
+import flashscan_scanner
+from flashscan_live import LiveScan
+
+FAKE = os.path.join(BENCH_DIR, "fixtures", "fake_flashscan.py")
+
+
+class TracedLiveScan(LiveScan):
+    """LiveScan that keeps (elapsed, scanned, eta) after every poll."""
+
+    stall_after = 1.0
+
+    def __init__(self, *args, **kwargs):
+        kwargs["stall_after"] = TracedLiveScan.stall_after
+        super().__init__(*args, **kwargs)
+        self.trace = []
+
+    def poll(self):
+        super().poll()
+        self.trace.append((time.monotonic() - self.started, self.scanned, self.eta()))
+
+
+def count_rows(path):
+    return sum(1 for _ in flashscan_scanner.iter_flashscan_records(path))
+
+def bench_blocking(input_file, output_file, threads):
+    start = time.perf_counter()
+    subprocess.run([FAKE, "direct", "-f", input_file, "-o", output_file, "-t", str(threads)],
+                   stdout=subprocess.DEVNULL, check=True)
+    elapsed = time.perf_counter() - start
+    print(f"  blocking {elapsed:6.2f}s  first hit at {elapsed:5.2f}s (process exit), {count_rows(output_file)} hits")
+
+def bench_live(input_file, output_file, threads, total):
+    arrivals = []
+    start = time.perf_counter()
+    with open(os.devnull, "w") as quiet, redirect_stdout(quiet):
+        live = flashscan_scanner.scan_subdomains_with_flashscan(
+            input_file, output_file, threads, on_hit=lambda record: arrivals.append(time.perf_counter() - start))
+    elapsed = time.perf_counter() - start
+    early = sum(1 for arrival in arrivals if arrival < elapsed - live.interval)
+    print(f"  live     {elapsed:6.2f}s  first hit at {arrivals[0] if arrivals else 0:5.2f}s, {len(arrivals)} hits "
+          f"({count_rows(output_file)} in file), {early} delivered while scanning")
+    for fraction in (0.25, 0.5, 0.75):
+        point = next((entry for entry in live.trace if entry[1] >= total * fraction and entry[2] is not None), None)
+        if point:
+            seen, _, eta = point
+            print(f"           at {fraction:.0%}: ETA {eta:5.2f}s, actually {live.trace[-1][0] - seen:5.2f}s left")
+    return live
+
+def bench_stall(input_file, output_file, threads, pause):
+    os.environ["FAKE_FLASHSCAN_PAUSE"] = str(pause)
+    with open(os.devnull, "w") as quiet, redirect_stdout(quiet):
+        live = flashscan_scanner.scan_subdomains_with_flashscan(input_file, output_file, threads)
+    del os.environ["FAKE_FLASHSCAN_PAUSE"]
+    print(f"  stall    {pause}s pause half way: {live.summary()}")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 3000
+    threads = int(sys.argv[2]) if len(sys.argv) > 2 else 64
+    pause = float(sys.argv[3]) if len(sys.argv) > 3 else 3.0
+    os.chmod(FAKE, 0o755)
+    os.environ[flashscan_scanner.BINARY_ENV] = FAKE
+    flashscan_scanner.LiveScan = TracedLiveScan
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, "hosts.txt")
+        with open(input_file, "w", encoding="utf-8") as file:
+            file.write("".join(f"sub{i}.target{i % 50}.com\n" for i in range(count)))
+        print(f"{count} hosts, {threads} threads, "
+              f"{os.environ.get('FAKE_FLASHSCAN_RATE', '500')} hosts/s at most")
+        bench_blocking(input_file, os.path.join(tmp, "blocking.txt"), threads)
+        bench_live(input_file, os.path.join(tmp, "live.txt"), threads, count)
+        bench_stall(input_file, os.path.join(tmp, "stall.txt"), threads, pause)
+
+
+if __name__ == "__main__":
+    main()
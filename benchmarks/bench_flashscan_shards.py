@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# One FlashScan process over the whole input (scan_subdomains_with_flashscan)
+# vs the ShardCoordinator running `processes` of them over shards, against a
+# stand-in binary (fixtures/fake_flashscan.py, tuned through the
+# FAKE_FLASHSCAN_* variables). Every run is checked against the results
+# the stand-in should produce: all of them, each exactly once.
+#
+# The crash run makes every attempt die half way with probability `crash`:
+# one process loses the scan, shards are retried and their partial output
+# merged. The resume run repeats a sharded scan with the same output and
+# only runs the shards that failed. Repeating a scan that finished (the
+# rescan run) starts it over, like the single-process path.
+#
+# Usage: python benchmarks/bench_flashscan_shards.py [hosts] [processes] [threads] [crash]
+from contextlib import redirect_stdout
+import os
+import sys
+import tempfile
+import time
+import zlib
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "modules"))
+
+import flashscan_scanner
+import flashscan_shards
+
+FAKE = os.path.join(BENCH_DIR, "fixtures", "fake_flashscan.py")
+
+
+def expected_hosts(hosts):
+    return {host for host in hosts if zlib.crc32(host.encode()) % 3 == 0}
+
+def check(output_file, expected):
+    # (results written, missing, duplicated)
+    if not os.path.exists(output_file):
+        return 0, len(expected), 0
+    found = [record["host"] for record in flashscan_scanner.iter_flashscan_records(output_file)]
+    return len(found), len(expected - set(found)), len(found) - len(set(found))
+
+def run(scan):
+    start = time.perf_counter()
+    with open(os.devnull, "w") as quiet, redirect_stdout(quiet):
+        coordinator = scan()
+    elapsed = time.perf_counter() - start
+    return elapsed, coordinator
+
+def report(name, elapsed, hosts, output_file, expected, coordinator=None):
+    written, missing, duplicated = check(output_file, expected)
+    print(f"  {name:<8} {elapsed:6.2f}s  {hosts / elapsed:7.0f} hosts/s  "
+          f"{written} written, {missing} missing, {duplicated} duplicated")
+    if coordinator:
+        print(f"           {coordinator.status()}")
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 4000
+    processes = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+    threads = int(sys.argv[3]) if len(sys.argv) > 3 else 64
+    crash = sys.argv[4] if len(sys.argv) > 4 else "0.3"
+    os.chmod(FAKE, 0o755)
+    os.environ[flashscan_scanner.BINARY_ENV] = FAKE
+    flashscan_shards.RETRY_BASE, flashscan_shards.RETRY_CAP = 0.05, 0.2
+    hosts = [f"sub{i}.target{i % 50}.com" for i in range(count)]
+    expected = expected_hosts(hosts)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        input_file = os.path.join(tmp, "hosts.txt")
+        with open(input_file, "w", encoding="utf-8") as file:
+            file.write("\n".join(hosts) + "\n")
+        print(f"{count} hosts, {threads} threads, {processes} processes, "
+              f"{os.environ.get('FAKE_FLASHSCAN_RATE', '500')} hosts/s per process at most")
+
+        def single(output_file):
+            return lambda: flashscan_scanner.scan_subdomains_with_flashscan(input_file, output_file, threads)
+
+        def sharded(output_file):
+            return lambda: flashscan_scanner.scan_with_shards(input_file, output_file, threads, processes)
+
+        output_file = os.path.join(tmp, "single.txt")
+        report("single", run(single(output_file))[0], count, output_file, expected)
+        output_file = os.path.join(tmp, "sharded.txt")
+        elapsed, coordinator = run(sharded(output_file))
+        report("sharded", elapsed, count, output_file, expected, coordinator)
+        elapsed, coordinator = run(sharded(output_file))
+        report("rescan", elapsed, count, output_file, expected, coordinator)
+
+        os.environ["FAKE_FLASHSCAN_CRASH"] = crash
+        print(f"every attempt crashes half way with probability {crash}")
+        output_file = os.path.join(tmp, "single-crash.txt")
+        report("single", run(single(output_file))[0], count, output_file, expected)
+        output_file = os.path.join(tmp, "sharded-crash.txt")
+        elapsed, coordinator = run(sharded(output_file))
+        report("sharded", elapsed, count, output_file, expected, coordinator)
+        if coordinator.failed:
+            elapsed, coordinator = run(sharded(output_file))
+            report("resume", elapsed, count, output_file, expected, coordinator)
+
+
+if __name__ == "__main__":
+    main()
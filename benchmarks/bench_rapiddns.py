@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+# RapidDNS extraction and pagination, old vs new:
+#  - parsing: BeautifulSoup html.parser walk vs the precompiled regex
+#    extractor, on a saved result page fixture
+#  - end to end: sequential pages with a 0.5s sleep vs concurrent pages
+#    under the rapiddns rate limit, against a local stand-in server
+#
+# Usage: python benchmarks/bench_rapiddns.py [pages] [latency_ms] [parse_runs]
+import asyncio
+import os
+import re
+import sys
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "modules"))
+
+from aiohttp import web
+import aiohttp
+import requests
+import api_subd
+try:
+    from bs4 import BeautifulSoup
+except ImportError:
+    BeautifulSoup = None
+
+FIXTURE = os.path.join(BENCH_DIR, "fixtures", "rapiddns_example.com.html")
+DOMAIN = "example.com"
+
+
+def parse_page_bs4(html, domain):
+    # The extractor api_subd used before the regex one
+    soup = BeautifulSoup(html, "html.parser")
+    subdomains = set()
+    for cell in soup.find_all("td"):
+        sub = api_subd.io_clean(cell.get_text(strip=True), domain)
+        if sub:
+            subdomains.add(sub)
+    total_count = 0
+    count_span = soup.find("span", style="color: #39cfca; ")
+    if count_span:
+        total_count = int(count_span.get_text(strip=True))
+    return subdomains, total_count
+
+
+def sequential_rapiddns(domain):
+    # Old pagination: one page after another with a fixed 0.5s sleep
+    response = requests.get(api_subd.rapiddns_url(domain), timeout=20)
+    subdomains, total_count = parse_page_bs4(response.text, domain)
+    for page in range(2, api_subd.rapiddns_page_count(total_count) + 1):
+        response = requests.get(api_subd.rapiddns_url(domain, page), timeout=20)
+        subdomains.update(parse_page_bs4(response.text, domain)[0])
+        time.sleep(0.5)
+    return subdomains
+
+
+def start_stand_in_server(html, latency):
+    # Serves the fixture for every page after `latency`, returns the port
+    ready = threading.Event()
+    state = {}
+
+    async def handler(request):
+        await asyncio.sleep(latency)
+        return web.Response(text=html, content_type="text/html")
+
+    async def serve():
+        app = web.Application()
+        app.router.add_get("/subdomain/{domain}", handler)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        state["port"] = site._server.sockets[0].getsockname()[1]
+        ready.set()
+        await asyncio.Event().wait()
+
+    threading.Thread(target=lambda: asyncio.run(serve()), daemon=True).start()
+    ready.wait()
+    return state["port"]
+
+
+def bench_parse(html, runs):
+    print(f"Parsing {len(html) / 1024:.0f} KB page x {runs}")
+    parsers = [("regex", api_subd.parse_rapiddns_page)]
+    if BeautifulSoup:
+        parsers.insert(0, ("bs4", parse_page_bs4))
+    results = {}
+    for name, parser in parsers:
+        start = time.perf_counter()
+        for _ in range(runs):
+            results[name] = parser(html, DOMAIN)
+        elapsed = time.perf_counter() - start
+        print(f"  {name:<6} {runs / elapsed:8.0f} pages/s  {elapsed / runs * 1000:.2f} ms/page")
+    if len(results) == 2:
+        print(f"  same result: {results['bs4'] == results['regex']}")
+
+
+def bench_end_to_end(name, func):
+    start = time.perf_counter()
+    subdomains = func()
+    elapsed = time.perf_counter() - start
+    print(f"  {name:<10} {len(subdomains)} subdomains, {elapsed:.2f}s")
+
+
+async def async_rapiddns():
+    async with aiohttp.ClientSession() as client:
+        return await api_subd.SOURCES["rapiddns"].arun(client, DOMAIN)
+
+
+def main():
+    pages = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    latency = (int(sys.argv[2]) if len(sys.argv) > 2 else 300) / 1000
+    runs = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+
+    with open(FIXTURE, encoding="utf-8") as file:
+        html = file.read()
+    bench_parse(html, runs)
+
+    # Claim `pages` result pages in the count span
+    served = re.sub(r'(<span style="color: #39cfca; ">)\d+', rf"\g<1>{pages * 100}", html)
+    port = start_stand_in_server(served, latency)
+    api_subd.rapiddns_url = lambda domain, page=1: f"http://127.0.0.1:{port}/subdomain/{domain}?page={page}"
+    bucket = api_subd.SOURCES["rapiddns"].policy.bucket
+    print(f"\n{pages} pages, latency {latency * 1000:.0f}ms, rate limit {bucket.rate}/s burst {bucket.burst}")
+    if BeautifulSoup:
+        bench_end_to_end("sequential", lambda: sequential_rapiddns(DOMAIN))
+    bench_end_to_end("thread", lambda: api_subd.SOURCES["rapiddns"].run(DOMAIN))
+    bench_end_to_end("async", lambda: asyncio.run(async_rapiddns()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# Compares thread vs async engine throughput of normal_scanner against a
+# local stand-in HTTP server that adds a fixed latency to every response.
+#
+# Usage: python benchmarks/bench_scan_engines.py [probes] [workers] [latency_ms]
+import asyncio
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "modules"))
+
+from aiohttp import web
+import normal_scanner
+
+
+def start_stand_in_server(latency):
+    # Runs an aiohttp server on 127.0.0.1 in a background thread, returns its port
+    ready = threading.Event()
+    state = {}
+
+    async def handler(request):
+        await asyncio.sleep(latency)
+        return web.Response(text="ok", headers={"Server": "bench"})
+
+    async def serve():
+        app = web.Application()
+        app.router.add_route("*", "/", handler)
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0, backlog=4096)
+        await site.start()
+        state["port"] = site._server.sockets[0].getsockname()[1]
+        ready.set()
+        await asyncio.Event().wait()
+
+    threading.Thread(target=lambda: asyncio.run(serve()), daemon=True).start()
+    ready.wait()
+    return state["port"]
+
+
+def bench(name, engine, hosts, ports, workers):
+    found = [0]
+
+    def on_result(target, result):
+        if result:
+            found[0] += 1
+
+    start = time.perf_counter()
+    engine(normal_scanner.iter_targets(hosts, ports), "GET", workers, on_result)
+    elapsed = time.perf_counter() - start
+    total = len(hosts) * len(ports)
+    print(f"{name:<8} {total} probes, {found[0]} ok, {elapsed:.2f}s, {total / elapsed:.0f} probes/s")
+
+
+def main():
+    probes = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+    latency = (int(sys.argv[3]) if len(sys.argv) > 3 else 50) / 1000
+
+    port = start_stand_in_server(latency)
+    hosts = ["127.0.0.1"] * probes
+    ports = [str(port)]
+
+    print(f"Stand-in server on :{port}, latency {latency * 1000:.0f}ms, workers {workers}")
+    bench("thread", normal_scanner.run_thread_engine, hosts, ports, workers)
+    bench("async", normal_scanner.run_async_engine, hosts, ports, workers * 10)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+# Child-process jobs under a fixed worker count (what get_optimal_config
+# gave subfinder) vs the ResourceScheduler with a child RSS budget. Each
+# job is a Python child that touches `job_mb` of memory and sleeps, like a
+# subfinder process holding its provider results. Reports wall time, peak
+# concurrent jobs and peak summed child RSS, sampled every 50ms.
+#
+# Usage: python benchmarks/bench_scheduler.py [jobs] [job_mb] [job_seconds] [budget_mb] [static_workers]
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "modules"))
+
+import psutil
+from resource_scheduler import ResourceScheduler
+
+JOB = "import sys, time; block = bytearray(int(sys.argv[1]) * 2 ** 20); time.sleep(float(sys.argv[2]))"
+
+
+def run_job(job_mb, seconds):
+    subprocess.run([sys.executable, "-c", JOB, str(job_mb), str(seconds)], check=True)
+
+def watch_children(stop, peaks):
+    # Peak number of children and peak summed RSS
+    me = psutil.Process()
+    while not stop.wait(0.05):
+        rss, count = 0, 0
+        for child in me.children(recursive=True):
+            try:
+                rss += child.memory_info().rss
+                count += 1
+            except psutil.Error:
+                pass
+        peaks["rss"] = max(peaks["rss"], rss)
+        peaks["jobs"] = max(peaks["jobs"], count)
+
+def measure(name, workers, submit):
+    stop = threading.Event()
+    peaks = {"rss": 0, "jobs": 0}
+    watcher = threading.Thread(target=watch_children, args=(stop, peaks), daemon=True)
+    watcher.start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        list(submit(executor))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    watcher.join()
+    print(f"  {name:<10} {elapsed:6.2f}s  peak {peaks['jobs']:3d} jobs  peak child RSS {peaks['rss'] / 2 ** 20:7.0f} MB")
+
+
+def main():
+    jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 40
+    job_mb = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+    seconds = float(sys.argv[3]) if len(sys.argv) > 3 else 1.0
+    budget_mb = int(sys.argv[4]) if len(sys.argv) > 4 else 600
+    static = int(sys.argv[5]) if len(sys.argv) > 5 else 30
+
+    print(f"{jobs} jobs of {job_mb} MB for {seconds}s, static pool {static}, scheduler budget {budget_mb} MB")
+    measure("static", static, lambda executor: executor.map(lambda _: run_job(job_mb, seconds), range(jobs)))
+
+    scheduler = ResourceScheduler(max_jobs=static, memory_limit=budget_mb * 2 ** 20, interval=0.1)
+    print(f"  ({scheduler.describe()})")
+    measure("scheduler", static, lambda executor: executor.map(
+        lambda _: scheduler.run(run_job, job_mb, seconds), range(jobs)))
+    print(f"  scheduler: {scheduler.status()}, learned job size {scheduler.job_memory / 2 ** 20:.0f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+# Offline throughput of every registered api_subd source, replayed from
+# fixtures so only our fetch plumbing and parsers are measured. Prints
+# per-source fetch/parse timings for both engines.
+#
+# Without a fixture directory, synthetic crt.sh / HackerTarget / RapidDNS /
+# AnubisDB / CDX responses are generated for `domains` fake targets. To
+# replay a real run, record it first (api_subd mode "record") and pass
+# files/fixtures plus the domain list that was scanned.
+#
+# Usage: python benchmarks/bench_sources.py [domains] [fixture_dir domain_file]
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "modules"))
+
+import aiohttp
+import api_subd
+from source_registry import FixtureStore, SourceStats
+
+RAPIDDNS_FIXTURE = os.path.join(BENCH_DIR, "fixtures", "rapiddns_example.com.html")
+RAPIDDNS_PAGES = 3
+WORDS = ["www", "mail", "api", "cdn", "dev", "staging", "shop", "m", "static", "auth", "vpn"]
+
+
+def fake_names(rng, domain, count):
+    return [f"{rng.choice(WORDS)}{rng.randint(0, 5000)}.{domain}" for _ in range(count)]
+
+def record_synthetic(store, domains):
+    # Saves one plausible response per source URL for each domain
+    rng = random.Random(1)
+    with open(RAPIDDNS_FIXTURE, encoding="utf-8") as file:
+        rapiddns_html = file.read().replace('">4873<', f'">{RAPIDDNS_PAGES * 100}<')
+    for domain in domains:
+        crtsh = [{"issuer_ca_id": 1, "issuer_name": "C=US, O=Let's Encrypt, CN=R3", "id": i,
+                  "name_value": "\n".join(fake_names(rng, domain, 2)), "common_name": domain}
+                 for i in range(2000)]
+        store.save("crtsh", api_subd.crtsh_url(domain), "application/json", json.dumps(crtsh).encode())
+        hackertarget = "\n".join(f"{name},10.0.0.{rng.randint(1, 254)}" for name in fake_names(rng, domain, 300))
+        store.save("hackertarget", api_subd.hackertarget_url(domain), "text/plain", hackertarget.encode())
+        page = rapiddns_html.replace("example.com", domain).encode()
+        for number in range(1, RAPIDDNS_PAGES + 1):
+            store.save("rapiddns", api_subd.rapiddns_url(domain, number), "text/html", page)
+        store.save("anubisdb", api_subd.anubisdb_url(domain), "application/json",
+                   json.dumps(fake_names(rng, domain, 500)).encode())
+        cdx = "\n".join(f"http://{name}:80/p/{rng.randint(0, 10 ** 6)}" for name in fake_names(rng, domain, 20000))
+        store.save("webarchive", api_subd.webarchive_url(domain), "text/plain", cdx.encode())
+
+
+def reset_stats():
+    for source in api_subd.SOURCES:
+        source.stats = SourceStats()
+
+def report(engine, domains, elapsed):
+    print(f"{engine}: {len(domains)} domains in {elapsed:.2f}s, {len(domains) / elapsed:.1f} domains/s")
+    for source in api_subd.SOURCES:
+        print(f"  {source.name:<13} {source.stats.status()}")
+
+def run_thread_engine(domains):
+    sources = api_subd.SOURCES.enabled()
+    for domain in domains:
+        for source in sources:
+            source.run(domain)
+
+async def run_async_engine(domains):
+    async with aiohttp.ClientSession() as client:
+        await asyncio.gather(*(source.arun(client, domain)
+                               for domain in domains for source in api_subd.SOURCES.enabled(async_only=True)))
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    if len(sys.argv) > 3:
+        api_subd.fixtures = FixtureStore(sys.argv[2], "replay")
+        with open(sys.argv[3], encoding="utf-8") as file:
+            domains = [line.strip() for line in file if line.strip()]
+    else:
+        fixture_dir = tempfile.mkdtemp(prefix="api_fixtures_")
+        domains = [f"target{i}.com" for i in range(count)]
+        record_synthetic(FixtureStore(fixture_dir, "record"), domains)
+        api_subd.fixtures = FixtureStore(fixture_dir, "replay")
+        print(f"Synthetic fixtures for {count} domains in {fixture_dir}")
+
+    for engine, run in (("thread", run_thread_engine), ("async", lambda d: asyncio.run(run_async_engine(d)))):
+        reset_stats()
+        start = time.perf_counter()
+        run(domains)
+        report(engine, domains, time.perf_counter() - start)
+    print(f"Replayed {api_subd.fixtures.served} responses, {api_subd.fixtures.missing} not recorded")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# subfinder integration, process per domain (scan_target) vs batched -dL
+# runs streamed into the writer (scan_batch), against a fake subfinder
+# binary put first on PATH. Startup and per-domain latency of the fake
+# are set through the FAKE_SUBFINDER_* variables, see
+# fixtures/fake_subfinder.py.
+#
+# With `hanging` > 0 that many domains hang after printing half their names
+# and a third run shows batched mode with short timeouts: stuck process
+# groups killed, partial output kept, stragglers retried from the tail queue.
+#
+# Usage: python benchmarks/bench_subfinder.py [domains] [workers] [names_per_domain] [hanging]
+from contextlib import redirect_stdout
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "modules"))
+
+import psutil
+import subfinder
+from checkpoint import Checkpoint
+from dedup_store import DedupStore
+from resource_scheduler import ResourceScheduler
+from result_writer import ResultWriter
+
+FAKE = os.path.join(BENCH_DIR, "fixtures", "fake_subfinder.py")
+
+
+def install_fake(bin_dir):
+    os.chmod(FAKE, 0o755)
+    os.symlink(FAKE, os.path.join(bin_dir, "subfinder"))
+    os.environ["PATH"] = bin_dir + os.pathsep + os.environ["PATH"]
+
+def count_lines(path):
+    with open(path, encoding="utf-8") as file:
+        return sum(1 for _ in file)
+
+def bench_per_domain(domains, workers, output_file):
+    store = DedupStore(output_file)
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        found = sum(count for count, _, _ in executor.map(lambda d: subfinder.scan_target(d, output_file, None, store),
+                                                       domains))
+    store.close()
+    return found
+
+def bench_batched(domains, workers, output_file):
+    store = DedupStore(output_file)
+    found = 0
+    with ResultWriter(output_file) as writer, ThreadPoolExecutor(max_workers=workers) as executor:
+        for results, _ in executor.map(lambda batch: subfinder.scan_batch(batch, writer, None, store),
+                                       subfinder.make_batches(domains, workers)):
+            found += sum(count for count, _ in results.values())
+    store.close()
+    return found
+
+def bench_stragglers(domains, workers, output_file):
+    # Full batched flow with a tail pass, FAST/TAIL timeouts of 2s/4s
+    subfinder.FAST_TIMEOUT, subfinder.TAIL_TIMEOUT, subfinder.KILL_GRACE = 2, 4, 1
+    store = DedupStore(output_file)
+    progress = {"done": 0, "total": len(domains)}
+    tail = []
+    with open(os.devnull, "w") as quiet, redirect_stdout(quiet), Checkpoint(f"{output_file}.journal") as journal:
+        scheduler = ResourceScheduler(max_jobs=workers)
+        found = subfinder.run_batches(domains, scheduler, output_file, None, store, journal, progress,
+                                      timeout=subfinder.FAST_TIMEOUT, tail=tail)
+        found += subfinder.run_per_domain(tail, scheduler, output_file, None, store, journal, progress,
+                                          timeout=subfinder.TAIL_TIMEOUT)
+    store.close()
+    leftovers = len(psutil.Process().children(recursive=True))
+    print(f"  ({len(tail)} domains went to the tail queue, {progress['done']}/{len(domains)} done, "
+          f"{leftovers} child processes left)")
+    return found
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    workers = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    os.environ["FAKE_SUBFINDER_NAMES"] = sys.argv[3] if len(sys.argv) > 3 else "200"
+    hanging = int(sys.argv[4]) if len(sys.argv) > 4 else 0
+    domains = [f"target{i}.com" for i in range(count)]
+    benches = [("per-domain", bench_per_domain), ("batched", bench_batched)]
+    if hanging:
+        os.environ["FAKE_SUBFINDER_HANG"] = ",".join(domains[i * count // hanging] for i in range(hanging))
+        benches = [("stragglers", bench_stragglers)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        install_fake(tmp)
+        print(f"{count} domains, {workers} workers, startup {os.environ.get('FAKE_SUBFINDER_STARTUP', '0.4')}s, "
+              f"{os.environ['FAKE_SUBFINDER_NAMES']} names/domain")
+        for name, bench in benches:
+            output_file = os.path.join(tmp, f"{name}.txt")
+            start = time.perf_counter()
+            found = bench(domains, workers, output_file)
+            elapsed = time.perf_counter() - start
+            print(f"  {name:<11} {elapsed:6.2f}s  {count / elapsed:6.1f} domains/s  "
+                  f"{found} found, {count_lines(output_file)} written")
+
+
+if __name__ == "__main__":
+    main()
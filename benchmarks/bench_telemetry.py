@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# Cost of reporting source results from many worker threads while a Rich
+# Progress is live: console.print + progress.update per result (the old
+# process_domain loop) vs publishing to the MetricsBus, whose renderer
+# draws REFRESH_RATE times a second. Output goes to a forced terminal on
+# /dev/null so only rendering and locking are measured.
+#
+# Usage: python benchmarks/bench_telemetry.py [threads] [events_per_thread]
+import os
+import sys
+import threading
+import time
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(BENCH_DIR), "modules"))
+
+from rich.console import Console
+from rich.progress import Progress, BarColumn, TextColumn
+from telemetry import MetricsBus
+
+
+def make_progress(auto_refresh):
+    console = Console(file=open(os.devnull, "w"), force_terminal=True, width=120)
+    return Progress(TextColumn("{task.description}"), BarColumn(), console=console, auto_refresh=auto_refresh)
+
+def run_threads(threads, events, report):
+    def worker(number):
+        for i in range(events):
+            report(f"d{number}.com", "crtsh", i % 50, 0.2)
+
+    workers = [threading.Thread(target=worker, args=(number,)) for number in range(threads)]
+    start = time.perf_counter()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return time.perf_counter() - start
+
+def bench_direct(threads, events):
+    with make_progress(True) as progress:
+        task_id = progress.add_task("scan", total=threads * events)
+
+        def report(domain, source, count, seconds):
+            progress.console.print(f"  [green]✔ {source.title()}: {count}[/green]")
+            progress.update(task_id, advance=1)
+
+        return run_threads(threads, events, report)
+
+def bench_bus(threads, events):
+    start = time.perf_counter()
+    with make_progress(False) as progress, MetricsBus(progress, threads * events, "scan") as bus:
+        def report(domain, source, count, seconds):
+            bus.result(domain, source, count, seconds)
+            bus.log(f"  [green]✔ {source.title()}: {count}[/green]")
+
+        elapsed = run_threads(threads, events, report)
+    print(f"  bus drained and closed after {time.perf_counter() - start:.2f}s")
+    return elapsed
+
+
+def main():
+    threads = int(sys.argv[1]) if len(sys.argv) > 1 else 16
+    events = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    total = threads * events
+    print(f"{threads} threads x {events} results")
+    for name, bench in (("direct", bench_direct), ("bus", bench_bus)):
+        elapsed = bench(threads, events)
+        print(f"  {name:<7} {total / elapsed:12,.0f} results/s published, {elapsed:.2f}s")
+
+
+if __name__ == "__main__":
+    main()
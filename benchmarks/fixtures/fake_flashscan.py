@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+# Stand-in for the flashscan-go binary used by bench_flashscan_shards.py and
+# bench_flashscan_live.py. Accepts `direct -f <input> -o <output> -t <threads>`,
+# sleeps FAKE_FLASHSCAN_STARTUP seconds once, then "scans" every host in
+# FAKE_FLASHSCAN_LATENCY / threads seconds, but never faster than
+# FAKE_FLASHSCAN_RATE hosts/s (one process is bound by the core its TLS and
+# parsing run on). About one host in three gets a "code server port ip host"
+# row, written to the output file a line at a time and echoed on stdout,
+# where a "Progress: done/total" counter is also printed every 50 hosts.
+# With probability FAKE_FLASHSCAN_CRASH a run dies with exit code 2 half way
+# through its input, like a crashed scan; FAKE_FLASHSCAN_PAUSE seconds of
+# silence half way mimic a stalled one.
+import os
+import random
+import sys
+import time
+import zlib
+
+STARTUP = float(os.environ.get("FAKE_FLASHSCAN_STARTUP", "0.2"))
+LATENCY = float(os.environ.get("FAKE_FLASHSCAN_LATENCY", "0.05"))
+RATE = float(os.environ.get("FAKE_FLASHSCAN_RATE", "500"))
+CRASH = float(os.environ.get("FAKE_FLASHSCAN_CRASH", "0"))
+PAUSE = float(os.environ.get("FAKE_FLASHSCAN_PAUSE", "0"))
+PROGRESS_EVERY = 50
+
+
+def option(args, name, default=None):
+    return args[args.index(name) + 1] if name in args else default
+
+def main():
+    args = sys.argv[1:]
+    if not args or args[0] != "direct":
+        sys.exit("usage: fake_flashscan.py direct -f input -o output -t threads")
+    with open(option(args, "-f"), encoding="utf-8") as file:
+        hosts = [line.strip() for line in file if line.strip()]
+    threads = max(1, int(option(args, "-t", "64")))
+    crash_at = len(hosts) // 2 if random.random() < CRASH else None
+    time.sleep(STARTUP)
+    with open(option(args, "-o"), "w", encoding="utf-8") as output:
+        for index, host in enumerate(hosts):
+            if index == crash_at:
+                sys.exit(2)
+            if PAUSE and index == len(hosts) // 2:
+                time.sleep(PAUSE)
+            time.sleep(max(LATENCY / threads, 1 / RATE))
+            digest = zlib.crc32(host.encode())
+            if digest % 3 == 0:
+                row = f"{200 + digest % 2 * 101} cloudflare 80 104.16.{digest % 256}.{digest // 256 % 256} {host}\n"
+                output.write(row)
+                output.flush()
+                sys.stdout.write("\r" + row)
+            if (index + 1) % PROGRESS_EVERY == 0 or index + 1 == len(hosts):
+                sys.stdout.write(f"\rProgress: {index + 1}/{len(hosts)}")
+                sys.stdout.flush()
+    sys.stdout.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+# Stand-in for the subfinder binary used by bench_subfinder.py. Accepts
+# -d <domain> or -dL <file> (plus -silent), sleeps FAKE_SUBFINDER_STARTUP
+# seconds once to mimic Go startup and provider setup, then for every
+# domain waits FAKE_SUBFINDER_LATENCY seconds and prints
+# FAKE_SUBFINDER_NAMES names a line at a time. Domains listed in
+# FAKE_SUBFINDER_HANG (comma separated) print half their names and then hang,
+# with a grandchild holding stdout open, like a stuck provider.
+import os
+import subprocess
+import sys
+import time
+
+STARTUP = float(os.environ.get("FAKE_SUBFINDER_STARTUP", "0.4"))
+LATENCY = float(os.environ.get("FAKE_SUBFINDER_LATENCY", "0.05"))
+NAMES = int(os.environ.get("FAKE_SUBFINDER_NAMES", "200"))
+HANG = set(filter(None, os.environ.get("FAKE_SUBFINDER_HANG", "").split(",")))
+
+
+def main():
+    args = sys.argv[1:]
+    domains = []
+    if "-d" in args:
+        domains.append(args[args.index("-d") + 1])
+    if "-dL" in args:
+        with open(args[args.index("-dL") + 1], encoding="utf-8") as file:
+            domains += [line.strip() for line in file if line.strip()]
+    time.sleep(STARTUP)
+    for domain in domains:
+        time.sleep(LATENCY)
+        hang = domain in HANG
+        for i in range(NAMES // 2 if hang else NAMES):
+            sys.stdout.write(f"host{i}.{domain}\n")
+        sys.stdout.flush()
+        if hang:
+            subprocess.Popen([sys.executable, "-c", "import time; time.sleep(3600)"])
+            time.sleep(3600)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,134 @@
+from concurrent.futures import ThreadPoolExecutor
+import sqlite3
+import threading
+import time
+import zlib
+
+# Results younger than TTL are served as is. Older ones, up to STALE_TTL,
+# are served while a background refresh replaces them.
+DEFAULT_TTL = 24 * 3600
+STALE_TTL = 7 * 24 * 3600
+REFRESH_WORKERS = 2
+
+FRESH = "fresh"
+STALE = "stale"
+MISS = "miss"
+
+SCHEMA = """CREATE TABLE IF NOT EXISTS results (
+    source TEXT NOT NULL,
+    domain TEXT NOT NULL,
+    fetched REAL NOT NULL,
+    names BLOB NOT NULL,
+    PRIMARY KEY (source, domain)
+)"""
+
+
+def pack_names(names):
+    return zlib.compress("\n".join(sorted(names)).encode("utf-8"), 6)
+
+def unpack_names(blob):
+    text = zlib.decompress(blob).decode("utf-8")
+    return set(text.split("\n")) if text else set()
+
+
+class ResultCache:
+    """SQLite cache of subdomain results keyed by (source, domain).
+
+    get() returns (names, state) with state FRESH, STALE or MISS. With
+    refresh=True every lookup is a miss, so the run refetches everything
+    and overwrites the stored results. Per-source hit/miss counts are kept
+    in `stats`.
+    """
+
+    def __init__(self, path, ttl=DEFAULT_TTL, stale_ttl=STALE_TTL, refresh=False):
+        self.path = path
+        self.ttl = ttl
+        self.stale_ttl = max(ttl, stale_ttl)
+        self.refresh = refresh
+        self.stats = {}
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(SCHEMA)
+        self._db.execute("DELETE FROM results WHERE fetched < ?", (time.time() - self.stale_ttl,))
+        self._db.commit()
+        self._refreshing = set()
+        self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _count(self, source, state):
+        counts = self.stats.setdefault(source, {"hits": 0, "misses": 0})
+        counts["misses" if state == MISS else "hits"] += 1
+
+    def get(self, source, domain):
+        state, names = MISS, None
+        if not self.refresh:
+            with self._lock:
+                row = self._db.execute("SELECT fetched, names FROM results WHERE source = ? AND domain = ?",
+                                       (source, domain)).fetchone()
+            if row:
+                age = time.time() - row[0]
+                if age < self.ttl:
+                    state, names = FRESH, unpack_names(row[1])
+                elif age < self.stale_ttl:
+                    state, names = STALE, unpack_names(row[1])
+        with self._lock:
+            self._count(source, state)
+        return names, state
+
+    def put(self, source, domain, names):
+        # Only non-empty results are stored: an empty set may be a failed call
+        if not names:
+            return
+        blob = pack_names(names)
+        with self._lock:
+            self._db.execute("INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?)",
+                             (source, domain, time.time(), blob))
+            self._db.commit()
+
+    def claim_refresh(self, source, domain):
+        # True for the first caller that wants to refresh this key
+        with self._lock:
+            if (source, domain) in self._refreshing:
+                return False
+            self._refreshing.add((source, domain))
+            return True
+
+    def release_refresh(self, source, domain):
+        with self._lock:
+            self._refreshing.discard((source, domain))
+
+    def revalidate(self, source, domain, fetch):
+        # Refreshes a stale entry on a background thread, fetch(domain) -> names
+        if not self.claim_refresh(source, domain):
+            return
+        with self._lock:
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=REFRESH_WORKERS)
+        self._pool.submit(self._refresh, source, domain, fetch)
+
+    def _refresh(self, source, domain, fetch):
+        try:
+            self.put(source, domain, fetch(domain))
+        except Exception:
+            pass
+        finally:
+            self.release_refresh(source, domain)
+
+    def status(self, source):
+        # "3 hits/1 miss" for summaries
+        counts = self.stats.get(source, {"hits": 0, "misses": 0})
+        return f"{counts['hits']} hits/{counts['misses']} misses"
+
+    def close(self):
+        # Waits for background refreshes so their results are saved
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        with self._lock:
+            self._db.close()
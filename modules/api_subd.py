@@ -1,13 +1,30 @@
 from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
+import asyncio
+import json
 import requests
-from bs4 import BeautifulSoup
 from threading import Lock
 from rich.console import Console
 from rich.progress import Progress, BarColumn, TextColumn, TimeElapsedColumn, SpinnerColumn
 import re
+from html import unescape
 import os
 import math
 import time
+from dns_resolver import resolve_hosts, resolver
+from result_writer import ResultWriter
+from rate_limit import parse_retry_after
+from api_cache import ResultCache, STALE, MISS
+from stream_parse import CHUNK_SIZE, JsonArrayStream, LineStream, NameStream
+from domain_filter import validate_domain, domain_filter
+from dedup_store import DedupStore
+from source_registry import SourceRegistry, FixtureStore
+from expansion import DEFAULT_WORDS, Expander, load_words
+from telemetry import MetricsBus
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
 
 console = Console()
 file_write_lock = Lock()
@@ -15,6 +32,30 @@ session = requests.Session()
 # Set User gent to prevent blocking
 session.headers.update({"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"})
 DEFAULT_TIMEOUT = 25
+# Async engine budget: requests in flight overall. Per-source rates and
+# concurrency are set where the sources are registered (SOURCES below).
+GLOBAL_CONCURRENCY = 40
+# Result cache under files/, served fresh for CACHE_TTL and stale (while
+# refreshing in the background) for up to CACHE_STALE_TTL
+CACHE_FILE = "api_cache.sqlite3"
+CACHE_TTL = 24 * 3600
+CACHE_STALE_TTL = 7 * 24 * 3600
+# RapidDNS result pages: cells of the result table and the total count span
+RAPIDDNS_CELL = re.compile(r"<td[^>]*>(.*?)</td>", re.S | re.I)
+RAPIDDNS_COUNT = re.compile(r'<span style="color: #39cfca; ">\s*(\d+)\s*</span>')
+HTML_TAG = re.compile(r"<[^>]+>")
+# Result pages fetched at once, still paced by the rapiddns rate limit
+RAPIDDNS_PAGE_WORKERS = 4
+CACHE_LABELS = {"fresh": "cached", "stale": "stale, refreshing", "miss": "fetched"}
+# Source plugins and recorded responses, both under files/
+PLUGIN_DIR = "sources"
+FIXTURE_DIR = "fixtures"
+# FixtureStore when recording or replaying API responses, None for live runs
+fixtures = None
+# Extra permutation words under files/, one per line, and how many targets
+# the async engine expands at once
+PERMUTATION_WORDS = "permutations.txt"
+EXPANSION_SLOTS = 4
 
 def get_files_dir():
     # Returns the path to the 'files' directory
@@ -39,193 +80,538 @@ def show_banner():
     ]
     console.rule("[bold cyan]" + " | ".join(banner_lines))
 
-def validate_domain(domain):
-    # Checks if domain format is valid
-    domain_pattern = re.compile(
-        r"^(?:[a-zA-Z0-9-]+\.)+[a-zA-Z]{2,63}$"
-    )
-    return bool(domain_pattern.match(domain))
+# --- Parsers (shared by the thread and async engines) --
+# Each one hands its candidates to the domain's filter in a single batch
 
-def clean_subdomain(subdomain):
-    # Removes wildcards like *.example.com -> example.com
-    subdomain = subdomain.strip()
-    if subdomain.startswith("*."):
-        subdomain = subdomain[2:]
-    return subdomain
+def parse_crtsh(data, domain):
+    # crt.sh JSON entries (any iterable of dicts) -> subdomains.
+    # name_value holds one name per line, the batch filter splits them.
+    return domain_filter(domain).clean_many(entry.get("name_value") or "" for entry in data)
 
-# --- APIs --
+def parse_hackertarget(text, domain):
+    # "host,ip" lines -> subdomains
+    return domain_filter(domain).clean_many(line.split(",", 1)[0] for line in text.splitlines())
 
-def crtsh_subdomains(domain):
-    """Fetches subdomains for CRT.sh (JSON)."""
+def parse_rapiddns_page(html, domain):
+    # RapidDNS result page -> (subdomains, total result count)
+    cells = [unescape(HTML_TAG.sub("", cell)) if "<" in cell or "&" in cell else cell
+             for cell in RAPIDDNS_CELL.findall(html)]
+    return domain_filter(domain).clean_many(cells), rapiddns_total(html)
+
+def parse_rapiddns(pages, domain):
+    # List of RapidDNS result pages -> subdomains
     subdomains = set()
-    url = f"https://crt.sh/?q=%25.{domain}&output=json"
-    
-    for attempt in range(3):
+    for html in pages:
+        subdomains.update(parse_rapiddns_page(html, domain)[0])
+    return subdomains
+
+def rapiddns_total(html):
+    # Result count shown on a RapidDNS page
+    match = RAPIDDNS_COUNT.search(html)
+    return int(match.group(1)) if match else 0
+
+def rapiddns_page_count(total_count):
+    # Result pages to fetch, 100 rows per page, capped at 50 pages
+    return min(math.ceil(total_count / 100), 50) if total_count > 100 else 1
+
+def parse_anubisdb(data, domain):
+    # JSON list of names -> subdomains
+    return domain_filter(domain).clean_many(data)
+
+def parse_anubisdb_json(text, domain):
+    return parse_anubisdb(json.loads(text), domain)
+
+def parse_webarchive(lines, domain):
+    # CDX "original" URL lines -> subdomains found anywhere in the URLs
+    return domain_filter(domain).extract(lines)
+
+def parse_names(names, domain):
+    # Parse stage of streamed sources: the NameStream already holds the names
+    return names.close()
+
+def crtsh_url(domain):
+    return f"https://crt.sh/?q=%25.{domain}&output=json"
+
+def hackertarget_url(domain):
+    return f"https://api.hackertarget.com/hostsearch/?q={domain}"
+
+def rapiddns_url(domain, page=1):
+    if page == 1:
+        return f"https://rapiddns.io/subdomain/{domain}?full=1"
+    return f"https://rapiddns.io/subdomain/{domain}?page={page}"
+
+def anubisdb_url(domain):
+    return f"https://jldc.me/anubis/subdomains/{domain}"
+
+def webarchive_url(domain):
+    return f"http://web.archive.org/cdx/search/cdx?url=*.{domain}/*&output=text&fl=original&collapse=urlkey"
+
+# --- Transport (rate limit, retries, fixture record/replay) --
+
+def fetch(source, url, timeout=DEFAULT_TIMEOUT, stream=False):
+    # GET through the source's rate limit, retry and circuit breaker policy.
+    # Returns the last response, or None if nothing came back.
+    if fixtures is not None and fixtures.replaying:
+        return fixtures.response(url)
+    policy = SOURCES[source].policy
+    response = None
+    for attempt in range(policy.attempts):
+        if not policy.breaker.allow():
+            break
+        policy.bucket.acquire()
         try:
-            response = session.get(url, timeout=30)
-            if response.status_code == 200:
-                data = response.json()
-                for entry in data:
-                    name_value = entry.get("name_value")
-                    if name_value:
-                        for sub in name_value.split("\n"):
-                            sub = io_clean(sub, domain)
-                            if sub: subdomains.add(sub)
-                break
-            elif response.status_code in [502, 503, 504]:
-                time.sleep(2 * (attempt + 1))
-            else:
+            response = session.get(url, timeout=timeout, stream=stream)
+            status, retry_after = response.status_code, parse_retry_after(response.headers.get("Retry-After"))
+        except requests.RequestException:
+            response, status, retry_after = None, None, None
+        delay = policy.after_attempt(attempt, status, retry_after)
+        if delay is None:
+            break
+        if response is not None:
+            response.close()
+        time.sleep(delay)
+    if fixtures is not None and fixtures.recording and not stream and response is not None and response.status_code == 200:
+        fixtures.save(source, url, response.headers.get("Content-Type", ""), response.content)
+    return response
+
+def fetch_names(source, url, names, timeout=DEFAULT_TIMEOUT):
+    # Streams a 200 response body into a NameStream and returns it, or None.
+    # A body cut off mid-stream (dropped connection, read timeout) is fetched
+    # again from the start under the source's retry policy.
+    policy = SOURCES[source].policy
+    for attempt in range(policy.attempts):
+        response = fetch(source, url, timeout, stream=True)
+        if response is None or response.status_code != 200:
+            return None
+        recording = fixtures is not None and fixtures.recording
+        content_type = response.headers.get("Content-Type", "")
+        try:
+            with response, (fixtures.open(source, url, content_type) if recording else nullcontext()) as recorder:
+                names.reset()
+                for chunk in response.iter_content(CHUNK_SIZE):
+                    names.feed(chunk)
+                    if recorder:
+                        recorder.write(chunk)
+            return names
+        except requests.RequestException:
+            delay = policy.after_attempt(attempt)
+            if delay is None:
                 break
-        except Exception:
-            time.sleep(2)
-    return subdomains
+            time.sleep(delay)
+    names.reset()
+    return None
 
-def hackertarget_subdomains(domain):
-    """Fetches subdomains from HackerTarget."""
-    subdomains = set()
+async def async_get(client, source, url, timeout, names=None):
+    # Returns (status, headers, body text). With a NameStream, a 200 body is
+    # fed to it chunk by chunk instead and the text is None.
+    if names is None:
+        client_timeout = aiohttp.ClientTimeout(total=timeout)
+    else:
+        client_timeout = aiohttp.ClientTimeout(sock_connect=timeout, sock_read=timeout)
+    recording = fixtures is not None and fixtures.recording
+    async with client.get(url, timeout=client_timeout) as response:
+        content_type = response.headers.get("Content-Type", "")
+        if names is None or response.status != 200:
+            text = await response.text(errors="ignore")
+            if recording and response.status == 200:
+                fixtures.save(source, url, content_type, text.encode("utf-8"))
+            return response.status, response.headers, text
+        with (fixtures.open(source, url, content_type) if recording else nullcontext()) as recorder:
+            names.reset()
+            async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                names.feed(chunk)
+                if recorder:
+                    recorder.write(chunk)
+        return response.status, response.headers, None
+
+def replay_result(url, names=None):
+    # async_get() result from a fixture, fed to names like a live 200 body
+    status, content_type, body = fixtures.get(url)
+    headers = {"Content-Type": content_type}
+    if names is None or status != 200:
+        return status, headers, body.decode("utf-8", "ignore")
+    names.reset()
+    for start in range(0, len(body), CHUNK_SIZE):
+        names.feed(body[start:start + CHUNK_SIZE])
+    return status, headers, None
+
+async def async_fetch(client, source, url, timeout=DEFAULT_TIMEOUT, names=None):
+    # Async twin of fetch(), returns (status, headers, text) or None
+    if fixtures is not None and fixtures.replaying:
+        return replay_result(url, names)
+    policy = SOURCES[source].policy
+    result = None
+    for attempt in range(policy.attempts):
+        if not policy.breaker.allow():
+            break
+        await policy.bucket.aacquire()
+        try:
+            result = await async_get(client, source, url, timeout, names)
+            status, retry_after = result[0], parse_retry_after(result[1].get("Retry-After"))
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            result, status, retry_after = None, None, None
+        delay = policy.after_attempt(attempt, status, retry_after)
+        if delay is None:
+            break
+        await asyncio.sleep(delay)
+    return result
+
+# --- Sources: fetch stages return the raw payload (None if unusable) --
+
+def fetch_crtsh(domain):
+    # Streamed: big organisations return hundreds of MB of entries
+    return fetch_names("crtsh", crtsh_url(domain), NameStream(JsonArrayStream, parse_crtsh, domain), timeout=30)
+
+def fetch_hackertarget(domain):
+    response = fetch("hackertarget", hackertarget_url(domain))
+    if response is not None and response.status_code == 200 and 'text' in response.headers.get('Content-Type', ''):
+        return response.text
+    return None
+
+def fetch_rapiddns_page(domain, page):
+    # HTML of one RapidDNS result page (2 and up), or None
     try:
-        response = session.get(f"https://api.hackertarget.com/hostsearch/?q={domain}", timeout=DEFAULT_TIMEOUT)
-        if response.status_code == 200 and 'text' in response.headers.get('Content-Type', ''):
-            for line in response.text.splitlines():
-                parts = line.split(",")
-                if parts:
-                    sub = io_clean(parts[0], domain)
-                    if sub: subdomains.add(sub)
+        response = fetch("rapiddns", rapiddns_url(domain, page), timeout=20)
+        if response is not None and response.status_code == 200:
+            return response.text
     except Exception:
         pass
-    return subdomains
+    return None
 
-def rapiddns_subdomains(domain):
-    """Fetches subdomains from RapidDNS (with pagination)."""
-    subdomains = set()
-    try:
-        url = f"https://rapiddns.io/subdomain/{domain}?full=1" 
-        response = session.get(url, timeout=DEFAULT_TIMEOUT)
-        if response.status_code != 200:
-            return subdomains
+def fetch_rapiddns(domain):
+    # Page 1, then the remaining pages concurrently, paced by the rapiddns
+    # rate limit. Returns the list of page HTML.
+    response = fetch("rapiddns", rapiddns_url(domain))
+    if response is None or response.status_code != 200:
+        return None
+    pages = [response.text]
+    remaining = range(2, rapiddns_page_count(rapiddns_total(pages[0])) + 1)
+    if remaining:
+        with ThreadPoolExecutor(max_workers=RAPIDDNS_PAGE_WORKERS) as executor:
+            pages += [html for html in executor.map(lambda page: fetch_rapiddns_page(domain, page), remaining) if html]
+    return pages
 
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Page 1
-        for link in soup.find_all('td'):
-            sub = io_clean(link.get_text(strip=True), domain)
-            if sub: subdomains.add(sub)
-
-        # Pagination logic
-        total_count = 0
-        count_span = soup.find('span', style="color: #39cfca; ")
-        if count_span:
-            try:
-                total_count = int(count_span.get_text(strip=True))
-            except ValueError:
-                pass
-        
-        if total_count > 100:
-            total_pages = min(math.ceil(total_count / 100), 50) # Cap at 50 pages
-            
-            for page in range(2, total_pages + 1):
-                try:
-                    p_response = session.get(f"https://rapiddns.io/subdomain/{domain}?page={page}", timeout=20)
-                    if p_response.status_code == 200:
-                        p_soup = BeautifulSoup(p_response.text, 'html.parser')
-                        for link in p_soup.find_all('td'):
-                            sub = io_clean(link.get_text(strip=True), domain)
-                            if sub: subdomains.add(sub)
-                except Exception:
-                    continue 
-                time.sleep(0.5)
-        
+def fetch_anubisdb(domain):
+    response = fetch("anubisdb", anubisdb_url(domain))
+    if response is not None and response.status_code == 200:
+        return response.text
+    return None
+
+def fetch_webarchive(domain):
+    return fetch_names("webarchive", webarchive_url(domain), NameStream(LineStream, parse_webarchive, domain), timeout=40)
+
+async def async_fetch_crtsh(client, domain):
+    names = NameStream(JsonArrayStream, parse_crtsh, domain)
+    result = await async_fetch(client, "crtsh", crtsh_url(domain), 30, names)
+    return names if result and result[0] == 200 else None
+
+async def async_fetch_hackertarget(client, domain):
+    result = await async_fetch(client, "hackertarget", hackertarget_url(domain))
+    if result and result[0] == 200 and 'text' in result[1].get('Content-Type', ''):
+        return result[2]
+    return None
+
+async def async_fetch_rapiddns(client, domain):
+    result = await async_fetch(client, "rapiddns", rapiddns_url(domain))
+    if not result or result[0] != 200:
+        return None
+    pages = [result[2]]
+    page_slots = asyncio.Semaphore(RAPIDDNS_PAGE_WORKERS)
+
+    async def fetch_page(page):
+        async with page_slots:
+            result = await async_fetch(client, "rapiddns", rapiddns_url(domain, page), 20)
+        return result[2] if result and result[0] == 200 else None
+
+    remaining = range(2, rapiddns_page_count(rapiddns_total(pages[0])) + 1)
+    for html in await asyncio.gather(*(fetch_page(page) for page in remaining), return_exceptions=True):
+        if isinstance(html, str):
+            pages.append(html)
+    return pages
+
+async def async_fetch_anubisdb(client, domain):
+    result = await async_fetch(client, "anubisdb", anubisdb_url(domain))
+    return result[2] if result and result[0] == 200 else None
+
+async def async_fetch_webarchive(client, domain):
+    names = NameStream(LineStream, parse_webarchive, domain)
+    result = await async_fetch(client, "webarchive", webarchive_url(domain), 40, names)
+    return names if result and result[0] == 200 else None
+
+# Built-in sources in display order. Plugins in files/sources/*.py define
+# register(registry) and call registry.register(name, fetch, parse, ...).
+SOURCES = SourceRegistry()
+SOURCES.register("anubisdb", fetch_anubisdb, parse_anubisdb_json, async_fetch_anubisdb,
+                 rate=5, burst=5, concurrency=8)
+SOURCES.register("hackertarget", fetch_hackertarget, parse_hackertarget, async_fetch_hackertarget,
+                 rate=0.5, burst=1, concurrency=2)
+SOURCES.register("rapiddns", fetch_rapiddns, parse_rapiddns, async_fetch_rapiddns,
+                 rate=2, burst=2, concurrency=4)
+SOURCES.register("crtsh", fetch_crtsh, parse_names, async_fetch_crtsh,
+                 rate=1, burst=2, concurrency=4)
+SOURCES.register("webarchive", fetch_webarchive, parse_names, async_fetch_webarchive,
+                 rate=1, burst=2, concurrency=4)
+
+# --- Per-source helpers kept for callers of the old API --
+
+def source_subdomains(name, domain):
+    # Runs one registered source for a domain, empty set on any failure
+    try:
+        return SOURCES[name].run(domain)
     except Exception:
-        pass
-    return subdomains
+        return set()
+
+def crtsh_subdomains(domain):
+    """Fetches subdomains for CRT.sh (JSON)."""
+    return source_subdomains("crtsh", domain)
+
+def hackertarget_subdomains(domain):
+    """Fetches subdomains from HackerTarget."""
+    return source_subdomains("hackertarget", domain)
+
+def rapiddns_subdomains(domain):
+    """Fetches subdomains from RapidDNS (with pagination)."""
+    return source_subdomains("rapiddns", domain)
 
 def anubisdb_subdomains(domain):
     """Fetches subdomains from AnubisDB."""
-    subdomains = set()
-    try:
-        response = session.get(f"https://jldc.me/anubis/subdomains/{domain}", timeout=DEFAULT_TIMEOUT)
-        if response.status_code == 200:
-            try:
-                data = response.json()
-                for sub in data:
-                    clean = io_clean(sub, domain)
-                    if clean: subdomains.add(clean)
-            except:
-                pass
-    except Exception:
-        pass
-    return subdomains
+    return source_subdomains("anubisdb", domain)
 
 def webarchive_subdomains(domain):
     """Fetches subdomains from WebArchive."""
-    subdomains = set()
-    try:
-        url = f"http://web.archive.org/cdx/search/cdx?url=*.{domain}/*&output=text&fl=original&collapse=urlkey"
-        response = session.get(url, timeout=40)
-        if response.status_code == 200:
-            for line in response.text.splitlines():
-                if domain in line:
-                    parts = re.findall(r'(?:[a-zA-Z0-9-]+\.)+' + re.escape(domain), line)
-                    for part in parts:
-                        sub = io_clean(part, domain)
-                        if sub: subdomains.add(sub)
-    except Exception:
-        pass
-    return subdomains
+    return source_subdomains("webarchive", domain)
 
 def io_clean(item, domain):
     """Helper to validate found items."""
-    item = clean_subdomain(item)
-    if item.endswith(f".{domain}") and validate_domain(item):
-        return item
-    return None
+    return domain_filter(domain).clean(item)
 
-def process_domain(domain, sources, output_file, progress, task_id):
-    # Runs all APIs in parallel for a domain
+def fetch_source(source, domain, cache=None):
+    # Runs one source through the cache, returns (subdomains, cache state)
+    if cache is None:
+        return source.run(domain), None
+    results, state = cache.get(source.name, domain)
+    if state == STALE:
+        cache.revalidate(source.name, domain, source.run)
+    elif state == MISS:
+        results = source.run(domain)
+        cache.put(source.name, domain, results)
+    return results, state
+
+def append_lines(path, lines):
+    # Appends lines to a shared output file
+    with file_write_lock:
+        try:
+            with open(path, "a", encoding="utf-8") as file:
+                for line in lines:
+                    file.write(f"{line}\n")
+        except IOError:
+            pass
+
+def process_domain(domain, sources, output_file, bus, resolved_file=None, cache=None, store=None, expander=None):
+    # Runs all APIs in parallel for a domain. Progress and output lines go
+    # through the MetricsBus, never straight to the console.
     all_subdomains = set()
-    console.print(f"\n[bold yellow]Target:[/bold yellow] [bold cyan]{domain}[/bold cyan]")
-    
-    with ThreadPoolExecutor(max_workers=5) as executor:
-        future_to_api = {executor.submit(source, domain): source.__name__ for source in sources}
+    bus.log(f"\n[bold yellow]Target:[/bold yellow] [bold cyan]{domain}[/bold cyan]")
+
+    with ThreadPoolExecutor(max_workers=max(1, len(sources))) as executor:
+        started = time.perf_counter()  # one worker per source, all start now
+        future_to_api = {executor.submit(fetch_source, source, domain, cache): source.name for source in sources}
         
         for future in as_completed(future_to_api):
-            api_name = future_to_api[future].replace('_subdomains', '').title()
+            name = future_to_api[future]
             try:
-                results = future.result()
-                count = len(results)
-                all_subdomains.update(results)
-                
-                if count > 0:
-                    console.print(f"  [green]✔ {api_name}: {count}[/green]")
-                else:
-                    console.print(f"  [dim]• {api_name}: 0[/dim]")
-                    
-                progress.update(task_id, advance=1)
+                results, cache_state = future.result()
             except Exception:
-                console.print(f"  [red]✘ {api_name}: Failed[/red]")
+                bus.result(domain, name, None, time.perf_counter() - started)
+                bus.log(format_source_line(name, None))
+                continue
+            all_subdomains.update(results)
+            bus.result(domain, name, len(results), time.perf_counter() - started, cache_state)
+            bus.log(format_source_line(name, len(results), cache_state, cache))
+
+    # Save to file, only names not already in it
+    new_subdomains = sorted(all_subdomains)
+    if store is not None and all_subdomains:
+        new_subdomains = store.add_new(new_subdomains)
+        bus.log(f"  [cyan]↳ New: {len(new_subdomains)}/{len(all_subdomains)}[/cyan]")
+    if new_subdomains:
+        append_lines(output_file, new_subdomains)
+
+    # Tag results with their IPs (optional)
+    if new_subdomains and resolved_file:
+        resolved = resolve_hosts(new_subdomains)
+        bus.log(f"  [cyan]↳ Resolved: {len(resolved)}/{len(new_subdomains)}[/cyan]")
+        append_lines(resolved_file, (f"{subdomain} {resolved[subdomain]}" for subdomain in sorted(resolved)))
+
+    # Permutations of what the APIs found, kept when they resolve (optional)
+    expanded = []
+    if expander is not None and all_subdomains:
+        found = {}
+        expander.expand(domain, all_subdomains, found.__setitem__, store)
+        expanded = store.add_new(sorted(found)) if store is not None else sorted(found)
+        bus.log(f"  [cyan]↳ Expanded: {len(expanded)} new[/cyan]")
+        append_lines(output_file, expanded)
+        if resolved_file:
+            append_lines(resolved_file, (f"{name} {found[name]}" for name in expanded))
 
-    # Save to file
-    if all_subdomains:
-        with file_write_lock:
+    bus.domain_done(domain, len(all_subdomains) + len(expanded), len(new_subdomains) + len(expanded))
+    return len(all_subdomains) + len(expanded)
+
+def format_source_line(name, count, cache_state=None, cache=None):
+    # One source result line, count None means the source failed
+    api_name = name.title()
+    source = SOURCES.get(name)
+    policy = source.policy if source else None
+    if count is None:
+        line = f"  [red]✘ {api_name}: Failed[/red]"
+    elif count > 0:
+        line = f"  [green]✔ {api_name}: {count}[/green]"
+    elif policy and policy.breaker.is_open:
+        line = f"  [red]✘ {api_name}: Skipped (circuit open)[/red]"
+    else:
+        line = f"  [dim]• {api_name}: 0[/dim]"
+    if cache_state and cache:
+        line += f" [dim]({CACHE_LABELS[cache_state]}, cache {cache.status(name)})[/dim]"
+    return line
+
+def format_source_summary(domain, counts, cache=None):
+    # Per-target block, same lines process_domain prints.
+    # counts maps source name -> (count, cache state)
+    lines = [f"\n[bold yellow]Target:[/bold yellow] [bold cyan]{domain}[/bold cyan]"]
+    for name, (count, cache_state) in counts.items():
+        lines.append(format_source_line(name, count, cache_state, cache))
+    return "\n".join(lines)
+
+async def discover_async(domains, on_result, global_limit=GLOBAL_CONCURRENCY, source_limits=None, cache=None):
+    # Runs every enabled async source over every domain. Each source gets
+    # its own pool of workers (its concurrency, or source_limits[name]) and
+    # all requests share the global budget. on_result(domain, source_name,
+    # subdomains or None, cache state, seconds) fires per response; stale
+    # cache entries are refreshed before returning.
+    source_limits = source_limits or {}
+    global_slots = asyncio.Semaphore(global_limit)
+    connector = aiohttp.TCPConnector(limit=global_limit, ttl_dns_cache=300)
+    refreshes = set()
+
+    async with aiohttp.ClientSession(headers=dict(session.headers), connector=connector) as client:
+        async def refresh(source, domain):
             try:
-                with open(output_file, "a", encoding="utf-8") as file:
-                    for subdomain in sorted(all_subdomains):
-                        file.write(f"{subdomain}\n")
-            except IOError:
+                async with global_slots:
+                    cache.put(source.name, domain, await source.arun(client, domain))
+            except Exception:
                 pass
-                
-    return len(all_subdomains)
+            finally:
+                cache.release_refresh(source.name, domain)
+
+        async def source_worker(source, pending_domains):
+            for domain in pending_domains:
+                started = time.perf_counter()
+                results, state = cache.get(source.name, domain) if cache else (None, None)
+                if state == STALE and cache.claim_refresh(source.name, domain):
+                    task = asyncio.ensure_future(refresh(source, domain))
+                    refreshes.add(task)
+                    task.add_done_callback(refreshes.discard)
+                elif state in (None, MISS):
+                    async with global_slots:
+                        try:
+                            results = await source.arun(client, domain)
+                        except Exception:
+                            results = None
+                    if cache:
+                        cache.put(source.name, domain, results)
+                on_result(domain, source.name, results, state, time.perf_counter() - started)
+
+        workers = []
+        for source in SOURCES.enabled(async_only=True):
+            pending_domains = iter(domains)
+            workers += [source_worker(source, pending_domains)
+                        for _ in range(source_limits.get(source.name, source.concurrency))]
+        await asyncio.gather(*workers)
+        if refreshes:
+            await asyncio.gather(*refreshes)
+
+async def scan_domains_async(domains, output_file, bus, resolved_file=None, cache=None, store=None, expander=None):
+    # Async counterpart of the per-domain loop: names are written as soon as
+    # a source returns, only names not yet written for that domain (or, with
+    # a DedupStore, not yet in the output file at all)
+    targets = {}
+    totals = {"subs": 0}
+    followups = set()  # IP tagging and expansion of finished targets
+    expansion_slots = asyncio.Semaphore(EXPANSION_SLOTS)
+    sources = SOURCES.enabled(async_only=True)
+
+    async def tag_ips(names, writer):
+        resolved = {}
+
+        def keep(host, ip):
+            if ip:
+                resolved[host] = ip
+
+        await resolver.aresolve_many(names, on_result=keep)
+        for name in sorted(resolved):
+            writer.write(f"{name} {resolved[name]}")
+
+    async def expand_names(domain, state, writer, ip_writer):
+        found = {}
+        async with expansion_slots:
+            await expander.aexpand(domain, state["subs"], found.__setitem__, store)
+        new = store.add_new(sorted(found)) if store is not None else sorted(found)
+        for name in new:
+            writer.write(name)
+            if resolved_file:
+                ip_writer.write(f"{name} {found[name]}")
+        totals["subs"] += len(new)
+        bus.log(f"[cyan]{domain}: expanded {len(new)} new[/cyan]")
+        bus.domain_done(domain, len(state["subs"]) + len(new), len(state["new"]) + len(new))
+
+    def follow_up(coroutine):
+        task = asyncio.ensure_future(coroutine)
+        followups.add(task)
+        task.add_done_callback(followups.discard)
+
+    with ResultWriter(output_file) as writer, ResultWriter(resolved_file or os.devnull) as ip_writer:
+        def on_result(domain, name, results, cache_state, seconds):
+            state = targets.setdefault(domain, {"subs": set(), "new": [], "counts": {}, "left": len(sources)})
+            if results:
+                new = sorted(results - state["subs"])
+                state["subs"].update(new)
+                if store is not None:
+                    new = store.add_new(new)
+                state["new"] += new
+                for subdomain in new:
+                    writer.write(subdomain)
+            state["counts"][name] = (None if results is None else len(results), cache_state)
+            state["left"] -= 1
+            bus.result(domain, name, state["counts"][name][0], seconds, cache_state)
+
+            if state["left"] == 0:
+                del targets[domain]
+                totals["subs"] += len(state["subs"])
+                summary = format_source_summary(domain, state["counts"], cache)
+                if store is not None and state["subs"]:
+                    summary += f"\n  [cyan]↳ New: {len(state['new'])}/{len(state['subs'])}[/cyan]"
+                bus.log(summary)
+                if resolved_file and state["new"]:
+                    follow_up(tag_ips(state["new"], ip_writer))
+                if expander is not None and state["subs"]:
+                    follow_up(expand_names(domain, state, writer, ip_writer))
+                else:
+                    bus.domain_done(domain, len(state["subs"]), len(state["new"]))
+
+        await discover_async(domains, on_result, cache=cache)
+        while followups:
+            await asyncio.gather(*followups)
+    return totals["subs"]
 
 def find_subdomains():
+    global fixtures
     show_banner()
 
-    sources = [
-        anubisdb_subdomains,
-        hackertarget_subdomains,
-        rapiddns_subdomains,
-        crtsh_subdomains,
-        webarchive_subdomains
-    ]
+    plugins, plugin_errors = SOURCES.load_plugins(os.path.join(get_files_dir(), PLUGIN_DIR))
+    if plugins:
+        console.print(f"[cyan]Loaded source plugins: {', '.join(plugins)}[/cyan]")
+    for file_name, error in plugin_errors.items():
+        console.print(f"[red]Plugin {file_name} failed: {error}[/red]")
 
     console.print("[yellow][1] Single Domain[/yellow]")
     console.print("[yellow][2] File List[/yellow]")
@@ -249,9 +635,56 @@ def find_subdomains():
     
     output_file = os.path.join(get_files_dir(), f"{fname}.txt")
 
+    resolve = console.input("[green]Resolve IPs? (y/n, default: n): [/green]").strip().lower()
+    resolved_file = os.path.join(get_files_dir(), f"{fname}_resolved.txt") if resolve == "y" else None
+
+    engine = console.input("[green]Engine (thread/async, default: thread): [/green]").strip().lower() or "thread"
+    if engine == "async" and aiohttp is None:
+        console.print("[red]aiohttp not installed, using thread engine.[/red]")
+        engine = "thread"
+
+    names = ", ".join(SOURCES.names())
+    selected = console.input(f"[green]Sources ({names}; comma separated, default: all): [/green]").strip()
+    if selected:
+        for name in SOURCES.select(selected.split(",")):
+            console.print(f"[red]Unknown source: {name}[/red]")
+    sources = SOURCES.enabled(async_only=engine == "async")
+    if not sources:
+        console.print("[red]No sources selected.[/red]")
+        return
+
+    # record: save every response under files/fixtures, replay: serve them
+    # back with no network (for benchmarks and offline regression checks)
+    mode = console.input("[green]Mode (live/record/replay, default: live): [/green]").strip().lower() or "live"
+    if mode in ("record", "replay"):
+        fixtures = FixtureStore(os.path.join(get_files_dir(), FIXTURE_DIR), mode)
+
+    # A replay run always goes to the fixtures, never to the cache
+    cache = None
+    if mode != "replay":
+        use_cache = console.input("[green]Use cache? (y/n/refresh, default: y): [/green]").strip().lower() or "y"
+        if use_cache in ("y", "refresh"):
+            cache = ResultCache(os.path.join(get_files_dir(), CACHE_FILE), CACHE_TTL, CACHE_STALE_TTL,
+                                refresh=use_cache == "refresh")
+
+    # Second pass: permutations of the found names, resolved in bulk
+    expander = None
+    expand = console.input("[green]Expand with permutations? (y/n, default: n): [/green]").strip().lower()
+    if expand == "y":
+        rounds = console.input("[green]Expansion rounds (default: 1): [/green]").strip()
+        words = DEFAULT_WORDS + load_words(os.path.join(get_files_dir(), PERMUTATION_WORDS))
+        expander = Expander(words, rounds=int(rounds) if rounds.isdigit() and int(rounds) > 0 else 1)
+
+    # Names already in the output file (from earlier runs or other tools)
+    # are not written again
+    store = DedupStore(output_file)
+
     console.print(f"\n[bold]Scanning {len(domains)} targets...[/bold]")
 
     total_subs = 0
+    if engine == "async":
+        domains = list(dict.fromkeys(domains))
+    # The bus's renderer is the only thing drawing while the scan runs
     with Progress(
         SpinnerColumn(),
         TextColumn("[progress.description]{task.description}"),
@@ -259,16 +692,32 @@ def find_subdomains():
         TextColumn("[bold blue]{task.completed}/{task.total} APIs"),
         TimeElapsedColumn(),
         console=console,
-    ) as progress:
-        
-        for domain in domains:
-            task_id = progress.add_task(f"Scanning {domain}...", total=len(sources), visible=True)
-            subs = process_domain(domain, sources, output_file, progress, task_id)
-            total_subs += subs
-            progress.update(task_id, completed=len(sources))
+        auto_refresh=False,
+    ) as progress, MetricsBus(progress, len(domains) * len(sources), f"{len(domains)} targets") as bus:
+
+        if engine == "async":
+            total_subs = asyncio.run(scan_domains_async(domains, output_file, bus, resolved_file, cache, store, expander))
+        else:
+            for domain in domains:
+                total_subs += process_domain(domain, sources, output_file, bus, resolved_file, cache, store, expander)
+
+    if cache:
+        cache.close()
+    store.close()
 
     console.print(f"\n[bold green]Done! Total Found: {total_subs}[/bold green]")
+    console.print(f"[bold green]New names: {store.status()}[/bold green]")
+    if expander is not None:
+        console.print(f"[bold green]Expansion: {expander.status()}[/bold green]")
+    for source in sources:
+        status = "; ".join(part for part in (source.stats.status(), source.policy.status()) if part)
+        console.print(f"[dim]{source.name.title()}: {status}[/dim]")
+    if fixtures is not None and fixtures.replaying:
+        console.print(f"[dim]Replayed {fixtures.served} responses, {fixtures.missing} not recorded[/dim]")
     console.print(f"[bold yellow]Saved to: {output_file}[/bold yellow]")
+    console.print(f"[bold yellow]Stats saved to: {bus.export(os.path.join(get_files_dir(), f'{fname}_stats.json'))}[/bold yellow]")
+    if resolved_file:
+        console.print(f"[bold yellow]IPs saved to: {resolved_file}[/bold yellow]")
     console.input("\nPress Enter to exit...")
 
 if __name__ == "__main__":
@@ -0,0 +1,120 @@
+from array import array
+from bisect import bisect_left
+import hashlib
+import os
+import sys
+import threading
+
+# Journal entries are 8-byte hashes of the completed keys, flushed in batches
+HASH_SIZE = 8
+FLUSH_EVERY = 256
+# Power of two, buckets used when sorting the journal on resume
+SORT_BUCKETS = 4096
+
+
+def hash_key(key):
+    # 64-bit hash of a (host, port) or domain key
+    return int.from_bytes(hashlib.blake2b(key.encode("utf-8", "ignore"), digest_size=HASH_SIZE).digest(), "little")
+
+def load_completed(path):
+    # Reads a journal into a sorted array of 64-bit hashes (8 bytes per key)
+    completed = array("Q")
+    try:
+        with open(path, "rb") as file:
+            data = file.read()
+    except OSError:
+        return completed
+    usable = len(data) - len(data) % HASH_SIZE  # drop a torn final write
+    completed.frombytes(data[:usable])
+    del data
+    if sys.byteorder != "little":
+        completed.byteswap()
+    return sort_hashes(completed)
+
+def trim_torn_tail(file, start=0):
+    # Cuts a torn final write off a file of 8-byte hashes stored from
+    # `start` on, so later appends stay aligned
+    size = file.seek(0, os.SEEK_END)
+    torn = (size - start) % HASH_SIZE if size > start else 0
+    if torn:
+        file.truncate(size - torn)
+
+def sort_hashes(values):
+    # Sorts an array("Q") bucket by bucket on the top bits, so only one
+    # small bucket is ever expanded into a Python list
+    buckets = [array("Q") for _ in range(SORT_BUCKETS)]
+    shift = 64 - SORT_BUCKETS.bit_length() + 1
+    for value in values:
+        buckets[value >> shift].append(value)
+    result = array("Q")
+    for bucket in buckets:
+        result.extend(sorted(bucket))
+    return result
+
+
+class Checkpoint:
+    """Append-only journal of completed keys for resumable runs.
+
+    On resume the journal is loaded into a sorted array of hashes and looked
+    up with bisect, so a 5M-key run costs about 40 MB instead of a set of
+    strings.
+    """
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        self.completed = load_completed(path) if resume else array("Q")
+        self.skipped = 0
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._file = open(path, "ab" if resume else "wb")
+        if resume:
+            trim_torn_tail(self._file)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.completed)
+
+    def __contains__(self, key):
+        value = hash_key(key)
+        index = bisect_left(self.completed, value)
+        return index < len(self.completed) and self.completed[index] == value
+
+    def filter(self, items, key=str):
+        # Yields items whose key is not in the journal, counting the skipped ones
+        for item in items:
+            if self.completed and key(item) in self:
+                self.skipped += 1
+                continue
+            yield item
+
+    def add(self, key):
+        # Marks a key as completed
+        with self._lock:
+            self._file.write(hash_key(key).to_bytes(HASH_SIZE, "little"))
+            self._pending += 1
+            if self._pending >= FLUSH_EVERY:
+                self._file.flush()
+                self._pending = 0
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._file.close()
+
+    def finish(self):
+        # Run completed, the journal is no longer needed
+        self.close()
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+
+def journal_path(output_file):
+    # Journal file kept next to the output file
+    return f"{output_file}.ckpt"
@@ -0,0 +1,115 @@
+import threading
+import time
+
+# AIMD tuning. Every ADJUST_INTERVAL seconds the controller looks at the
+# probes finished in that window and moves the in-flight limit.
+ADJUST_INTERVAL = 2.0
+MIN_SAMPLES = 20
+# Additive step as a fraction of the current limit (at least 1)
+INCREASE_FRACTION = 0.1
+# Multiplicative decrease on congestion
+DECREASE_FACTOR = 0.7
+# Congestion: too many timeouts, or p95 latency far above the best p50 seen
+MAX_TIMEOUT_RATE = 0.15
+LATENCY_FACTOR = 4.0
+# Upper bounds for the two scan engines
+MAX_THREADS = 500
+MAX_ASYNC = 5000
+
+
+def percentile(values, fraction):
+    # Nearest-rank percentile of an unsorted list
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class AIMDController:
+    """Adjusts the number of in-flight probes to maximise completed probes/s.
+
+    Scanners call record() after each probe and read `limit` before starting
+    the next one. The limit grows additively while throughput holds and
+    shrinks multiplicatively when timeouts or latency show congestion.
+    """
+
+    def __init__(self, initial, minimum=4, maximum=MAX_ASYNC, interval=ADJUST_INTERVAL):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = min(self.maximum, max(self.minimum, initial))
+        self.interval = interval
+        self.throughput = 0.0
+        self.success_rate = 1.0
+        self.timeout_rate = 0.0
+        self.p50 = self.p95 = 0.0
+        self._best_p50 = None
+        self._last_throughput = 0.0
+        self._window_start = time.monotonic()
+        self._latencies = []
+        self._ok = self._timeouts = 0
+        self._lock = threading.Lock()
+        self._listeners = []
+
+    def on_change(self, callback):
+        # Registers callback(limit), called whenever the limit moves
+        self._listeners.append(callback)
+        return callback
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def set_maximum(self, maximum):
+        # Moves the upper bound (e.g. under memory pressure), clamping the limit
+        with self._lock:
+            self.maximum = max(self.minimum, maximum)
+            old_limit = self.limit
+            self.limit = min(self.limit, self.maximum)
+            changed = self.limit != old_limit
+        if changed:
+            for callback in self._listeners:
+                callback(self.limit)
+
+    def record(self, latency, ok, timed_out=False):
+        # Records one finished probe, latency in seconds
+        with self._lock:
+            self._latencies.append(latency)
+            self._ok += bool(ok)
+            self._timeouts += bool(timed_out)
+            now = time.monotonic()
+            elapsed = now - self._window_start
+            if elapsed < self.interval or len(self._latencies) < MIN_SAMPLES:
+                return
+            old_limit = self.limit
+            self._adjust(elapsed)
+            self._window_start = now
+            self._latencies = []
+            self._ok = self._timeouts = 0
+            changed = self.limit != old_limit
+        if changed:
+            for callback in self._listeners:
+                callback(self.limit)
+
+    def _adjust(self, elapsed):
+        count = len(self._latencies)
+        self.throughput = count / elapsed
+        self.success_rate = self._ok / count
+        self.timeout_rate = self._timeouts / count
+        self.p50 = percentile(self._latencies, 0.5)
+        self.p95 = percentile(self._latencies, 0.95)
+        if self._best_p50 is None or self.p50 < self._best_p50:
+            self._best_p50 = self.p50
+
+        congested = (self.timeout_rate > MAX_TIMEOUT_RATE or
+                     self.p95 > self._best_p50 * LATENCY_FACTOR and self.p95 > 0.5)
+        if congested:
+            self.limit = max(self.minimum, int(self.limit * DECREASE_FACTOR))
+        elif self.throughput >= self._last_throughput * 0.95:
+            step = max(1, int(self.limit * INCREASE_FRACTION))
+            self.limit = min(self.maximum, self.limit + step)
+        self._last_throughput = self.throughput
+
+    def status(self):
+        # Short text for progress lines
+        return (f"Level: {self.limit} | {self.throughput:.0f}/s | "
+                f"TO: {self.timeout_rate * 100:.0f}% | p95: {self.p95 * 1000:.0f}ms")
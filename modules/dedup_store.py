@@ -0,0 +1,184 @@
+from array import array
+from bisect import bisect_left
+import mmap
+import os
+import struct
+import sys
+import threading
+from checkpoint import HASH_SIZE, hash_key, sort_hashes, trim_torn_tail
+
+# Index file: header, sorted 64-bit name hashes, then hashes appended by
+# later runs in arrival order. The header records the output file size the
+# index matches; any other size means the output changed behind our back
+# and the index is rebuilt from it.
+MAGIC = b"SNIDX1\0\0"
+HEADER = struct.Struct("<8sQQ")  # magic, output size, sorted hash count
+# Appended hashes are merged into the sorted part once they pass this many,
+# or a quarter of the sorted part
+COMPACT_MIN = 1 << 20
+
+
+def index_path(output_file):
+    # Index kept next to the output file
+    return f"{output_file}.idx"
+
+def file_size(path):
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+def hash_name(name):
+    return hash_key(name.strip().lower())
+
+def read_name_hashes(path):
+    # Hashes of every name already in an output file, one name per line
+    hashes = array("Q")
+    try:
+        with open(path, encoding="utf-8", errors="ignore") as file:
+            for line in file:
+                if line.strip():
+                    hashes.append(hash_name(line))
+    except OSError:
+        pass
+    return hashes
+
+def write_index(path, output_size, hashes):
+    # Writes a sorted hash array as a fresh index file
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as file:
+        file.write(HEADER.pack(MAGIC, output_size, len(hashes)))
+        if sys.byteorder != "little":
+            hashes = array("Q", hashes)
+            hashes.byteswap()
+        hashes.tofile(file)
+    os.replace(tmp, path)
+
+
+class DedupStore:
+    """Names already written to an output file, across domains and runs.
+
+    Lookups bisect the sorted hashes through mmap, so tens of millions of
+    names cost page cache instead of process memory; only names added since
+    the last compaction are held in a set. Hashes are 64-bit, a collision
+    is unlikely below billions of names.
+    """
+
+    def __init__(self, output_file):
+        self.output_file = output_file
+        self.path = index_path(output_file)
+        self.new = 0
+        self.known = 0
+        self._lock = threading.Lock()
+        self._map = None
+        self._sorted = array("Q")
+        self._delta = set()
+        if not self._index_matches():
+            write_index(self.path, file_size(output_file), sort_hashes(read_name_hashes(output_file)))
+        tail_start = self._load()
+        self._file = open(self.path, "ab")
+        trim_torn_tail(self._file, tail_start)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self._sorted) + len(self._delta)
+
+    def __contains__(self, name):
+        return self._seen(hash_name(name))
+
+    def _index_matches(self):
+        try:
+            with open(self.path, "rb") as file:
+                magic, output_size, _ = HEADER.unpack(file.read(HEADER.size))
+        except (OSError, struct.error):
+            return False
+        return magic == MAGIC and output_size == file_size(self.output_file)
+
+    def _load(self):
+        # Maps the sorted part and reads the appended hashes, returns the
+        # offset they start at
+        with open(self.path, "rb") as file:
+            _, _, count = HEADER.unpack(file.read(HEADER.size))
+            end = HEADER.size + count * HASH_SIZE
+            if count and sys.byteorder == "little":
+                self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+                self._sorted = memoryview(self._map)[HEADER.size:end].cast("Q")
+            elif count:
+                self._sorted.frombytes(file.read(count * HASH_SIZE))
+                self._sorted.byteswap()
+            file.seek(end)
+            tail = file.read()
+        usable = len(tail) - len(tail) % HASH_SIZE  # drop a torn final write
+        self._delta = {int.from_bytes(tail[i:i + HASH_SIZE], "little") for i in range(0, usable, HASH_SIZE)}
+        return end
+
+    def _seen(self, value):
+        if value in self._delta:
+            return True
+        index = bisect_left(self._sorted, value)
+        return index < len(self._sorted) and self._sorted[index] == value
+
+    def unseen(self, names):
+        # Returns the names not written before, in order and once each,
+        # without marking them; add_new() them once they are written
+        fresh = []
+        values = set()
+        with self._lock:
+            for name in names:
+                value = hash_name(name)
+                if value in values or self._seen(value):
+                    self.known += 1
+                    continue
+                values.add(value)
+                fresh.append(name)
+        return fresh
+
+    def add_new(self, names):
+        # Returns the names not written before, in order, and marks them
+        fresh = []
+        with self._lock:
+            for name in names:
+                value = hash_name(name)
+                if self._seen(value):
+                    self.known += 1
+                    continue
+                self._delta.add(value)
+                self._file.write(value.to_bytes(HASH_SIZE, "little"))
+                fresh.append(name)
+            self.new += len(fresh)
+        return fresh
+
+    def close(self):
+        # Call after the output file is flushed: records its size, and merges
+        # the appended hashes into the sorted part when they grew large
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.close()
+            count = len(self._sorted)
+            compact = len(self._delta) > max(COMPACT_MIN, count // 4)
+            hashes = self._sorted
+            if self._map is not None:
+                if compact:
+                    hashes = array("Q")
+                    hashes.frombytes(self._sorted.cast("B"))  # copy before unmapping
+                self._sorted.release()
+                self._map.close()
+                self._map = None
+            output_size = file_size(self.output_file)
+            if compact:
+                hashes.extend(self._delta)
+                write_index(self.path, output_size, sort_hashes(hashes))
+            else:
+                with open(self.path, "r+b") as file:
+                    file.write(HEADER.pack(MAGIC, output_size, count))
+            self._sorted = array("Q")
+            self._delta = set()
+
+    def status(self):
+        return f"{self.new} new, {self.known} already in {os.path.basename(self.output_file)}"
@@ -0,0 +1,169 @@
+import asyncio
+from collections import OrderedDict
+import socket
+import threading
+import time
+
+# Cache lifetimes in seconds. getaddrinfo does not expose record TTLs, so
+# answers are kept for a fixed time and NXDOMAIN for a shorter one.
+POSITIVE_TTL = 300
+NEGATIVE_TTL = 60
+MAX_ENTRIES = 200000
+# Parallel lookups used when pre-resolving a host list
+DEFAULT_CONCURRENCY = 100
+
+# getaddrinfo errors that mean "name does not exist", safe to cache
+NXDOMAIN_ERRORS = {socket.EAI_NONAME, getattr(socket, "EAI_NODATA", socket.EAI_NONAME)}
+
+
+class Resolver:
+    """Thread-safe IPv4 resolver with a TTL-aware LRU cache.
+
+    The cache is shared by every thread and event loop; concurrent async
+    lookups of one host are coalesced within each loop.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, positive_ttl=POSITIVE_TTL, negative_ttl=NEGATIVE_TTL):
+        self.max_entries = max_entries
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()  # host -> (ip or None, expires_at)
+        self._lock = threading.Lock()
+        self._inflight = {}  # (loop, host) -> asyncio.Future, coalesces duplicate async lookups
+
+    def lookup(self, host):
+        # Returns (found, ip) from the cache, ip is None for a cached NXDOMAIN
+        host = host.lower().rstrip(".")
+        with self._lock:
+            entry = self._cache.get(host)
+            if entry is None:
+                self.misses += 1
+                return False, None
+            ip, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._cache[host]
+                self.misses += 1
+                return False, None
+            self._cache.move_to_end(host)
+            self.hits += 1
+            return True, ip
+
+    def cached(self, host):
+        # Cached IP of host or None, not counted as a hit or a miss
+        with self._lock:
+            entry = self._cache.get(host.lower().rstrip("."))
+        return entry[0] if entry else None
+
+    def store(self, host, ip):
+        # Caches an answer, ip=None records a negative (NXDOMAIN) entry
+        host = host.lower().rstrip(".")
+        ttl = self.positive_ttl if ip else self.negative_ttl
+        with self._lock:
+            self._cache[host] = (ip, time.monotonic() + ttl)
+            self._cache.move_to_end(host)
+            while len(self._cache) > self.max_entries:
+                self._cache.popitem(last=False)
+
+    def _remember_error(self, host, error):
+        if error.errno in NXDOMAIN_ERRORS:
+            self.store(host, None)
+
+    def resolve(self, host):
+        # Blocking lookup, returns the IP or None
+        found, ip = self.lookup(host)
+        if found:
+            return ip
+        try:
+            ip = socket.gethostbyname(host)
+        except socket.gaierror as e:
+            self._remember_error(host, e)
+            return None
+        except (UnicodeError, OSError):
+            return None
+        self.store(host, ip)
+        return ip
+
+    async def aresolve(self, host):
+        # Non-blocking lookup on the running event loop, returns the IP or None
+        found, ip = self.lookup(host)
+        if found:
+            return ip
+        # A future can only be awaited on its own loop, and threads running
+        # their own loops share this resolver
+        loop = asyncio.get_running_loop()
+        key = (loop, host)
+        with self._lock:
+            pending = self._inflight.get(key)
+            if pending is None:
+                self._inflight[key] = loop.create_future()
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        ip = None
+        try:
+            ip = await self._agetaddrinfo(host)
+        finally:
+            with self._lock:
+                pending = self._inflight.pop(key)
+            pending.set_result(ip)
+        return ip
+
+    async def _agetaddrinfo(self, host):
+        try:
+            infos = await asyncio.get_running_loop().getaddrinfo(host, None, family=socket.AF_INET, type=socket.SOCK_STREAM)
+        except socket.gaierror as e:
+            self._remember_error(host, e)
+            return None
+        except (UnicodeError, OSError):
+            return None
+        if not infos:
+            return None
+        ip = infos[0][4][0]
+        self.store(host, ip)
+        return ip
+
+    async def aresolve_many(self, hosts, concurrency=DEFAULT_CONCURRENCY, on_result=None):
+        # Resolves an iterable of hosts with at most `concurrency` lookups in
+        # flight. Calls on_result(host, ip) as answers arrive.
+        hosts = iter(hosts)
+
+        async def worker():
+            for host in hosts:
+                ip = await self.aresolve(host)
+                if on_result:
+                    on_result(host, ip)
+
+        await asyncio.gather(*(worker() for _ in range(max(1, concurrency))))
+
+    def resolve_many(self, hosts, concurrency=DEFAULT_CONCURRENCY, on_result=None):
+        # Blocking wrapper around aresolve_many, used to pre-resolve a host list
+        asyncio.run(self.aresolve_many(hosts, concurrency, on_result))
+
+    def prefetch(self, hosts, concurrency=DEFAULT_CONCURRENCY):
+        # Warms the cache for a host list, returns how many resolved
+        resolved = [0]
+
+        def count(host, ip):
+            if ip:
+                resolved[0] += 1
+
+        self.resolve_many(hosts, concurrency, count)
+        return resolved[0]
+
+
+# Shared per-process instance used by the scanners and subdomain tools
+resolver = Resolver()
+
+
+def resolve_hosts(hosts, concurrency=DEFAULT_CONCURRENCY):
+    # Resolves hosts in bulk, returns {host: ip} for the ones that resolve
+    resolved = {}
+
+    def keep(host, ip):
+        if ip:
+            resolved[host] = ip
+
+    resolver.resolve_many(hosts, concurrency, keep)
+    return resolved
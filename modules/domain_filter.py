@@ -0,0 +1,63 @@
+from functools import lru_cache
+import re
+
+# A hostname: dot separated labels and an alphabetic TLD
+DOMAIN_PATTERN = re.compile(r"(?:[a-zA-Z0-9-]+\.)+[a-zA-Z]{2,63}")
+LABELS = r"(?:[a-z0-9-]+\.)+"
+# Compiled filters kept for this many target domains
+FILTER_CACHE_SIZE = 4096
+
+
+def validate_domain(domain):
+    # Checks if domain format is valid
+    return DOMAIN_PATTERN.fullmatch(domain) is not None
+
+def normalize_name(name):
+    # Lowercase, no surrounding blanks, trailing dot or leading wildcard
+    name = name.strip().lower().rstrip(".")
+    if name.startswith("*."):
+        name = name[2:]
+    return name
+
+
+class DomainFilter:
+    """Validates and normalises candidate subdomains of one target domain.
+
+    The patterns are compiled once per domain. clean_many() checks a whole
+    batch with a single multiline regex pass over the joined candidates
+    instead of one Python call per name.
+    """
+
+    def __init__(self, domain):
+        self.domain = normalize_name(domain)
+        self.valid = validate_domain(self.domain)
+        escaped = re.escape(self.domain)
+        self._name = re.compile(LABELS + escaped)
+        self._batch = re.compile(r"^[ \t\r]*(?:\*\.)?(" + LABELS + escaped + r")\.?[ \t\r]*$", re.M)
+        self._embedded = re.compile(LABELS + escaped)
+
+    def clean(self, name):
+        # One candidate -> normalised subdomain, or None
+        if not self.valid:
+            return None
+        name = normalize_name(name)
+        return name if self._name.fullmatch(name) else None
+
+    def clean_many(self, names):
+        # Iterable of candidates (entries may hold several names separated
+        # by newlines) -> set of normalised subdomains
+        if not self.valid:
+            return set()
+        return set(self._batch.findall("\n".join(names).lower()))
+
+    def extract(self, lines):
+        # Subdomains embedded anywhere in free text lines, e.g. archived URLs
+        if not self.valid:
+            return set()
+        return set(self._embedded.findall("\n".join(lines).lower()))
+
+
+@lru_cache(maxsize=FILTER_CACHE_SIZE)
+def domain_filter(domain):
+    # Shared DomainFilter for a target domain
+    return DomainFilter(domain)
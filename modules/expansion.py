@@ -0,0 +1,192 @@
+import asyncio
+from collections import Counter
+import re
+import secrets
+from checkpoint import hash_key
+from dns_resolver import DEFAULT_CONCURRENCY, resolver
+
+# Words tried around every discovered label, on top of the ones learned
+# from the discovered names and an optional wordlist file
+DEFAULT_WORDS = [
+    "dev", "development", "staging", "stage", "stg", "test", "qa", "uat", "prod", "preprod",
+    "api", "admin", "internal", "intranet", "beta", "demo", "old", "new", "v1", "v2",
+    "app", "portal", "vpn", "mail", "cdn", "static", "m", "www", "auth", "sso",
+]
+# Most frequent tokens of the discovered names added to the words
+LEARNED_WORDS = 20
+# Numeric variants: numbers in a label are moved up and down by this much,
+# labels without one get 1..NUMBER_RANGE appended
+NUMBER_RANGE = 3
+# Names with more labels below the target than this are not recursed into
+MAX_DEPTH = 3
+# Upper bound on candidates tried per target
+MAX_CANDIDATES = 200000
+# Random labels resolved per zone to detect wildcard DNS
+WILDCARD_PROBES = 3
+# Bloom filter of candidates already tried: fixed memory whatever the
+# candidate count, a false positive only skips a candidate
+BLOOM_BITS = 1 << 25  # 4 MB
+BLOOM_HASHES = 4
+
+TOKEN_SPLIT = re.compile(r"[^a-z]+")
+NUMBER = re.compile(r"\d+")
+LABEL = re.compile(r"[a-z0-9](?:[a-z0-9-]{0,61}[a-z0-9])?")
+
+
+def load_words(path):
+    # One word per line, blank lines and # comments skipped
+    words = []
+    try:
+        with open(path, encoding="utf-8", errors="ignore") as file:
+            for line in file:
+                word = line.strip().lower()
+                if word and not word.startswith("#") and LABEL.fullmatch(word):
+                    words.append(word)
+    except OSError:
+        pass
+    return words
+
+def learn_words(names, domain, limit=LEARNED_WORDS):
+    # Tokens seen in at least two of the names' labels, most frequent first
+    counts = Counter()
+    suffix = f".{domain}"
+    for name in names:
+        if name.endswith(suffix):
+            counts.update(set(token for token in TOKEN_SPLIT.split(name[:-len(suffix)]) if len(token) > 1))
+    return [token for token, count in counts.most_common(limit) if count > 1]
+
+def number_variants(label):
+    # api2 -> api1, api3, api4 ...; zero padding is kept
+    variants = []
+    matches = list(NUMBER.finditer(label))
+    if not matches:
+        return [f"{label}{i}" for i in range(1, NUMBER_RANGE + 1)]
+    for match in matches:
+        value = int(match.group())
+        for step in range(-NUMBER_RANGE, NUMBER_RANGE + 1):
+            if step and value + step >= 0:
+                number = str(value + step).zfill(len(match.group()))
+                variants.append(label[:match.start()] + number + label[match.end():])
+    return variants
+
+
+class BloomFilter:
+    """Fixed-size set membership test with no false negatives."""
+
+    def __init__(self, bits=BLOOM_BITS, hashes=BLOOM_HASHES):
+        self.bits = bits
+        self.hashes = hashes
+        self._array = bytearray(bits // 8)
+
+    def add(self, key):
+        # Adds key, returns False if it was (probably) there already
+        value = hash_key(key)
+        first, second = value & 0xFFFFFFFF, (value >> 32) | 1
+        added = False
+        for i in range(self.hashes):
+            bit = (first + i * second) % self.bits
+            byte, mask = bit >> 3, 1 << (bit & 7)
+            if not self._array[byte] & mask:
+                self._array[byte] |= mask
+                added = True
+        return added
+
+
+class Expander:
+    """Second discovery pass over the names the APIs returned.
+
+    Candidates are permutations of the discovered labels (word prefixes and
+    suffixes, sibling and child names, numeric neighbours) generated
+    lazily, resolved through the shared async resolver and kept only when
+    they resolve outside a wildcard answer and were not known before.
+    Names found this way seed the next round, up to `rounds` rounds.
+    """
+
+    def __init__(self, words=None, rounds=1, concurrency=DEFAULT_CONCURRENCY, max_candidates=MAX_CANDIDATES):
+        self.words = list(dict.fromkeys(words if words is not None else DEFAULT_WORDS))
+        self.rounds = rounds
+        self.concurrency = concurrency
+        self.max_candidates = max_candidates
+        self.tried = 0
+        self.found = 0
+        self.wildcards = 0
+        self._wildcard_ips = {}  # zone -> asyncio.Future of the wildcard IP set
+
+    def candidates(self, names, domain, words):
+        # Lazily yields permutations of every name under domain
+        suffix = f".{domain}"
+        for name in names:
+            if not name.endswith(suffix):
+                continue
+            first, parent = name.split(".", 1)
+            depth = name[:-len(suffix)].count(".") + 1
+            variants = number_variants(first)
+            for word in words:
+                variants += (f"{word}-{first}", f"{first}-{word}", word)
+                if depth < MAX_DEPTH:
+                    yield f"{word}.{name}"
+            for label in variants:
+                if len(label) <= 63:
+                    yield f"{label}.{parent}"
+
+    async def wildcard_ips(self, zone):
+        # IPs a zone answers for names that cannot exist, empty if none
+        pending = self._wildcard_ips.get(zone)
+        if pending is None:
+            pending = asyncio.get_running_loop().create_future()
+            self._wildcard_ips[zone] = pending
+            probes = await asyncio.gather(*(resolver.aresolve(f"{secrets.token_hex(6)}.{zone}")
+                                            for _ in range(WILDCARD_PROBES)))
+            ips = {ip for ip in probes if ip}
+            pending.set_result(ips)
+            return ips
+        return await asyncio.shield(pending)
+
+    async def aexpand(self, domain, names, on_found, known=None):
+        # Runs the rounds for one target. on_found(name, ip) fires for every
+        # new resolving name; `known` (e.g. a DedupStore) holds names that do
+        # not count as new. Returns the number found.
+        known = known if known is not None else ()
+        seen = BloomFilter()
+        for name in names:
+            seen.add(name)
+        words = list(dict.fromkeys(self.words + learn_words(names, domain)))
+        found_before = self.found
+        budget = [self.max_candidates]
+        seeds = names
+
+        for _ in range(self.rounds):
+            fresh = []
+            pending = self.candidates(seeds, domain, words)
+
+            async def worker():
+                for candidate in pending:
+                    if budget[0] <= 0:
+                        return
+                    if not seen.add(candidate) or candidate in known:
+                        continue
+                    budget[0] -= 1
+                    self.tried += 1
+                    ip = await resolver.aresolve(candidate)
+                    if not ip:
+                        continue
+                    if ip in await self.wildcard_ips(candidate.split(".", 1)[1]):
+                        self.wildcards += 1
+                        continue
+                    self.found += 1
+                    fresh.append(candidate)
+                    on_found(candidate, ip)
+
+            await asyncio.gather(*(worker() for _ in range(max(1, self.concurrency))))
+            if not fresh or budget[0] <= 0:
+                break
+            seeds = fresh
+        return self.found - found_before
+
+    def expand(self, domain, names, on_found, known=None):
+        # Blocking wrapper for the thread engine, each call runs its own loop
+        self._wildcard_ips = {}
+        return asyncio.run(self.aexpand(domain, names, on_found, known))
+
+    def status(self):
+        return f"{self.tried} candidates tried, {self.found} found, {self.wildcards} wildcard answers dropped"
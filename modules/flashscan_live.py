@@ -0,0 +1,263 @@
+from collections import deque
+import os
+import re
+import sys
+import threading
+import time
+from checkpoint import hash_key
+from result_writer import ProgressLine
+
+# Seconds between two polls of the followed output files (and status redraws)
+POLL_INTERVAL = 0.25
+# Hits/s and hosts/s are measured over the last RATE_WINDOW seconds
+RATE_WINDOW = 10.0
+# A scan with no new hit and no progress for this long is shown as stalled
+STALL_AFTER = 30.0
+# "done/total" counters in the scanner's own stdout
+PROGRESS_PATTERN = re.compile(r"(\d+)\s*/\s*(\d+)")
+ANSI_PATTERN = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+
+
+def format_duration(seconds):
+    if seconds is None:
+        return "--"
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    return f"{seconds // 60}m{seconds % 60:02d}s" if seconds >= 60 else f"{seconds}s"
+
+
+class FileFollower:
+    """Returns the complete lines appended to a file since the last poll.
+
+    A file that does not exist yet gives nothing; one that was truncated or
+    replaced is read again from the top.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0
+        self.inode = None
+        self._partial = b""
+
+    def poll(self, final=False):
+        # final=True also returns a last line without its newline
+        try:
+            with open(self.path, "rb") as file:
+                stat = os.fstat(file.fileno())
+                if stat.st_ino != self.inode or stat.st_size < self.offset:
+                    self.inode = stat.st_ino
+                    self.offset = 0
+                    self._partial = b""
+                file.seek(self.offset)
+                data = file.read()
+        except OSError:
+            data = b""
+        self.offset += len(data)
+        lines = (self._partial + data).split(b"\n")
+        self._partial = lines.pop()
+        if final and self._partial:
+            lines.append(self._partial)
+            self._partial = b""
+        return [line.decode("utf-8", "ignore") for line in lines]
+
+
+class LiveScan:
+    """Live view of a running FlashScan: hits as they land, hits/s and ETA.
+
+    Follows the output files FlashScan writes (follow()/unfollow(), several
+    at once for shards). Every hit `parse` accepts is handed out once per
+    host and port, to on_hit and/or put on the `hits` queue, while the scan
+    is still running; None goes on the queue when it ends. on_hit runs on
+    the follower thread, so slow consumers should take the queue.
+    Progress comes from "done/total" counters in FlashScan's stdout passed
+    to feed(), or from advance() (finished shards). A scan with no new hit
+    and no progress for stall_after seconds is shown as stalled. Use as a
+    context manager around the scan.
+    """
+
+    def __init__(self, total, parse, on_hit=None, hits=None, echo=True, interval=POLL_INTERVAL,
+                 stall_after=STALL_AFTER, stream=None):
+        self.total = total
+        self.parse = parse
+        self.on_hit = on_hit
+        self.hits = hits
+        self.echo = echo
+        self.interval = interval
+        self.stall_after = stall_after
+        self.stream = stream or sys.stdout
+        self.found = 0
+        self.reported = 0
+        self.advanced = 0
+        self.first_hit = None
+        self.stalls = 0
+        self.started = time.monotonic()
+        self._progress = ProgressLine(interval=0, stream=self.stream)
+        self._followers = {}
+        self._seen = set()
+        self._samples = deque()
+        self._changed = self.started
+        self._stalled = False
+        self._stdout = ""
+        self._lines = deque()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self.started = self._changed = time.monotonic()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def scanned(self):
+        return self.reported + self.advanced
+
+    # --- Sources (any thread) --
+
+    def follow(self, path):
+        with self._lock:
+            self._followers[path] = FileFollower(path)
+
+    def unfollow(self, path):
+        # Stops following a file after reading what is left in it
+        with self._lock:
+            follower = self._followers.pop(path, None)
+            if follower:
+                self._take(follower.poll(final=True))
+
+    def advance(self, hosts):
+        with self._lock:
+            self.advanced += hosts
+
+    def skip(self, hosts):
+        # Hosts already scanned by an earlier run, no longer part of the total
+        with self._lock:
+            self.total -= hosts
+
+    def feed(self, text):
+        # Chunk of FlashScan's stdout: progress counters are read, result
+        # rows dropped (the output file has them), anything else is printed
+        self._stdout += text
+        pieces = re.split(r"[\r\n]", self._stdout)
+        self._stdout = pieces.pop()
+        for piece in pieces:
+            piece = ANSI_PATTERN.sub("", piece).strip()
+            if piece and not self.parse(piece) and not self._progress_in(piece):
+                self._lines.append(piece)
+        # A progress line is often redrawn with '\r' and not ended for a while
+        self._progress_in(ANSI_PATTERN.sub("", self._stdout))
+
+    def _progress_in(self, text):
+        # Takes a "done/total" counter for our total from text, True if it had any
+        counters = [(int(done), int(total)) for done, total in PROGRESS_PATTERN.findall(text)]
+        matching = [done for done, total in counters if total == self.total]
+        if matching:
+            with self._lock:
+                self.reported = max(self.reported, matching[0])
+        return bool(counters)
+
+    def log(self, text):
+        self._lines.append(text)
+
+    # --- Follower thread --
+
+    def _take(self, lines):
+        for line in lines:
+            record = self.parse(line)
+            if not record:
+                continue
+            key = hash_key(f"{record['host']}:{record.get('port')}")
+            if key in self._seen:
+                continue
+            self._seen.add(key)
+            self.found += 1
+            if self.first_hit is None:
+                self.first_hit = time.monotonic() - self.started
+            if self.echo:
+                self._lines.append(line.strip())
+            if self.on_hit:
+                self.on_hit(record)
+            if self.hits is not None:
+                self.hits.put(record)
+
+    def poll(self):
+        with self._lock:
+            for follower in list(self._followers.values()):
+                self._take(follower.poll())
+        now = time.monotonic()
+        sample = (now, self.scanned, self.found)
+        if self._samples and sample[1:] != self._samples[-1][1:]:
+            self._changed = now
+        self._samples.append(sample)
+        while len(self._samples) > 2 and now - self._samples[1][0] >= RATE_WINDOW:
+            self._samples.popleft()
+        stalled = now - self._changed >= self.stall_after
+        if stalled and not self._stalled:
+            self.stalls += 1
+        self._stalled = stalled
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.poll()
+            self.render()
+
+    # --- Figures --
+
+    def rates(self):
+        # (hosts/s, hits/s) over the rate window
+        if len(self._samples) < 2:
+            return 0.0, 0.0
+        (start, scanned, found), (end, scanned_now, found_now) = self._samples[0], self._samples[-1]
+        elapsed = max(end - start, 1e-9)
+        return (scanned_now - scanned) / elapsed, (found_now - found) / elapsed
+
+    def eta(self):
+        # Seconds left at the current rate, or at the average rate so far
+        # while the window saw no progress (shards report it a shard at a
+        # time), None until progress is known
+        if not self.total or not self.scanned:
+            return None
+        rate, _ = self.rates()
+        if rate <= 0:
+            rate = self.scanned / max(time.monotonic() - self.started, 1e-9)
+        return max(0.0, (self.total - self.scanned) / rate)
+
+    def status(self):
+        host_rate, hit_rate = self.rates()
+        elapsed = time.monotonic() - self.started
+        progress = f"{self.scanned}/{self.total}" if self.scanned else f"?/{self.total}"
+        text = (f"Progress: {progress} | Hits: {self.found} ({hit_rate:.1f}/s) | "
+                f"{host_rate:.0f} hosts/s | ETA: {format_duration(self.eta())} | Time: {format_duration(elapsed)}")
+        if self._stalled:
+            text += f" | STALLED {format_duration(time.monotonic() - self._changed)}"
+        return text
+
+    def render(self):
+        while self._lines:
+            self.stream.write(f"\033[K{self._lines.popleft()}\n")
+        self._progress.update(f"\033[K{self.status()}")
+
+    def summary(self):
+        first = f", first after {self.first_hit:.1f}s" if self.first_hit is not None else ""
+        stalls = f", stalled {self.stalls}x" if self.stalls else ""
+        return f"{self.found} hits in {format_duration(time.monotonic() - self.started)}{first}{stalls}"
+
+    def close(self):
+        # Stops the follower after reading every file to its end
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        for path in list(self._followers):
+            self.unfollow(path)
+        self.poll()
+        self.render()
+        self.stream.write("\n")
+        self.stream.flush()
+        if self.hits is not None:
+            self.hits.put(None)
@@ -1,9 +1,19 @@
 import subprocess
 import os
+import json
+import re
 import threading
 import sys
 import platform
 import shutil
+from itertools import islice
+import normal_scanner
+from flashscan_live import LiveScan
+from flashscan_shards import ShardCoordinator, count_lines
+from concurrency import AIMDController, MAX_THREADS
+from resource_scheduler import ResourceScheduler
+from result_writer import (ResultWriter, RECORD_FIELDS, OUTPUT_FORMATS,
+                           get_record_formatter, write_csv_header)
 
 def setup_environment():
     # Add Go binary paths to the current process PATH
@@ -36,6 +46,31 @@ ORANGE = "\033[38;5;208m"
 # Lock for thread-safe operations if needed
 write_lock = threading.Lock()
 
+# Auto threads: probe this many hosts with the adaptive controller first
+CALIBRATION_SAMPLE = 500
+CALIBRATION_START = 16
+# Rough memory per FlashScan worker (goroutine, socket and buffers), used to
+# keep -t within free memory and the open file limit
+WORKER_MEMORY = 256 * 1024
+# Path of a FlashScan binary to use instead of the one on PATH (a stand-in for tests)
+BINARY_ENV = "FLASHSCAN_BIN"
+# Bytes read from FlashScan's stdout at a time
+STDOUT_CHUNK = 64 * 1024
+
+# FlashScan output parsing
+ANSI_PATTERN = re.compile(r"\x1b\[[0-9;]*m")
+IP_PATTERN = re.compile(r"^\d{1,3}(?:\.\d{1,3}){3}$")
+STATUS_PATTERN = re.compile(r"^[1-5]\d\d$")
+# JSON keys FlashScan may use for each record field
+JSON_KEYS = {
+    "host": ("host", "hostname", "domain", "sni"),
+    "port": ("port",),
+    "ip": ("ip", "ip_address", "address"),
+    "status": ("status", "code", "status_code"),
+    "server": ("server",),
+    "redirect": ("location", "redirect"),
+}
+
 def get_files_dir():
     # Returns the 'files' directory path
     current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -60,15 +95,26 @@ def display_banner():
     """
     print(banner)
 
-def scan_subdomains_with_flashscan(input_file, output_file, threads):
-    # Locate flashscan binary (flashscan-go or flashscan) using PATH
-    binary = shutil.which('flashscan-go')
-    if not binary:
-        binary = shutil.which('flashscan')
+def find_flashscan():
+    # Locate flashscan binary ($FLASHSCAN_BIN, then flashscan-go or flashscan on PATH)
+    binary = os.environ.get(BINARY_ENV) or shutil.which('flashscan-go') or shutil.which('flashscan')
     if not binary:
         print(f"\n{BOLD}{RED}[!] Error: flashscan-go/flashscan not installed.{RESET}")
         print(f"{BOLD}{YELLOW}Run: go install github.com/SirYadav1/flashscan-go/v2@latest{RESET}")
-        return
+    return binary
+
+def scan_subdomains_with_flashscan(input_file, output_file, threads, on_hit=None, hits=None):
+    # Runs FlashScan while following its output file: hits are shown and
+    # passed to on_hit / the hits queue as they are written, with a status line
+    binary = find_flashscan()
+    if not binary:
+        return None
+    if ShardCoordinator(binary, input_file, output_file, 1, threads).resumable():
+        # output_file holds the merged part of an unfinished sharded scan of
+        # this input: finish that instead of starting the output over
+        print(f"{BOLD}{YELLOW}[*] Resuming the unfinished sharded scan of {input_file}{RESET}")
+        coordinator = scan_with_shards(input_file, output_file, threads, 1, on_hit, hits)
+        return coordinator.live if coordinator else None
     try:
         print(f"{BOLD}{YELLOW}[*] Scanning: {BLUE}{input_file}{RESET}")
         cmd = [
@@ -77,10 +123,124 @@ def scan_subdomains_with_flashscan(input_file, output_file, threads):
             '-o', output_file,
             '-t', str(threads)
         ]
-        subprocess.run(cmd, check=True)
+        # A fresh scan: FlashScan starts the output over; doing it first
+        # means the follower never reads an earlier scan's results as new hits
+        open(output_file, 'w').close()
+        live = LiveScan(count_lines(input_file), parse_flashscan_line, on_hit, hits)
+        live.follow(output_file)
+        with live:
+            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+            with process.stdout:
+                for chunk in iter(lambda: process.stdout.read1(STDOUT_CHUNK), b""):
+                    live.feed(chunk.decode("utf-8", "ignore"))
+            if process.wait() != 0:
+                raise subprocess.CalledProcessError(process.returncode, cmd)
         print(f"\n{BOLD}{GREEN}[+] Done! Saved to: {output_file}{RESET}")
+        print(f"{BOLD}{CYAN}[*] {live.summary()}{RESET}")
+        return live
     except subprocess.CalledProcessError as e:
         print(f"\n{BOLD}{RED}[!] Scan Error: {e}{RESET}")
+        return None
+
+def scan_with_shards(input_file, output_file, threads, processes, on_hit=None, hits=None):
+    # Runs `processes` FlashScan processes over shards of the input with
+    # `threads` split between them, merging results into output_file.
+    # Hits go to on_hit / the hits queue as in scan_subdomains_with_flashscan.
+    binary = find_flashscan()
+    if not binary:
+        return None
+    coordinator = ShardCoordinator(binary, input_file, output_file, processes, max(1, threads // processes),
+                                   key=flashscan_key)
+    manifest = coordinator.prepare()
+    print(f"{BOLD}{YELLOW}[*] Scanning: {BLUE}{input_file}{YELLOW} as {len(manifest['shards'])} shards, "
+          f"{processes} processes x {coordinator.threads} threads{RESET}")
+    print(f"{BOLD}{CYAN}[*] Shards in: {coordinator.work_dir}{RESET}")
+    coordinator.live = LiveScan(manifest["hosts"], parse_flashscan_line, on_hit, hits)
+    with coordinator.live:
+        coordinator.run()
+    print(f"\n{BOLD}{GREEN}[+] Done! Saved to: {output_file}{RESET}")
+    print(f"{BOLD}{CYAN}[*] {coordinator.live.summary()}{RESET}")
+    print(f"{BOLD}{CYAN}[*] {coordinator.status()}{RESET}")
+    print(f"{BOLD}{CYAN}[*] Scheduler: {coordinator.scheduler.status()}{RESET}")
+    pending = coordinator.pending()
+    if pending:
+        print(f"{BOLD}{RED}[!] {len(pending)} shards not finished (failed or running elsewhere), "
+              f"run again with the same output to resume{RESET}")
+    return coordinator
+
+def parse_flashscan_line(line):
+    # Parses one FlashScan result line (JSON or a "code server port ip host"
+    # table row) into a record dict, returns None for headers and noise
+    line = ANSI_PATTERN.sub("", line).strip()
+    if not line:
+        return None
+    record = dict.fromkeys(RECORD_FIELDS)
+
+    if line.startswith("{"):
+        try:
+            data = json.loads(line)
+        except ValueError:
+            return None
+        for field, keys in JSON_KEYS.items():
+            for key in keys:
+                if data.get(key) not in (None, ""):
+                    record[field] = data[key]
+                    break
+        return record if record["host"] else None
+
+    tokens = line.split()
+    if len(tokens) < 2 or not STATUS_PATTERN.match(tokens[0]):
+        return None
+    record["status"] = int(tokens[0])
+    record["host"] = tokens[-1]
+    server = []
+    for token in tokens[1:-1]:
+        if record["ip"] is None and (IP_PATTERN.match(token) or token == "N/A" and server):
+            record["ip"] = token
+        elif record["port"] is None and token.isdigit() and int(token) <= 65535:
+            record["port"] = token
+        else:
+            server.append(token)
+    record["server"] = " ".join(server) or "N/A"
+    return record
+
+def flashscan_key(line):
+    # Dedup key of a result line: host and port, None for headers and noise
+    record = parse_flashscan_line(line)
+    return f"{record['host']}:{record['port']}" if record else None
+
+def iter_flashscan_records(output_file):
+    # Streams parsed records from a FlashScan output file line by line
+    with open(output_file, encoding="utf-8", errors="ignore") as file:
+        for line in file:
+            record = parse_flashscan_line(line)
+            if record:
+                yield record
+
+def export_flashscan_records(output_file, export_file, output_format="jsonl"):
+    # Converts FlashScan output into JSONL/CSV records, returns the count
+    if output_format == "csv":
+        write_csv_header(export_file)
+    with ResultWriter(export_file, formatter=get_record_formatter(output_format)) as writer:
+        for record in iter_flashscan_records(output_file):
+            writer.write(record)
+    return writer.written
+
+def calibrate_threads(input_file, port="80", sample_size=CALIBRATION_SAMPLE):
+    # FlashScan runs with a fixed -t, so pick it by probing a sample of the
+    # input with normal_scanner's adaptive engine and using the level it settles on
+    maximum = ResourceScheduler().thread_budget(MAX_THREADS, normal_scanner.WORKER_MEMORY["thread"])
+    controller = AIMDController(CALIBRATION_START, maximum=maximum, interval=1.0)
+    hosts = islice(normal_scanner.get_hosts_from_file(input_file), sample_size)
+    targets = normal_scanner.iter_targets(hosts, [port])
+    try:
+        if normal_scanner.aiohttp is not None:
+            normal_scanner.run_async_engine(targets, "HEAD", CALIBRATION_START, lambda *_: None, controller=controller)
+        else:
+            normal_scanner.run_thread_engine(targets, "HEAD", CALIBRATION_START, lambda *_: None, controller=controller)
+    except Exception:
+        pass
+    return controller.limit, controller.status()
 
 def main():
     setup_environment()
@@ -97,7 +257,12 @@ def main():
     output_file = os.path.join(get_files_dir(), output_filename)
 
     # Get thread count
-    threads = input(f"{BOLD}{LIGHT_GREEN}[?] Threads (default: 64): {RESET}").strip() or "64"
+    threads = input(f"{BOLD}{LIGHT_GREEN}[?] Threads (default: 64, auto = calibrate): {RESET}").strip() or "64"
+
+    if threads.lower() == "auto":
+        print(f"{BOLD}{YELLOW}[*] Calibrating on {CALIBRATION_SAMPLE} hosts...{RESET}")
+        threads, status = calibrate_threads(input_file)
+        print(f"{BOLD}{CYAN}[*] Auto threads: {threads} ({status}){RESET}")
 
     try:
         threads = int(threads)
@@ -105,7 +270,34 @@ def main():
         print(f"{BOLD}{RED}[!] Invalid number. Using 64.{RESET}")
         threads = 64
 
-    scan_subdomains_with_flashscan(input_file, output_file, threads)
+    scheduler = ResourceScheduler()
+    budget = scheduler.thread_budget(threads, WORKER_MEMORY)
+    if budget < threads:
+        print(f"{BOLD}{YELLOW}[*] Threads capped at {budget} ({scheduler.describe()}){RESET}")
+        threads = budget
+
+    # Parallel FlashScan processes over shards of the input
+    processes = input(f"{BOLD}{LIGHT_GREEN}[?] Processes (default: 1, auto = one per core): {RESET}").strip() or "1"
+    if processes.lower() == "auto":
+        processes = os.cpu_count() or 1
+    try:
+        processes = max(1, min(int(processes), threads))
+    except ValueError:
+        print(f"{BOLD}{RED}[!] Invalid number. Using 1.{RESET}")
+        processes = 1
+
+    # Structured export (optional)
+    export_format = input(f"{BOLD}{LIGHT_GREEN}[?] Export Format (none/jsonl/csv, default: none): {RESET}").strip().lower()
+
+    if processes > 1:
+        scan_with_shards(input_file, output_file, threads, processes)
+    else:
+        scan_subdomains_with_flashscan(input_file, output_file, threads)
+
+    if export_format in OUTPUT_FORMATS and export_format != "text" and os.path.isfile(output_file):
+        export_file = f"{os.path.splitext(output_file)[0]}.{export_format}"
+        count = export_flashscan_records(output_file, export_file, export_format)
+        print(f"{BOLD}{GREEN}[+] Exported {count} records to: {export_file}{RESET}")
 
     print(f"\n{BOLD}{YELLOW}[SYSTEM] Press Enter to return to menu...{RESET}")
     input()
@@ -0,0 +1,397 @@
+import hashlib
+import json
+import os
+import socket
+import subprocess
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from checkpoint import hash_key
+from rate_limit import backoff_delay
+from resource_scheduler import ResourceScheduler
+
+# Shard sizing: at most SHARD_LINES hosts each, and at least SHARDS_PER_PROCESS
+# shards per process so one slow shard or a retry does not leave the others idle
+SHARD_LINES = 20000
+SHARDS_PER_PROCESS = 4
+MAX_SHARDS = 512
+# Attempts per shard, with full-jitter backoff between them
+SHARD_ATTEMPTS = 3
+RETRY_BASE = 2.0
+RETRY_CAP = 30.0
+# Claimed shards have a lock file touched every HEARTBEAT seconds; a lock not
+# touched for STALE_LOCK seconds belongs to a dead coordinator and is taken over
+HEARTBEAT = 10
+STALE_LOCK = 120
+MANIFEST = "manifest.json"
+MERGED = "merged.txt"
+
+
+def shard_count(lines, processes):
+    return max(1, min(MAX_SHARDS, max(processes * SHARDS_PER_PROCESS, -(-lines // SHARD_LINES))))
+
+def file_digest(path):
+    # Content hash of the input, so a changed host list is never matched to
+    # old shards (paths and mtimes differ between machines sharing the dir)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as file:
+        for block in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def count_lines(path):
+    with open(path, encoding="utf-8", errors="ignore") as file:
+        return sum(1 for line in file if line.strip())
+
+def shard_sizes(manifest):
+    # Hosts in each shard, as split_input deals them
+    hosts, names = manifest["hosts"], manifest["shards"]
+    return {name: hosts // len(names) + (index < hosts % len(names)) for index, name in enumerate(names)}
+
+def split_input(input_file, work_dir, processes):
+    # Deals the input hosts round-robin into shard files, so shards are
+    # balanced in size and in the mix of hosts. Returns the manifest.
+    lines = count_lines(input_file)
+    names = [f"shard_{i:04d}" for i in range(shard_count(lines, processes))]
+    files = [open(os.path.join(work_dir, f"{name}.txt"), "w", encoding="utf-8") for name in names]
+    try:
+        with open(input_file, encoding="utf-8", errors="ignore") as source:
+            index = 0
+            for line in source:
+                host = line.strip()
+                if host:
+                    files[index % len(files)].write(host + "\n")
+                    index += 1
+    finally:
+        for file in files:
+            file.close()
+    manifest = {"input": os.path.abspath(input_file), "input_size": os.path.getsize(input_file),
+                "input_hash": file_digest(input_file), "hosts": lines, "shards": names}
+    tmp = os.path.join(work_dir, f"{MANIFEST}.tmp")
+    with open(tmp, "w", encoding="utf-8") as file:
+        json.dump(manifest, file, indent=2)
+    os.replace(tmp, os.path.join(work_dir, MANIFEST))
+    return manifest
+
+
+class FileLock:
+    """Lock held by creating a file exclusively, shared through a directory.
+
+    Works across machines on a shared filesystem. The holder touches the
+    file (refresh) while it works; a lock not touched for `stale` seconds
+    is taken over.
+    """
+
+    def __init__(self, path, stale=STALE_LOCK):
+        self.path = path
+        self.stale = stale
+        self.owner = f"{socket.gethostname()} {os.getpid()} {threading.get_ident()}"
+
+    def acquire(self, wait=False, poll=0.2):
+        while True:
+            try:
+                fd = os.open(self.path, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+            except FileExistsError:
+                self._break_if_stale()
+                if not wait:
+                    return False
+                time.sleep(poll)
+                continue
+            with os.fdopen(fd, "w") as file:
+                file.write(self.owner)
+            return True
+
+    def _break_if_stale(self):
+        try:
+            if time.time() - os.path.getmtime(self.path) < self.stale:
+                return
+            # Rename first so only one of several contenders removes it
+            stale = f"{self.path}.stale.{os.getpid()}.{threading.get_ident()}"
+            os.rename(self.path, stale)
+            os.remove(stale)
+        except OSError:
+            pass
+
+    def refresh(self):
+        try:
+            os.utime(self.path)
+        except OSError:
+            pass
+
+    def release(self):
+        try:
+            os.remove(self.path)
+        except OSError:
+            pass
+
+    def __enter__(self):
+        self.acquire(wait=True)
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+
+
+class ShardCoordinator:
+    """Runs one FlashScan input as many shards over several processes.
+
+    The input is split once into a work directory (kept, so an interrupted
+    or crashed run resumes with the shards not done yet; once every shard
+    is done and merged, the next run is a new scan). Up to `processes`
+    FlashScan processes run at a time, admitted by a ResourceScheduler;
+    a failed shard is retried, and whatever a failed attempt wrote is merged
+    before the retry. Finished shard outputs are streamed into output_file
+    as they complete, deduplicated by key(line) (None drops a line).
+    A LiveScan passed as `live` follows the shard outputs while they are
+    written and counts finished shards as progress.
+    Coordinators on several machines can share one work directory: shards
+    are claimed with lock files and merging is serialised by another.
+    """
+
+    def __init__(self, binary, input_file, output_file, processes, threads, work_dir=None, key=None,
+                 scheduler=None, attempts=SHARD_ATTEMPTS, extra_args=(), live=None):
+        self.binary = binary
+        self.input_file = input_file
+        self.output_file = output_file
+        self.processes = max(1, processes)
+        self.threads = max(1, threads)
+        self.work_dir = work_dir or f"{os.path.splitext(output_file)[0]}.shards"
+        self.key = key or (lambda line: line.strip() or None)
+        self.scheduler = scheduler or ResourceScheduler(max_jobs=self.processes)
+        self.attempts = attempts
+        self.extra_args = list(extra_args)
+        self.live = live
+        self.manifest = None
+        self.done = 0
+        self.skipped = 0
+        self.failed = []
+        self.retries = 0
+        self.merged_lines = 0
+        self.duplicates = 0
+        self._claims = {}
+        self._keys = set()
+        self._output_size = 0
+        self._merged = set()
+        self._cursor = 0
+        self._lock = threading.Lock()
+        self._merge_lock = threading.Lock()
+        self._stop = threading.Event()
+
+    def path(self, name, suffix):
+        return os.path.join(self.work_dir, f"{name}{suffix}")
+
+    def prepare(self):
+        # Splits the input, or reuses an unfinished split of the same input
+        os.makedirs(self.work_dir, exist_ok=True)
+        with FileLock(self.path("split", ".lock")):
+            manifest = self._load_manifest()
+            if manifest is None:
+                self._clear()
+                manifest = split_input(self.input_file, self.work_dir, self.processes)
+        self.manifest = manifest
+        return manifest
+
+    def resumable(self):
+        # True if the work directory holds an unfinished split of this input
+        return self._load_manifest() is not None
+
+    def _load_manifest(self):
+        try:
+            with open(self.path(MANIFEST, ""), encoding="utf-8") as file:
+                manifest = json.load(file)
+        except (OSError, ValueError):
+            return None
+        if (manifest.get("input_size") != os.path.getsize(self.input_file)
+                or manifest.get("input_hash") != file_digest(self.input_file)):
+            return None  # a different input, split again
+        self._load_merged()
+        if all(name in self._merged for name in manifest["shards"]):
+            return None  # that scan finished, this is a new one
+        return manifest
+
+    def _clear(self):
+        # A new split starts a new scan: old shards and the old result go,
+        # like a single FlashScan run overwriting its output file
+        for name in os.listdir(self.work_dir):
+            if name.startswith("shard_") or name == MERGED:
+                os.remove(os.path.join(self.work_dir, name))
+        self._merged = set()
+        open(self.output_file, "w").close()
+
+    # --- Claiming --
+
+    def _next_shard(self):
+        with self._lock:
+            shards = self.manifest["shards"]
+            while self._cursor < len(shards) and not self._stop.is_set():
+                name = shards[self._cursor]
+                self._cursor += 1
+                if os.path.exists(self.path(name, ".done")):
+                    self.skipped += 1
+                    if self.live:
+                        self.live.skip(shard_sizes(self.manifest)[name])
+                    continue
+                lock = FileLock(self.path(name, ".lock"))
+                if lock.acquire():
+                    self._claims[name] = lock
+                    return name
+            return None
+
+    def _heartbeat(self):
+        while not self._stop.wait(HEARTBEAT):
+            with self._lock:
+                claims = list(self._claims.values())
+            for lock in claims:
+                lock.refresh()
+
+    def _release(self, name):
+        with self._lock:
+            lock = self._claims.pop(name, None)
+        if lock:
+            lock.release()
+
+    # --- Running --
+
+    def command(self, name, output):
+        return [self.binary, "direct", "-f", self.path(name, ".txt"), "-o", output,
+                "-t", str(self.threads), *self.extra_args]
+
+    def _run_shard(self, name):
+        partial = self.path(name, ".out.tmp")
+        try:
+            for attempt in range(1, self.attempts + 1):
+                if os.path.exists(partial):
+                    os.remove(partial)
+                if self.live:
+                    self.live.follow(partial)
+                with open(self.path(name, ".log"), "ab") as log:
+                    code = subprocess.call(self.command(name, partial), stdout=log, stderr=subprocess.STDOUT)
+                if self.live:
+                    self.live.unfollow(partial)
+                if code == 0:
+                    if not os.path.exists(partial):
+                        open(partial, "w").close()  # nothing found
+                    os.replace(partial, self.path(name, ".out"))
+                    open(self.path(name, ".done"), "w").close()
+                    self.merge(name, self.path(name, ".out"), final=True)
+                    with self._lock:
+                        self.done += 1
+                    if self.live:
+                        self.live.advance(shard_sizes(self.manifest)[name])
+                    return True
+                # Keep what the failed attempt found, then try again
+                if os.path.exists(partial):
+                    self.merge(name, partial, final=False)
+                if self._stop.is_set():
+                    return False
+                if attempt < self.attempts:
+                    with self._lock:
+                        self.retries += 1
+                    time.sleep(backoff_delay(attempt, RETRY_BASE, RETRY_CAP))
+            with self._lock:
+                self.failed.append(name)
+            return False
+        finally:
+            self._release(name)
+
+    def _worker(self):
+        while True:
+            name = self._next_shard()
+            if name is None:
+                return
+            self.scheduler.run(self._run_shard, name)
+
+    def run(self):
+        # Runs every shard not done yet, then merges shards finished by other
+        # coordinators. Returns self for the status lines.
+        if self.manifest is None:
+            self.prepare()
+        heartbeat = threading.Thread(target=self._heartbeat, daemon=True)
+        heartbeat.start()
+        try:
+            with ThreadPoolExecutor(max_workers=self.processes) as executor:
+                futures = [executor.submit(self._worker) for _ in range(self.processes)]
+                try:
+                    for future in futures:
+                        future.result()
+                except BaseException:
+                    # Ctrl+C also reaches the scans; no retries or new shards
+                    # while the workers wind down
+                    self._stop.set()
+                    raise
+        finally:
+            self._stop.set()
+            for name in list(self._claims):
+                self._release(name)
+        for name in self.manifest["shards"]:
+            if os.path.exists(self.path(name, ".done")):
+                self.merge(name, self.path(name, ".out"), final=True)
+        return self
+
+    # --- Merging --
+
+    def _load_merged(self):
+        # Shards merged so far, by any coordinator
+        try:
+            with open(self.path(MERGED, ""), encoding="utf-8") as file:
+                self._merged = {line.strip() for line in file if line.strip()}
+        except OSError:
+            self._merged = set()
+
+    def _catch_up(self):
+        # Adds keys of lines appended to the output since we last looked
+        # (by an earlier run or another coordinator)
+        size = os.path.getsize(self.output_file) if os.path.exists(self.output_file) else 0
+        if size < self._output_size:
+            self._keys.clear()
+            self._output_size = 0
+        if size == self._output_size:
+            return
+        with open(self.output_file, encoding="utf-8", errors="ignore") as file:
+            file.seek(self._output_size)
+            for line in file:
+                key = self.key(line)
+                if key is not None:
+                    self._keys.add(hash_key(str(key)))
+        self._output_size = size
+
+    def merge(self, name, shard_output, final):
+        # Streams one shard output into the result file, skipping keys already
+        # there. final=True records the shard as merged.
+        with self._merge_lock, FileLock(self.path("merge", ".lock")):
+            self._load_merged()
+            if name in self._merged:
+                return
+            self._catch_up()
+            merged = duplicates = 0
+            with open(shard_output, encoding="utf-8", errors="ignore") as source, \
+                    open(self.output_file, "a", encoding="utf-8") as output:
+                for line in source:
+                    key = self.key(line)
+                    if key is None:
+                        continue
+                    value = hash_key(str(key))
+                    if value in self._keys:
+                        duplicates += 1
+                        continue
+                    self._keys.add(value)
+                    output.write(line if line.endswith("\n") else line + "\n")
+                    merged += 1
+            self._output_size = os.path.getsize(self.output_file)
+            with self._lock:
+                self.merged_lines += merged
+                self.duplicates += duplicates
+            if final:
+                self._merged.add(name)
+                with open(self.path(MERGED, ""), "a", encoding="utf-8") as file:
+                    file.write(name + "\n")
+
+    def pending(self):
+        # Shards neither done here nor elsewhere
+        return [name for name in self.manifest["shards"] if not os.path.exists(self.path(name, ".done"))]
+
+    def status(self):
+        total = len(self.manifest["shards"]) if self.manifest else 0
+        return (f"{self.done} shards run, {self.skipped} already done, {len(self.failed)} failed, "
+                f"{self.retries} retries of {total} | {self.merged_lines} results merged, "
+                f"{self.duplicates} duplicates dropped")
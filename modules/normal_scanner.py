@@ -1,20 +1,45 @@
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import asyncio
+from contextlib import nullcontext
+from http.cookiejar import DefaultCookiePolicy
 import os
 from pathlib import Path
+import queue
 import socket
 import threading
 import time
 from colorama import Fore, Style
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from dns_resolver import resolver
+from checkpoint import Checkpoint, journal_path
+from concurrency import AIMDController, MAX_THREADS, MAX_ASYNC
+from resource_scheduler import ResourceScheduler, PoolGovernor
+from result_writer import (ResultWriter, ProgressLine, OUTPUT_FORMATS,
+                           get_record_formatter, write_csv_header)
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
 
 
 DEFAULT_TIMEOUT = 5
+# Scan engines: blocking requests on a thread pool, or aiohttp on one event loop
+ENGINES = ["thread", "async"]
+# In-flight probes per worker, keeps the pool busy without queueing every target
+WINDOW_PER_WORKER = 4
+# TCP pre-scan: short connect timeout, parallel connects, open ports buffered for HTTP
+CONNECT_TIMEOUT = 1.5
+SWEEP_CONCURRENCY = 400
+SWEEP_QUEUE_SIZE = 2000
+# Rough memory per worker, used to cap pool sizes to the free memory
+WORKER_MEMORY = {"thread": 2 * 1024 ** 2, "async": 256 * 1024}
 # Locations to handle as false positives
 EXCLUDE_LOCATIONS = ["https://jio.com/BalanceExhaust", "http://filter.ncell.com.np/nc"]
 
 
-file_write_lock = threading.Lock()
-
 def get_files_dir():
     # Returns the 'files' directory path
     current_dir = os.path.dirname(os.path.abspath(__file__))
@@ -38,14 +63,31 @@ def clear_screen():
     os.system('cls' if os.name == 'nt' else 'clear')
 
 def get_hosts_from_file(file_path):
-    # Reads hosts from file, ignoring empty lines
+    # Lazily yields hosts from file line by line, ignoring empty lines
     path = Path(file_path)
     if path.is_file():
         try:
-            return [line.strip() for line in path.read_text().splitlines() if line.strip()]
+            with path.open(errors='ignore') as file:
+                for line in file:
+                    line = line.strip()
+                    if line:
+                        yield line
         except Exception:
             print(Fore.RED + f"Error reading file.")
-    return []
+
+def count_hosts_in_file(file_path):
+    # Counts non-empty lines without keeping them in memory
+    return sum(1 for _ in get_hosts_from_file(file_path))
+
+def target_key(target):
+    # Journal key of a (host, port) target
+    return f"{target[0]}:{target[1]}"
+
+def iter_targets(hosts, ports):
+    # Yields (host, port) pairs on demand, hosts may be any iterable
+    for host in hosts:
+        for port in ports:
+            yield host, port
 
 def get_http_method():
     # Asks user for HTTP method
@@ -65,36 +107,520 @@ def format_row(code, server, port, ip_address, host, use_colors=True):
             f"{bold}{Fore.MAGENTA if use_colors else ''}{ip_address:<15}{reset} " +
             f"{bold}{Fore.LIGHTBLUE_EX if use_colors else ''}{host}{reset}")
 
-def check_http_response(host, port, method):
-    # Performs the HTTP request
+# Connection setup timings of the probe running on this thread
+_probe_timing = threading.local()
+
+def _elapsed_ms(start):
+    return round((time.perf_counter() - start) * 1000, 1)
+
+def _resolve_for(conn):
+    # Resolves the connection's host through the shared cache and points the
+    # socket at the IP, so the lookup is timed on its own (dns_ms of the
+    # first new connection in a probe). Returns the name to put back.
+    name = conn._dns_host
+    start = time.perf_counter()
+    ip = resolver.resolve(name)
+    if getattr(_probe_timing, "dns_ms", None) is None:
+        _probe_timing.dns_ms = _elapsed_ms(start)
+    conn._dns_host = ip or name
+    return name
+
+class TimedHTTPConnection(HTTPConnection):
+    # Records DNS and TCP connect times of the first new connection in a probe
+    def _new_conn(self):
+        name = _resolve_for(self)
+        start = time.perf_counter()
+        try:
+            sock = super()._new_conn()
+        finally:
+            self._dns_host = name
+        if getattr(_probe_timing, "connect_ms", None) is None:
+            _probe_timing.connect_ms = _elapsed_ms(start)
+        return sock
+
+class TimedHTTPSConnection(HTTPSConnection):
+    # Records DNS, TCP connect and TLS handshake times of the first new connection
+    def _new_conn(self):
+        name = _resolve_for(self)
+        start = time.perf_counter()
+        try:
+            sock = super()._new_conn()
+        finally:
+            self._dns_host = name
+        self._tcp_ms = _elapsed_ms(start)
+        return sock
+
+    def connect(self):
+        start = time.perf_counter()
+        super().connect()
+        if getattr(_probe_timing, "connect_ms", None) is None:
+            total_ms = _elapsed_ms(start)
+            _probe_timing.connect_ms = self._tcp_ms
+            _probe_timing.tls_ms = round(max(0.0, total_ms - self._tcp_ms), 1)
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+class TimedHTTPAdapter(HTTPAdapter):
+    # HTTPAdapter whose connections report setup timings to _probe_timing
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": TimedHTTPConnectionPool,
+            "https": TimedHTTPSConnectionPool,
+        }
+
+def create_session(pool_size):
+    # Shared keep-alive session, one pooled connection slot per worker thread.
+    # Cookies are rejected so hosts never leak state into each other's probes.
+    session = requests.Session()
+    session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+    adapter = TimedHTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=0)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+def record_to_row(record):
+    # Converts a probe record to the (code, server, port, ip, host) row
+    if not record:
+        return None
+    return (record["status"], record["server"], record["port"], record["ip"], record["host"])
+
+def probe_http(host, port, method, session=None, follow_redirects=True):
+    # Performs the HTTP request and returns a record dict with timings of
+    # the first hop, or None. Timeouts are raised (requests Timeout) so the
+    # engines can tell congestion from a dead host. Without follow_redirects only the first
+    # response is read and its Location header checked against the exclude list.
     url = f"{'https' if port in ['443', '8443'] else 'http'}://{host}:{port}"
+    _probe_timing.dns_ms = _probe_timing.connect_ms = _probe_timing.tls_ms = None
     try:
-        response = requests.request(method, url, timeout=DEFAULT_TIMEOUT, allow_redirects=True)
+        response = (session or requests).request(method, url, timeout=DEFAULT_TIMEOUT, allow_redirects=follow_redirects)
         # Check against exclude list
         if any(exclude in response.headers.get('Location', '') for exclude in EXCLUDE_LOCATIONS):
             return None
-            
-        status_code = response.status_code
-        server_header = response.headers.get('Server', 'N/A')
+
+        first = response.history[0] if response.history else response
+        setup_ms = (_probe_timing.connect_ms or 0) + (_probe_timing.tls_ms or 0)
+        ttfb_ms = round(max(0.0, first.elapsed.total_seconds() * 1000 - setup_ms), 1)
+
+        # Cached by the connection's own lookup; dns_ms is None when a
+        # pooled connection was reused and nothing was resolved
         ip_address = get_ip_from_host(host) or 'N/A'
-        return (status_code, server_header, port, ip_address, host)
+        return {
+            "host": host,
+            "port": port,
+            "ip": ip_address,
+            "status": response.status_code,
+            "server": response.headers.get('Server', 'N/A'),
+            "redirect": first.headers.get('Location', ''),
+            "dns_ms": _probe_timing.dns_ms,
+            "connect_ms": _probe_timing.connect_ms,
+            "tls_ms": _probe_timing.tls_ms,
+            "ttfb_ms": ttfb_ms,
+        }
+    except requests.exceptions.Timeout:
+        raise
     except requests.exceptions.RequestException:
         return None
 
+def check_http_response(host, port, method, session=None, follow_redirects=True):
+    # Performs the HTTP request, returns a (code, server, port, ip, host) row
+    try:
+        return record_to_row(probe_http(host, port, method, session, follow_redirects))
+    except requests.exceptions.Timeout:
+        return None
+
 def get_ip_from_host(host):
-    # Resolves hostname to IP
+    # Resolves hostname to IP through the shared cache
+    return resolver.resolve(host) or "N/A"
+
+class SharedAsyncResolver(aiohttp.abc.AbstractResolver if aiohttp else object):
+    """aiohttp resolver backed by the shared cached resolver.
+
+    The connector's own lookup goes through `resolver`, so each host is
+    resolved once and the probe reads the IP it connected to from the cache.
+    """
+
+    async def resolve(self, host, port=0, family=socket.AF_INET):
+        ip = await resolver.aresolve(host)
+        if not ip:
+            raise OSError(f"Cannot resolve {host}")
+        return [{"hostname": host, "host": ip, "port": port, "family": socket.AF_INET, "proto": 0, "flags": 0}]
+
+    async def close(self):
+        pass
+
+def create_trace_config():
+    # aiohttp trace hooks that fill the timing dict passed as trace_request_ctx.
+    # aiohttp has no TLS hook, so connect_ms includes the handshake there.
+    async def on_dns_start(session, ctx, params):
+        ctx.trace_request_ctx.setdefault("_dns", time.perf_counter())
+
+    async def on_dns_end(session, ctx, params):
+        ctx.trace_request_ctx.setdefault("dns_ms", _elapsed_ms(ctx.trace_request_ctx["_dns"]))
+
+    async def on_connect_start(session, ctx, params):
+        ctx.trace_request_ctx.setdefault("_connect", time.perf_counter())
+
+    async def on_connect_end(session, ctx, params):
+        ctx.trace_request_ctx.setdefault("connect_ms", _elapsed_ms(ctx.trace_request_ctx["_connect"]))
+
+    async def on_headers_sent(session, ctx, params):
+        ctx.trace_request_ctx.setdefault("_sent", time.perf_counter())
+
+    async def on_request_end(session, ctx, params):
+        if "_sent" in ctx.trace_request_ctx:
+            ctx.trace_request_ctx.setdefault("ttfb_ms", _elapsed_ms(ctx.trace_request_ctx["_sent"]))
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_dns_resolvehost_start.append(on_dns_start)
+    trace_config.on_dns_resolvehost_end.append(on_dns_end)
+    trace_config.on_connection_create_start.append(on_connect_start)
+    trace_config.on_connection_create_end.append(on_connect_end)
+    trace_config.on_request_headers_sent.append(on_headers_sent)
+    trace_config.on_request_end.append(on_request_end)
+    trace_config.on_request_redirect.append(on_request_end)
+    return trace_config
+
+async def async_probe_http(session, host, port, method, follow_redirects=True):
+    # aiohttp twin of probe_http, returns the same record and raises on timeout
+    url = f"{'https' if port in ['443', '8443'] else 'http'}://{host}:{port}"
+    timing = {}
     try:
-        return socket.gethostbyname(host)
-    except socket.gaierror:
-        return "N/A"
+        async with session.request(method, url, allow_redirects=follow_redirects, trace_request_ctx=timing) as response:
+            if any(exclude in response.headers.get('Location', '') for exclude in EXCLUDE_LOCATIONS):
+                return None
+
+            first = response.history[0] if response.history else response
+            status_code = response.status
+            server_header = response.headers.get('Server', 'N/A')
+            redirect = first.headers.get('Location', '')
+        # Answer of the connector's lookup through SharedAsyncResolver
+        ip_address = resolver.cached(host) or 'N/A'
+        return {
+            "host": host,
+            "port": port,
+            "ip": ip_address,
+            "status": status_code,
+            "server": server_header,
+            "redirect": redirect,
+            "dns_ms": timing.get("dns_ms"),
+            "connect_ms": timing.get("connect_ms"),
+            "tls_ms": None,
+            "ttfb_ms": timing.get("ttfb_ms"),
+        }
+    except asyncio.TimeoutError:
+        raise
+    except (aiohttp.ClientError, ValueError):
+        return None
+
+async def async_check_http_response(session, host, port, method, follow_redirects=True):
+    # aiohttp twin of check_http_response, returns the same row
+    try:
+        return record_to_row(await async_probe_http(session, host, port, method, follow_redirects))
+    except asyncio.TimeoutError:
+        return None
 
 def format_time(elapsed_time):
     # Formats seconds into M m S s
     return f"{int(elapsed_time // 60)}m {int(elapsed_time % 60)}s" if elapsed_time >= 60 else f"{elapsed_time:.2f}s"
 
-def perform_scan(hosts, ports, output_file, threads, method):
+async def tcp_port_open(host, port, timeout=CONNECT_TIMEOUT):
+    # Cheap TCP connect check, resolves through the shared DNS cache
+    ip = await resolver.aresolve(host)
+    if not ip:
+        return False
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(ip, int(port)), timeout)
+    except (OSError, ValueError, asyncio.TimeoutError):
+        return False
+    writer.close()
+    try:
+        await writer.wait_closed()
+    except OSError:
+        pass
+    return True
+
+async def sweep_targets(targets, on_open, on_closed, concurrency=SWEEP_CONCURRENCY):
+    # Connect-sweeps (host, port) targets, awaiting on_open(target) for open
+    # ports and on_closed(target) for the rest
+    targets = iter(targets)
+
+    async def worker():
+        for target in targets:
+            if await tcp_port_open(*target):
+                await on_open(target)
+            else:
+                await on_closed(target)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+
+def iter_swept_targets(targets, on_closed, concurrency=SWEEP_CONCURRENCY):
+    # Runs the TCP sweep on a background event loop and yields open targets
+    # as soon as they are found. on_closed(target) runs on the caller's thread.
+    results = queue.Queue(maxsize=SWEEP_QUEUE_SIZE)
+    done = object()
+
+    async def put(item):
+        # Waiting on a full queue blocks an executor thread, never the
+        # sweep's event loop with all its connects
+        try:
+            results.put_nowait(item)
+        except queue.Full:
+            await asyncio.get_running_loop().run_in_executor(None, results.put, item)
+
+    async def put_open(target):
+        await put((target, True))
+
+    async def put_closed(target):
+        await put((target, False))
+
+    def run():
+        try:
+            asyncio.run(sweep_targets(targets, put_open, put_closed, concurrency))
+        finally:
+            results.put(done)
+
+    threading.Thread(target=run, daemon=True).start()
+    while True:
+        item = results.get()
+        if item is done:
+            return
+        target, is_open = item
+        if is_open:
+            yield target
+        else:
+            on_closed(target)
+
+def timed_probe(host, port, method, session, follow_redirects):
+    # Runs probe_http, returns (record, timed_out, seconds)
+    start = time.perf_counter()
+    try:
+        record, timed_out = probe_http(host, port, method, session, follow_redirects), False
+    except requests.exceptions.Timeout:
+        record, timed_out = None, True
+    except Exception:
+        record, timed_out = None, False
+    return record, timed_out, time.perf_counter() - start
+
+def run_thread_engine(targets, method, threads, on_result, follow_redirects=True, controller=None, sweep=False):
+    # Probes (host, port) targets on a thread pool, calling on_result(target,
+    # record) with the probe record (or None) for each one.
+    # Targets are submitted from a generator with a bounded in-flight window.
+    # With an AIMD controller the window follows controller.limit instead.
+    # With sweep=True only targets that pass a TCP connect check are probed.
+    if sweep:
+        targets = iter_swept_targets(targets, lambda target: on_result(target, None))
+    max_workers = controller.maximum if controller else threads
+    pending = {}
+    session = create_session(max_workers)
+
+    def window():
+        return controller.limit if controller else max(1, threads * WINDOW_PER_WORKER)
+
+    def finish(future):
+        target = pending.pop(future)
+        try:
+            record, timed_out, elapsed = future.result()
+        except Exception:
+            record, timed_out, elapsed = None, False, 0.0
+        if controller:
+            controller.record(elapsed, record is not None, timed_out)
+        on_result(target, record)
+
+    with session, ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for host, port in targets:
+            future = executor.submit(timed_probe, host, port, method, session, follow_redirects)
+            pending[future] = (host, port)
+            while len(pending) >= window():
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    finish(future)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                finish(future)
+
+async def _async_scan(targets, method, concurrency, on_result, follow_redirects, controller, sweep):
+    timeout = aiohttp.ClientTimeout(total=DEFAULT_TIMEOUT)
+    workers = controller.maximum if controller else concurrency
+    # DNS goes through the shared resolver, which caches on its own
+    connector = aiohttp.TCPConnector(limit=workers, use_dns_cache=False, resolver=SharedAsyncResolver())
+    targets = iter(targets)
+
+    cookie_jar = aiohttp.DummyCookieJar()
+
+    trace_configs = [create_trace_config()]
+
+    # With a controller, idle workers wait here until the limit lets them in
+    slots = asyncio.Condition()
+    state = {"in_flight": 0}
+    listener = None
+    if controller:
+        loop = asyncio.get_running_loop()
+        listener = controller.on_change(lambda limit: loop.call_soon_threadsafe(lambda: asyncio.ensure_future(wake())))
+
+    async def wake():
+        async with slots:
+            slots.notify_all()
+
+    async def probe(session, host, port):
+        start = time.perf_counter()
+        try:
+            record, timed_out = await async_probe_http(session, host, port, method, follow_redirects), False
+        except asyncio.TimeoutError:
+            record, timed_out = None, True
+        except Exception:
+            record, timed_out = None, False
+        if controller:
+            controller.record(time.perf_counter() - start, record is not None, timed_out)
+        return record
+
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector, cookie_jar=cookie_jar,
+                                     trace_configs=trace_configs) as session:
+        # With sweep, connect checks run alongside and feed open targets
+        # through a bounded queue, so HTTP starts with the first open port
+        open_targets = None
+        if sweep:
+            open_targets = asyncio.Queue(maxsize=SWEEP_QUEUE_SIZE)
+
+            async def closed(target):
+                on_result(target, None)
+
+            async def run_sweep():
+                try:
+                    await sweep_targets(targets, open_targets.put, closed)
+                finally:
+                    for _ in range(workers):
+                        await open_targets.put(None)
+
+            sweeper = asyncio.ensure_future(run_sweep())
+
+        async def next_target():
+            if open_targets is None:
+                return next(targets, None)
+            return await open_targets.get()
+
+        # A fixed set of workers pulls from the shared generator, so memory
+        # stays flat instead of holding one task per target
+        async def worker():
+            while True:
+                target = await next_target()
+                if target is None:
+                    return
+                host, port = target
+                if controller:
+                    async with slots:
+                        await slots.wait_for(lambda: state["in_flight"] < controller.limit)
+                        state["in_flight"] += 1
+                try:
+                    result = await probe(session, host, port)
+                finally:
+                    if controller:
+                        async with slots:
+                            state["in_flight"] -= 1
+                            slots.notify()
+                on_result((host, port), result)
+
+        try:
+            await asyncio.gather(*(worker() for _ in range(workers)))
+            if sweep:
+                await sweeper
+        finally:
+            if listener:
+                controller.remove_listener(listener)
+
+def run_async_engine(targets, method, concurrency, on_result, follow_redirects=True, controller=None, sweep=False):
+    # Probes (host, port) targets on one event loop, at most `concurrency`
+    # (or controller.limit) in flight. sweep=True adds a pipelined TCP pre-scan.
+    if aiohttp is None:
+        raise RuntimeError("aiohttp is not installed (pip install aiohttp)")
+    asyncio.run(_async_scan(targets, method, concurrency, on_result, follow_redirects, controller, sweep))
+
+def group_hosts_by_ip(hosts):
+    # Resolves hosts in bulk, returns ({ip: [hosts]}, [unresolved hosts])
+    groups, unresolved = {}, []
+
+    def add(host, ip):
+        if ip:
+            groups.setdefault(ip, []).append(host)
+        else:
+            unresolved.append(host)
+
+    resolver.resolve_many(hosts, on_result=add)
+    return groups, unresolved
+
+def response_signature(record):
+    # What decides whether two hosts on one IP answered the same way
+    if not record:
+        return None
+    return (record["status"], record["server"], record["redirect"])
+
+def infer_record(record, host):
+    # Copies a representative's result to a host on the same IP and port
+    inferred = dict(record, host=host, dns_ms=None, connect_ms=None, tls_ms=None, ttfb_ms=None)
+    inferred["via"] = record["host"]
+    return inferred
+
+def run_dedup_scan(hosts, ports, run_engine, on_result):
+    # Probes one representative per (IP, port) and a second host on the same
+    # IP with a different SNI/Host. When both answered the same way the
+    # representative's result is reported for the rest of the group; when
+    # they differ, either gave no response or was not probed this run
+    # (resumed), the rest is probed. run_engine(targets, on_result) runs one stage.
+    groups, unresolved = group_hosts_by_ip(hosts)
+    counts = {"ips": len(groups), "probes": 0, "inferred": 0}
+    for host in unresolved:
+        for port in ports:
+            on_result((host, port), None)
+
+    def collect(store):
+        def handle(target, record):
+            counts["probes"] += 1
+            if store is not None:
+                store[target] = record
+            on_result(target, record)
+        return handle
+
+    first, second = {}, {}
+    run_engine(((members[0], port) for members in groups.values() for port in ports), collect(first))
+    run_engine(((members[1], port) for members in groups.values() if len(members) > 1 for port in ports),
+               collect(second))
+
+    host_dependent = []
+    for members in groups.values():
+        if len(members) < 3:
+            continue
+        for port in ports:
+            record = first.get((members[0], port))
+            other = second.get((members[1], port))
+            if record is None or other is None or response_signature(record) != response_signature(other):
+                host_dependent.append((members, port))
+                continue
+            for host in members[2:]:
+                counts["inferred"] += 1
+                on_result((host, port), infer_record(record, host))
+    first.clear()
+    second.clear()
+
+    run_engine(((host, port) for members, port in host_dependent for host in members[2:]), collect(None))
+    return counts
+
+def perform_scan(hosts, ports, output_file, threads, method, engine="thread", total=None, follow_redirects=True,
+                 output_format="text", resume=False, adaptive=False, sweep=False, dedup=False):
+    # hosts may be a lazy iterable, pass total (host count) for the progress line.
+    # output_format "jsonl"/"csv" writes one structured record per hit instead of the text table.
+    # Completed (host, port) pairs go to a journal next to output_file; with
+    # resume=True the pairs already in it are skipped.
+    # adaptive=True starts at `threads` in-flight probes and lets an AIMD controller tune it.
+    # sweep=True runs a TCP connect pre-scan and only HTTP-probes open ports.
+    # dedup=True resolves first and probes shared IPs once unless responses are host-dependent.
     clear_screen()
-    print(Fore.GREEN + f"Scanning ({method})...")
+    print(Fore.GREEN + f"Scanning ({method}, {engine} engine)...")
 
     headers = (Fore.GREEN + "Code  " + Fore.CYAN + "Server               " +
               Fore.YELLOW + "Port   " + Fore.MAGENTA + "IP Address     " + Fore.LIGHTBLUE_EX + "Host" + Style.RESET_ALL)
@@ -102,44 +628,102 @@ def perform_scan(hosts, ports, output_file, threads, method):
 
     # Write headers to file
     try:
-        with open(output_file, 'a') as file:
-            file.write(f"Code  Server               Port   IP Address     Host\n{separator}\n")
+        if output_format == "csv":
+            write_csv_header(output_file)
+        elif output_format == "text":
+            with open(output_file, 'a') as file:
+                file.write(f"Code  Server               Port   IP Address     Host\n{separator}\n")
     except Exception:
         pass
 
     print(headers, separator, sep='\n')
 
     start_time = time.time()
-    total_hosts, scanned_hosts, responded_hosts = len(hosts) * len(ports), 0, 0
-
-    # Start ThreadPool
-    with ThreadPoolExecutor(max_workers=threads) as executor:
-        futures = [executor.submit(check_http_response, host, port, method) for host in hosts for port in ports]
-        for future in as_completed(futures):
-            scanned_hosts += 1
-            try:
-                result = future.result(timeout=DEFAULT_TIMEOUT + 1)
-                if result:
-                    responded_hosts += 1
-                    row = format_row(*result)
-                    print(row)
-                    with file_write_lock:
-                        with open(output_file, 'a') as file:
-                            file.write(format_row(*result, use_colors=False) + "\n")
-            except Exception:
-                pass
-
-            elapsed_time = time.time() - start_time
-            print(f"Progress: {scanned_hosts}/{total_hosts} | Found: {responded_hosts} | Time: {format_time(elapsed_time)}", end='\r')
-
-    print(f"\n\n{Fore.GREEN}[+] Scan Complete! {responded_hosts} responsive.")
+    if total is None:
+        total = len(hosts)
+    journal = Checkpoint(journal_path(output_file), resume)
+    total_hosts = max(0, total * len(ports) - len(journal))
+    stats = {"scanned": 0, "responded": 0}
+    dedup_counts = None
+    progress = ProgressLine()
+    # Pool sizes stay within free memory and the open file limit; an adaptive
+    # pool is also held back while the machine is under pressure
+    scheduler = ResourceScheduler()
+    worker_memory = WORKER_MEMORY.get(engine, WORKER_MEMORY["thread"])
+    budget = scheduler.thread_budget(threads, worker_memory)
+    if budget < threads:
+        print(Fore.YELLOW + f"Threads capped at {budget} ({scheduler.describe()})")
+        threads = budget
+    controller = None
+    governor = nullcontext()
+    if adaptive:
+        maximum = scheduler.thread_budget(MAX_ASYNC if engine == "async" else MAX_THREADS, worker_memory)
+        controller = AIMDController(min(threads, maximum), maximum=maximum)
+        governor = PoolGovernor(scheduler, controller, worker_memory)
+    if output_format == "text":
+        formatter = lambda record: format_row(*record_to_row(record), use_colors=False)
+    else:
+        formatter = get_record_formatter(output_format)
+    writer = ResultWriter(output_file, formatter=formatter)
+
+    def show_progress(force=False):
+        elapsed_time = time.time() - start_time
+        line = f"Progress: {stats['scanned']}/{total_hosts} | Found: {stats['responded']} | Time: {format_time(elapsed_time)}"
+        if controller:
+            line += f" | {controller.status()}"
+        progress.update(line, force)
+
+    def handle_result(target, record):
+        # A hit is journaled by the writer thread once its row is flushed, so
+        # a crash can't leave a probe marked done with its result lost
+        key = target_key(target)
+        stats["scanned"] += 1
+        if record:
+            stats["responded"] += 1
+            print(format_row(*record_to_row(record)))
+            writer.write(record)
+            writer.after(lambda: journal.add(key))
+        else:
+            journal.add(key)
+        show_progress()
+
+    try:
+        # The writer closes before the journal: its last flush still journals
+        with journal, writer, governor:
+            def run_engine(targets, on_result):
+                targets = journal.filter(targets, key=target_key)
+                if engine == "async":
+                    run_async_engine(targets, method, threads, on_result, follow_redirects, controller, sweep)
+                else:
+                    run_thread_engine(targets, method, threads, on_result, follow_redirects, controller, sweep)
+
+            if dedup:
+                print(Fore.CYAN + "Resolving and grouping hosts by IP...")
+                dedup_counts = run_dedup_scan(hosts, ports, run_engine, handle_result)
+            else:
+                run_engine(iter_targets(hosts, ports), handle_result)
+            show_progress(force=True)
+    except KeyboardInterrupt:
+        print(f"\n\n{Fore.YELLOW}[!] Interrupted. {stats['scanned']} probes saved, resume to continue.")
+        print(f"{Fore.GREEN}[+] Saved to: {output_file}{Style.RESET_ALL}")
+        return
+    journal.finish()
+
+    print(f"\n\n{Fore.GREEN}[+] Scan Complete! {stats['responded']} responsive.")
+    if journal.skipped:
+        print(f"{Fore.GREEN}[+] Resumed: skipped {journal.skipped} completed probes")
+    if dedup_counts:
+        # Only inferred results saved a request; unresolved hosts never needed one
+        print(f"{Fore.GREEN}[+] Dedup: {dedup_counts['ips']} IPs, {dedup_counts['probes']} requests sent, "
+              f"{dedup_counts['inferred']} requests saved by inference")
+    print(f"{Fore.GREEN}[+] DNS cache: {resolver.hits} hits, {resolver.misses} lookups")
     print(f"{Fore.GREEN}[+] Saved to: {output_file}{Style.RESET_ALL}")
 
 def main():
     # Input File
     file_path = get_input(Fore.GREEN + "» Host File Path: " + Fore.YELLOW, "/storage/emulated/0/domain.txt")
-    hosts = get_hosts_from_file(file_path)
-    if not hosts:
+    host_count = count_hosts_in_file(file_path)
+    if not host_count:
         print(Fore.RED + "No hosts found.")
         return
 
@@ -150,14 +734,51 @@ def main():
     #Output File
     out_name = get_input(Fore.GREEN + "» Output Filename: " + Fore.YELLOW, "scan_results.txt")
     output_file_path = os.path.join(get_files_dir(), out_name)
+    output_format = get_input(Fore.GREEN + "» Output Format (text/jsonl/csv, default: text): " + Fore.YELLOW, "text").lower()
+    if output_format not in OUTPUT_FORMATS:
+        output_format = "text"
+
+    #Resume
+    resume = False
+    if os.path.exists(journal_path(output_file_path)):
+        resume = get_input(Fore.GREEN + "» Unfinished scan found. Resume? (y/n, default: y): " + Fore.YELLOW, "y").lower() != "n"
 
-    #Threads
-    threads = int(get_input(Fore.GREEN + "» Threads (default: 50): " + Fore.YELLOW, "50") or "50")
+    #Threads (in-flight probes for the async engine), "auto" adapts while scanning
+    threads_input = get_input(Fore.GREEN + "» Threads (default: 50, auto = adaptive): " + Fore.YELLOW, "50").lower()
+    adaptive = threads_input == "auto"
+    threads = 50 if adaptive else int(threads_input)
     
     #Method
     http_method = get_http_method()
 
-    perform_scan(hosts, ports, output_file_path, threads, http_method)
+    #Engine
+    engine = get_input(Fore.GREEN + "» Engine (thread/async, default: thread): " + Fore.YELLOW, "thread").lower()
+    if engine not in ENGINES:
+        engine = "thread"
+    if engine == "async" and aiohttp is None:
+        print(Fore.RED + "aiohttp not installed, using thread engine.")
+        engine = "thread"
+
+    #Redirects
+    follow = get_input(Fore.GREEN + "» Follow redirects? (y/n, default: y): " + Fore.YELLOW, "y").lower()
+    follow_redirects = follow != "n"
+
+    #Dedup
+    dedup = get_input(Fore.GREEN + "» Group hosts by IP (probe shared IPs once)? (y/n, default: n): " + Fore.YELLOW, "n").lower() == "y"
+
+    #TCP pre-scan
+    sweep = get_input(Fore.GREEN + "» TCP pre-scan (skip closed ports)? (y/n, default: n): " + Fore.YELLOW, "n").lower() == "y"
+
+    #DNS
+    prefetch = get_input(Fore.GREEN + "» Pre-resolve hosts? (y/n, default: n): " + Fore.YELLOW, "n").lower()
+    if prefetch == "y":
+        print(Fore.CYAN + "Resolving hosts...")
+        resolved = resolver.prefetch(get_hosts_from_file(file_path))
+        print(Fore.CYAN + f"Resolved {resolved}/{host_count} hosts.")
+
+    hosts = get_hosts_from_file(file_path)
+    perform_scan(hosts, ports, output_file_path, threads, http_method, engine, host_count, follow_redirects,
+                 output_format, resume, adaptive, sweep, dedup)
 
 if __name__ == "__main__":
     main()
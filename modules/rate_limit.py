@@ -0,0 +1,188 @@
+import asyncio
+from datetime import timezone
+from email.utils import parsedate_to_datetime
+import random
+import threading
+import time
+
+# Statuses worth retrying: throttling and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Retry defaults: attempts per request, backoff base and cap in seconds
+ATTEMPTS = 3
+BASE_DELAY = 1.0
+MAX_DELAY = 30.0
+# Circuit breaker: consecutive failures before opening, seconds before a trial
+FAILURE_THRESHOLD = 3
+RESET_TIMEOUT = 60.0
+
+
+def parse_retry_after(value):
+    # Retry-After header (delta-seconds or HTTP date) -> seconds, None if absent
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError):
+        return None
+    if when is None:
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, when.timestamp() - time.time())
+
+def backoff_delay(attempt, base=BASE_DELAY, cap=MAX_DELAY, retry_after=None):
+    # Exponential backoff with full jitter. A server supplied Retry-After is
+    # a lower bound, so we never come back before we were told to.
+    delay = random.uniform(0, min(cap, base * 2 ** attempt))
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` requests per second, bursts of `burst`.
+
+    reserve() always takes a token and returns how long the caller has to
+    wait for it, so threads and coroutines queue up fairly at the rate.
+    """
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        if not self.rate:
+            return 0.0
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def acquire(self):
+        delay = self.reserve()
+        if delay:
+            time.sleep(delay)
+
+    async def aacquire(self):
+        delay = self.reserve()
+        if delay:
+            await asyncio.sleep(delay)
+
+
+class CircuitBreaker:
+    """Stops calling a provider after repeated failures.
+
+    After `failure_threshold` consecutive failures the circuit opens and
+    allow() refuses for `reset_timeout` seconds. Then one trial request is
+    let through (half-open): success closes the circuit, failure reopens it.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half-open"
+
+    def __init__(self, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.trips = 0
+        self._open_until = 0.0
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self):
+        return self.state != self.CLOSED
+
+    def allow(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            now = time.monotonic()
+            if now < self._open_until:
+                return False
+            # One trial at a time; a lost trial is retried after reset_timeout
+            self.state = self.HALF_OPEN
+            self._open_until = now + self.reset_timeout
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self._trip(self.reset_timeout)
+
+    def trip(self, duration=None):
+        # Opens the circuit now, e.g. when the server asks for a long pause
+        with self._lock:
+            self._trip(duration or self.reset_timeout)
+
+    def _trip(self, duration):
+        if self.state != self.OPEN:
+            self.trips += 1
+        self.state = self.OPEN
+        self._open_until = time.monotonic() + duration
+
+
+class SourcePolicy:
+    """Rate limit, retry/backoff and circuit breaker for one provider.
+
+    Callers wait on `bucket` before each attempt, check `breaker.allow()`,
+    and report every attempt to after_attempt(), which says whether and how
+    long to wait before trying again.
+    """
+
+    def __init__(self, name, rate, burst=1, attempts=ATTEMPTS, base_delay=BASE_DELAY,
+                 max_delay=MAX_DELAY, failure_threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT):
+        self.name = name
+        self.attempts = max(1, attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.bucket = TokenBucket(rate, burst)
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.retries = 0
+        self.throttled = 0
+
+    def after_attempt(self, attempt, status=None, retry_after=None):
+        # Books one attempt (status None means timeout or connection error).
+        # Returns the seconds to sleep before retrying, or None to stop.
+        if status is not None and status not in RETRY_STATUSES:
+            self.breaker.record_success()
+            return None
+        if status == 429:
+            # Throttled, not dead. A long pause request opens the circuit
+            # instead of blocking a worker for minutes.
+            self.throttled += 1
+            if retry_after is not None and retry_after > self.max_delay:
+                self.breaker.trip(retry_after)
+                return None
+        else:
+            self.breaker.record_failure()
+        if attempt + 1 >= self.attempts or self.breaker.is_open:
+            return None
+        self.retries += 1
+        return backoff_delay(attempt, self.base_delay, self.max_delay, retry_after)
+
+    def status(self):
+        # Short text for summaries, empty when nothing happened
+        parts = []
+        if self.retries:
+            parts.append(f"{self.retries} retries")
+        if self.throttled:
+            parts.append(f"{self.throttled} throttled")
+        if self.breaker.trips:
+            parts.append(f"circuit opened {self.breaker.trips}x")
+        return ", ".join(parts)
@@ -0,0 +1,243 @@
+import os
+import threading
+import time
+try:
+    import psutil
+except ImportError:
+    psutil = None
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Seconds between two samples of the system state
+SAMPLE_INTERVAL = 1.0
+# Memory always left free: this fraction of total RAM, at least MIN_RESERVE
+RESERVE_FRACTION = 0.10
+MIN_RESERVE = 256 * 1024 ** 2
+# No new jobs while CPU use or the 1-minute load per core is above these
+# (load lags by a minute, so it only catches a machine already overloaded)
+CPU_LIMIT = 90.0
+LOAD_PER_CPU = 4.0
+# Child process jobs (subfinder) per core at most; they mostly wait on the
+# network, memory is what runs out first
+JOBS_PER_CPU = 4
+MAX_JOBS = 64
+# RSS assumed per job; measured children only ever raise it, since a job
+# sampled while starting up is far below its eventual size
+DEFAULT_JOB_MEMORY = 150 * 1024 ** 2
+# File descriptors kept for everything that is not a worker socket
+FD_RESERVE = 64
+
+
+class Sample:
+    """System state at one point in time."""
+
+    def __init__(self, available, total, cpu, load, children, child_rss):
+        self.available = available
+        self.total = total
+        self.cpu = cpu
+        self.load = load
+        self.children = children
+        self.child_rss = child_rss
+
+
+def fd_limit():
+    # Soft limit on open files, None when unknown
+    if resource is None:
+        return None
+    try:
+        soft, _ = resource.getrlimit(resource.RLIMIT_NOFILE)
+    except (ValueError, OSError):
+        return None
+    return None if soft == resource.RLIM_INFINITY else soft
+
+def format_bytes(value):
+    return f"{value / 1024 ** 3:.1f} GB" if value >= 1024 ** 3 else f"{value / 1024 ** 2:.0f} MB"
+
+
+class ResourceScheduler:
+    """Admits jobs only while the machine has headroom.
+
+    Jobs (child processes like subfinder) call acquire()/release() or use
+    run(); acquire() blocks while free memory minus a reserve cannot fit
+    one more job, CPU or load is too high, child RSS would pass
+    memory_limit, or max_jobs are running. A job's size is the largest
+    child RSS seen so far but at least DEFAULT_JOB_MEMORY, and running jobs
+    are counted at that size even while they are still starting up.
+    thread_budget() sizes in-process worker pools the same way. Without
+    psutil only max_jobs applies.
+    """
+
+    def __init__(self, max_jobs=None, min_jobs=1, memory_limit=None, interval=SAMPLE_INTERVAL):
+        cpus = os.cpu_count() or 1
+        self.cpus = cpus
+        self.max_jobs = max_jobs or min(MAX_JOBS, cpus * JOBS_PER_CPU)
+        self.min_jobs = max(1, min(min_jobs, self.max_jobs))
+        self.memory_limit = memory_limit
+        self.interval = interval
+        self.job_memory = DEFAULT_JOB_MEMORY
+        self.running = 0
+        self.peak = 0
+        self.waits = 0
+        self.peak_child_rss = 0
+        self._sample = None
+        self._sampled_at = 0.0
+        self._process = psutil.Process() if psutil else None
+        self._cond = threading.Condition()
+        if psutil:
+            psutil.cpu_percent(interval=None)  # first call only sets the baseline
+
+    @property
+    def reserve(self):
+        sample = self.sample()
+        total = sample.total if sample else 0
+        return max(MIN_RESERVE, int(total * RESERVE_FRACTION))
+
+    def sample(self, force=False):
+        # Current Sample (cached for `interval`), None without psutil
+        if psutil is None:
+            return None
+        now = time.monotonic()
+        if not force and self._sample is not None and now - self._sampled_at < self.interval:
+            return self._sample
+        memory = psutil.virtual_memory()
+        children = []
+        child_rss = largest = 0
+        try:
+            children = self._process.children(recursive=True)
+        except psutil.Error:
+            pass
+        for child in children:
+            try:
+                rss = child.memory_info().rss
+            except psutil.Error:
+                continue
+            child_rss += rss
+            largest = max(largest, rss)
+        try:
+            load = os.getloadavg()[0]
+        except (AttributeError, OSError):
+            load = 0.0
+        self._sample = Sample(memory.available, memory.total, psutil.cpu_percent(interval=None), load,
+                              len(children), child_rss)
+        self._sampled_at = now
+        self.job_memory = max(self.job_memory, largest)
+        self.peak_child_rss = max(self.peak_child_rss, child_rss)
+        return self._sample
+
+    def pressure(self, sample):
+        # Why no more work should start now, or None. Jobs still growing
+        # towards job_memory count as if they were there already.
+        projected = max(sample.child_rss, self.running * self.job_memory)
+        if sample.available - (projected - sample.child_rss) - self.job_memory < self.reserve:
+            return "memory"
+        if self.memory_limit and projected + self.job_memory > self.memory_limit:
+            return "memory limit"
+        if sample.cpu > CPU_LIMIT:
+            return "cpu"
+        if sample.load > self.cpus * LOAD_PER_CPU:
+            return "load"
+        return None
+
+    def _admit(self):
+        if self.running >= self.max_jobs:
+            return False
+        if self.running < self.min_jobs:
+            return True
+        sample = self.sample()
+        return sample is None or self.pressure(sample) is None
+
+    def acquire(self):
+        # Blocks until one more job fits
+        with self._cond:
+            if not self._admit():
+                self.waits += 1
+                while not self._admit():
+                    self._cond.wait(self.interval)
+            self.running += 1
+            self.peak = max(self.peak, self.running)
+
+    def release(self):
+        with self._cond:
+            self.running -= 1
+            self._cond.notify()
+
+    def run(self, func, *args, **kwargs):
+        # Calls func inside a job slot, for executor.submit(scheduler.run, ...)
+        self.acquire()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.release()
+
+    def thread_budget(self, requested, worker_memory):
+        # Caps an in-process pool size by free memory and open file limit
+        budget = requested
+        sample = self.sample()
+        if sample is not None:
+            budget = min(budget, int((sample.available - self.reserve) // max(1, worker_memory)))
+        files = fd_limit()
+        if files:
+            budget = min(budget, files - FD_RESERVE)
+        return max(1, budget)
+
+    def describe(self):
+        # Machine summary for the start of a run
+        sample = self.sample(force=True)
+        if sample is None:
+            return f"{self.cpus} CPUs (psutil not installed, memory not watched)"
+        return (f"{self.cpus} CPUs, {format_bytes(sample.available)} free of {format_bytes(sample.total)}, "
+                f"load {sample.load:.1f}")
+
+    def status(self):
+        text = f"peak {self.peak}/{self.max_jobs} jobs, waited for headroom {self.waits}x"
+        if self.peak_child_rss:
+            text += f", peak child RSS {format_bytes(self.peak_child_rss)}"
+        return text
+
+
+class PoolGovernor:
+    """Keeps an AIMDController's maximum inside the machine's headroom.
+
+    A background thread samples the scheduler; under memory pressure the
+    maximum drops below the current limit, under CPU pressure it is held
+    at the limit, otherwise it grows back towards the original maximum by
+    as many workers as free memory allows.
+    """
+
+    def __init__(self, scheduler, controller, worker_memory, decrease=0.7):
+        self.scheduler = scheduler
+        self.controller = controller
+        self.worker_memory = worker_memory
+        self.decrease = decrease
+        self.ceiling = controller.maximum
+        self.throttled = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        if psutil is not None:
+            self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.scheduler.interval):
+            self.adjust(self.scheduler.sample(force=True))
+
+    def adjust(self, sample):
+        controller = self.controller
+        spare = sample.available - self.scheduler.reserve
+        if spare < 0:
+            maximum = int(controller.limit * self.decrease)
+            self.throttled += 1
+        elif sample.cpu > CPU_LIMIT:
+            maximum = controller.limit
+        else:
+            maximum = controller.limit + int(spare // max(1, self.worker_memory))
+        controller.set_maximum(min(self.ceiling, maximum))
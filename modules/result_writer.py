@@ -0,0 +1,174 @@
+import csv
+import io
+import json
+import os
+import queue
+import sys
+import threading
+import time
+
+# Flush when this many lines are buffered, or after FLUSH_INTERVAL seconds
+BATCH_SIZE = 500
+FLUSH_INTERVAL = 1.0
+# Minimum seconds between two progress line redraws
+PROGRESS_INTERVAL = 0.1
+
+# Structured output: one record per probe, timings in milliseconds (None
+# when the engine could not measure that phase). "via" names the host whose
+# probe a deduplicated record was copied from.
+OUTPUT_FORMATS = ["text", "jsonl", "csv"]
+RECORD_FIELDS = ["host", "port", "ip", "status", "server", "redirect",
+                 "dns_ms", "connect_ms", "tls_ms", "ttfb_ms", "via"]
+
+_STOP = object()
+
+
+class _After:
+    """Queue entry: run callback once everything queued before it is flushed."""
+
+    __slots__ = ("callback",)
+
+    def __init__(self, callback):
+        self.callback = callback
+
+
+class ResultWriter:
+    """Background thread that owns an output file and writes in batches.
+
+    Producers call write(item) from any thread; the item is queued and turned
+    into a line by `formatter` on the writer thread, so neither the file open
+    nor the formatting happens on the scan path. after(callback) runs callback
+    on the writer thread once everything written before it is flushed, e.g.
+    to journal a key only when its result is on disk.
+    """
+
+    def __init__(self, output_file, formatter=str, batch_size=BATCH_SIZE,
+                 flush_interval=FLUSH_INTERVAL, mode="a"):
+        self.output_file = output_file
+        self.formatter = formatter
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.mode = mode
+        self.written = 0
+        self.error = None
+        self._queue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def write(self, item):
+        self._queue.put(item)
+
+    def after(self, callback):
+        self._queue.put(_After(callback))
+
+    def close(self):
+        # Flushes everything still queued and waits for the writer thread
+        if self._thread.is_alive():
+            self._queue.put(_STOP)
+            self._thread.join()
+
+    def _run(self):
+        batch = []
+        callbacks = []
+        deadline = time.monotonic() + self.flush_interval
+        try:
+            with open(self.output_file, self.mode, encoding="utf-8") as file:
+                while True:
+                    try:
+                        item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        item = None
+                    if item is _STOP:
+                        self._flush(file, batch, callbacks)
+                        return
+                    if isinstance(item, _After):
+                        callbacks.append(item.callback)
+                    elif item is not None:
+                        batch.append(self.formatter(item) + "\n")
+                    if len(batch) >= self.batch_size or time.monotonic() >= deadline:
+                        self._flush(file, batch, callbacks)
+                        batch = []
+                        callbacks = []
+                        deadline = time.monotonic() + self.flush_interval
+        except Exception as e:
+            # Keep draining so producers never block on a dead writer
+            self.error = e
+            while self._queue.get() is not _STOP:
+                pass
+
+    def _flush(self, file, batch, callbacks=()):
+        if batch:
+            file.write("".join(batch))
+            file.flush()
+            self.written += len(batch)
+        for callback in callbacks:
+            callback()
+
+
+class ProgressLine:
+    """Redraws a single '\\r' status line at most once per interval."""
+
+    def __init__(self, interval=PROGRESS_INTERVAL, stream=None):
+        self.interval = interval
+        self.stream = stream or sys.stdout
+        self._last = 0.0
+
+    def update(self, text, force=False):
+        now = time.monotonic()
+        if force or now - self._last >= self.interval:
+            self._last = now
+            self.stream.write(text + "\r")
+            self.stream.flush()
+
+
+def record_to_jsonl(record):
+    # One compact JSON object per line
+    return json.dumps({field: record.get(field) for field in RECORD_FIELDS}, separators=(",", ":"))
+
+def record_to_csv(record):
+    # One CSV row in RECORD_FIELDS order, None becomes an empty cell
+    buffer = io.StringIO()
+    csv.writer(buffer, lineterminator="").writerow(
+        ["" if record.get(field) is None else record.get(field) for field in RECORD_FIELDS])
+    return buffer.getvalue()
+
+def get_record_formatter(output_format):
+    # Returns the line formatter for a structured output format
+    return record_to_csv if output_format == "csv" else record_to_jsonl
+
+def write_csv_header(output_file):
+    # Adds the CSV header only when starting a new file, so appends stay valid
+    try:
+        if os.path.getsize(output_file) > 0:
+            return
+    except OSError:
+        pass
+    with open(output_file, "a", encoding="utf-8") as file:
+        file.write(",".join(RECORD_FIELDS) + "\n")
+
+def iter_records(path):
+    # Streams records back from a JSONL or CSV result file without loading it
+    with open(path, encoding="utf-8", errors="ignore") as file:
+        first = file.readline()
+        if not first:
+            return
+        if first.lstrip().startswith("{"):
+            yield json.loads(first)
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            header = next(csv.reader([first]))
+            for row in csv.reader(file):
+                if row:
+                    yield {key: (value if value != "" else None) for key, value in zip(header, row)}
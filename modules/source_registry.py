@@ -0,0 +1,266 @@
+import hashlib
+import importlib.util
+import json
+import os
+import threading
+import time
+from rate_limit import SourcePolicy
+
+FIXTURE_INDEX = "index.jsonl"
+REPLAY_CHUNK = 64 * 1024
+
+
+class SourceStats:
+    """Per-source call counts and time spent in each stage."""
+
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.names = 0
+        self.fetch_seconds = 0.0
+        self.parse_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, fetch_seconds, parse_seconds, names, failed=False):
+        with self._lock:
+            self.calls += 1
+            self.failures += failed
+            self.names += names
+            self.fetch_seconds += fetch_seconds
+            self.parse_seconds += parse_seconds
+
+    def status(self):
+        # Short text for summaries
+        if not self.calls:
+            return "not called"
+        rate = f", {self.names / self.parse_seconds:,.0f} names/s parsed" if self.parse_seconds else ""
+        return (f"{self.calls} calls, fetch {self.fetch_seconds / self.calls * 1000:.0f}ms, "
+                f"parse {self.parse_seconds / self.calls * 1000:.1f}ms avg{rate}")
+
+
+class Source:
+    """One subdomain provider, split into a fetch and a parse stage.
+
+    fetch(domain) and async_fetch(client, domain) return the raw payload,
+    or None when nothing usable came back; parse(payload, domain) turns it
+    into a set of names. Streamed payloads are parsed while they arrive and
+    report that time in a `parse_seconds` attribute, which is moved from
+    the fetch stage to the parse stage in the stats.
+    """
+
+    def __init__(self, name, fetch, parse, async_fetch=None, rate=1, burst=1, concurrency=4, enabled=True):
+        self.name = name
+        self.fetch = fetch
+        self.parse = parse
+        self.async_fetch = async_fetch
+        self.concurrency = concurrency
+        self.enabled = enabled
+        self.policy = SourcePolicy(name, rate, burst)
+        self.stats = SourceStats()
+
+    def _finish(self, payload, domain, started, fetched):
+        streamed = getattr(payload, "parse_seconds", 0.0)
+        try:
+            results = set() if payload is None else self.parse(payload, domain)
+        except Exception:
+            self.stats.record(fetched - started - streamed, time.perf_counter() - fetched + streamed, 0, True)
+            raise
+        parsed = time.perf_counter()
+        self.stats.record(fetched - started - streamed, parsed - fetched + streamed, len(results), payload is None)
+        return results
+
+    def run(self, domain):
+        # Both stages on the calling thread
+        started = time.perf_counter()
+        payload = self.fetch(domain)
+        return self._finish(payload, domain, started, time.perf_counter())
+
+    async def arun(self, client, domain):
+        # Async fetch stage, parse stage on the event loop
+        started = time.perf_counter()
+        payload = await self.async_fetch(client, domain)
+        return self._finish(payload, domain, started, time.perf_counter())
+
+
+class SourceRegistry:
+    """Named Source objects in registration order."""
+
+    def __init__(self):
+        self._sources = {}
+
+    def __contains__(self, name):
+        return name in self._sources
+
+    def __getitem__(self, name):
+        return self._sources[name]
+
+    def __iter__(self):
+        return iter(self._sources.values())
+
+    def get(self, name, default=None):
+        return self._sources.get(name, default)
+
+    def names(self):
+        return list(self._sources)
+
+    def register(self, name, fetch, parse, async_fetch=None, **options):
+        # Adds (or replaces) a source, returns it
+        source = Source(name, fetch, parse, async_fetch, **options)
+        self._sources[name] = source
+        return source
+
+    def enabled(self, async_only=False):
+        return [source for source in self._sources.values()
+                if source.enabled and (source.async_fetch or not async_only)]
+
+    def select(self, names):
+        # Enables only the given source names, returns the unknown ones
+        wanted = {name.strip().lower() for name in names if name.strip()}
+        for source in self._sources.values():
+            source.enabled = source.name in wanted
+        return sorted(wanted - set(self._sources))
+
+    def load_plugins(self, directory):
+        # Imports every *.py in directory and calls its register(registry).
+        # Returns (loaded file names, {file name: error}).
+        loaded, errors = [], {}
+        if not os.path.isdir(directory):
+            return loaded, errors
+        for file_name in sorted(os.listdir(directory)):
+            if not file_name.endswith(".py") or file_name.startswith("_"):
+                continue
+            try:
+                spec = importlib.util.spec_from_file_location(f"api_source_{file_name[:-3]}",
+                                                              os.path.join(directory, file_name))
+                plugin = importlib.util.module_from_spec(spec)
+                spec.loader.exec_module(plugin)
+                plugin.register(self)
+                loaded.append(file_name)
+            except Exception as e:
+                errors[file_name] = e
+        return loaded, errors
+
+
+class ReplayResponse:
+    """The parts of a requests.Response the sources use, from a fixture."""
+
+    def __init__(self, status, content_type, body):
+        self.status_code = status
+        self.headers = {"Content-Type": content_type}
+        self.content = body
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    @property
+    def text(self):
+        return self.content.decode("utf-8", "ignore")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size=REPLAY_CHUNK):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start:start + chunk_size]
+
+    def close(self):
+        pass
+
+
+class FixtureStore:
+    """Recorded API responses for offline runs.
+
+    mode "record" saves every 200 response body under
+    <root>/<source>/<hash of url>; mode "replay" serves them back and
+    answers 404 for anything not recorded, without touching the network.
+    """
+
+    def __init__(self, root, mode="replay"):
+        self.root = root
+        self.mode = mode
+        self.served = 0
+        self.missing = 0
+        self._lock = threading.Lock()
+        self._entries = {}
+        os.makedirs(root, exist_ok=True)
+        try:
+            with open(os.path.join(root, FIXTURE_INDEX), encoding="utf-8") as file:
+                for line in file:
+                    if line.strip():
+                        entry = json.loads(line)
+                        self._entries[entry["url"]] = entry
+        except OSError:
+            pass
+
+    @property
+    def replaying(self):
+        return self.mode == "replay"
+
+    @property
+    def recording(self):
+        return self.mode == "record"
+
+    def _path(self, source, url):
+        return os.path.join(self.root, source, hashlib.sha1(url.encode("utf-8")).hexdigest()[:20])
+
+    def get(self, url):
+        # Returns (status, content type, body bytes), 404 when not recorded
+        entry = self._entries.get(url)
+        if entry is not None:
+            try:
+                with open(os.path.join(self.root, entry["file"]), "rb") as file:
+                    body = file.read()
+                with self._lock:
+                    self.served += 1
+                return 200, entry["content_type"], body
+            except OSError:
+                pass
+        with self._lock:
+            self.missing += 1
+        return 404, "text/plain", b""
+
+    def response(self, url):
+        return ReplayResponse(*self.get(url))
+
+    def open(self, source, url, content_type):
+        # File to write a response body to, indexed when closed
+        return FixtureWriter(self, source, url, content_type)
+
+    def save(self, source, url, content_type, body):
+        with self.open(source, url, content_type) as file:
+            file.write(body)
+
+    def _index(self, source, url, content_type, path):
+        entry = {"url": url, "source": source, "content_type": content_type,
+                 "file": os.path.relpath(path, self.root)}
+        with self._lock:
+            self._entries[url] = entry
+            with open(os.path.join(self.root, FIXTURE_INDEX), "a", encoding="utf-8") as file:
+                file.write(json.dumps(entry) + "\n")
+
+
+class FixtureWriter:
+    """Streams one recorded body to disk, see FixtureStore.open()."""
+
+    def __init__(self, store, source, url, content_type):
+        self.store = store
+        self.source = source
+        self.url = url
+        self.content_type = content_type
+        self.path = store._path(source, url)
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._file = open(self.path, "wb")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        self._file.close()
+        if exc_type is None:
+            self.store._index(self.source, self.url, self.content_type, self.path)
+
+    def write(self, data):
+        self._file.write(data)
@@ -0,0 +1,107 @@
+import codecs
+import json
+import time
+
+# Bytes read from the network per step when streaming a response body
+CHUNK_SIZE = 64 * 1024
+JSON_SEPARATORS = " \t\r\n,"
+
+
+class JsonArrayStream:
+    """Incremental parser for a top-level JSON array.
+
+    feed() takes text chunks and returns the elements completed so far, so
+    only the element being received is buffered, never the whole document.
+    """
+
+    def __init__(self):
+        self.done = False
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._started = False
+
+    def feed(self, text):
+        buffer = self._buffer + text
+        items = []
+        pos = 0
+        while not self.done:
+            while pos < len(buffer) and buffer[pos] in JSON_SEPARATORS:
+                pos += 1
+            if pos >= len(buffer):
+                break
+            if not self._started:
+                if buffer[pos] != "[":
+                    raise ValueError("expected a JSON array")
+                self._started = True
+                pos += 1
+                continue
+            if buffer[pos] == "]":
+                self.done = True
+                break
+            try:
+                item, pos = self._decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                break  # element not complete yet
+            items.append(item)
+        self._buffer = buffer[pos:]
+        return items
+
+    def close(self):
+        # A truncated document keeps the elements already returned
+        self._buffer = ""
+        return []
+
+
+class LineStream:
+    """Splits text chunks into complete lines."""
+
+    def __init__(self):
+        self._pending = ""
+
+    def feed(self, text):
+        lines = (self._pending + text).split("\n")
+        self._pending = lines.pop()
+        return lines
+
+    def close(self):
+        rest, self._pending = self._pending, ""
+        return [rest] if rest else []
+
+
+class NameStream:
+    """Collects subdomains from a streamed response body.
+
+    `splitter` (JsonArrayStream or LineStream) cuts the text into records
+    and `parser(records, domain)` turns a batch of records into names.
+    Memory is bounded by the set of unique names, not by the payload.
+    Time spent splitting and parsing is kept in `parse_seconds`.
+    """
+
+    def __init__(self, splitter, parser, domain):
+        self.splitter_class = splitter
+        self.parser = parser
+        self.domain = domain
+        self.reset()
+
+    def reset(self):
+        # Called before every (re)try so a retried body starts clean
+        self.splitter = self.splitter_class()
+        self.decoder = codecs.getincrementaldecoder("utf-8")(errors="ignore")
+        self.subdomains = set()
+        self.parse_seconds = 0.0
+
+    def feed(self, chunk):
+        # Takes raw bytes from the network
+        started = time.perf_counter()
+        records = self.splitter.feed(self.decoder.decode(chunk))
+        if records:
+            self.subdomains.update(self.parser(records, self.domain))
+        self.parse_seconds += time.perf_counter() - started
+
+    def close(self):
+        started = time.perf_counter()
+        records = self.splitter.feed(self.decoder.decode(b"", final=True)) + self.splitter.close()
+        if records:
+            self.subdomains.update(self.parser(records, self.domain))
+        self.parse_seconds += time.perf_counter() - started
+        return self.subdomains
@@ -1,14 +1,19 @@
 #!/usr/bin/env python3
+import atexit
 import subprocess
+import math
 import os
+import signal
 import time
 import shutil
+import tempfile
 import threading
 from concurrent.futures import ThreadPoolExecutor, as_completed
-try:
-    import psutil
-except ImportError:
-    psutil = None
+from dns_resolver import resolve_hosts
+from checkpoint import Checkpoint, journal_path
+from dedup_store import DedupStore
+from result_writer import ResultWriter
+from resource_scheduler import ResourceScheduler
 
 RESET = "\033[0m"
 BOLD = "\033[1m"
@@ -18,6 +23,26 @@ YELLOW = "\033[93m"
 CYAN = "\033[96m"
 
 write_lock = threading.Lock()
+# Batch mode: domains handed to one subfinder process through -dL, so Go
+# startup and provider setup are paid once per batch instead of per domain
+BATCH_SIZE = 50
+# Wall-clock limits in seconds. A domain over FAST_TIMEOUT is killed, what it
+# printed is kept, and it is retried after all the others with TAIL_TIMEOUT.
+FAST_TIMEOUT = 180
+TAIL_TIMEOUT = 900
+# Seconds between SIGTERM and SIGKILL for a subfinder process group
+KILL_GRACE = 3
+# Seconds between two checks of a running subfinder's deadlines
+WATCHDOG_INTERVAL = 1.0
+# subfinder's own -max-time is set this many seconds past our deadline, so
+# the watchdog always fires first and a slow domain is seen as timed out
+MAX_TIME_MARGIN = 60
+
+# Running subfinder processes. They live in their own sessions, so Ctrl+C
+# and SIGTERM never reach them; the main thread kills them through this.
+running = set()
+running_lock = threading.Lock()
+stopping = threading.Event()
 
 def clear():
     os.system('cls' if os.name=='nt' else 'clear')
@@ -29,39 +54,294 @@ def check_subfinder():
         return False
     return True
 
-def get_optimal_config():
-    try:
-        ram_gb = psutil.virtual_memory().total / (1024**3) if psutil else 3
-    except:
-        ram_gb = 2
-
-    if ram_gb < 2:
-        return 2, "Safe Mode (Low RAM)"
-    elif ram_gb < 4:
-        return 5, "Balanced Mode"
-    elif ram_gb < 8:
-        return 15, "Performance Mode"
-    else:
-        return 30, "Ultra Mode"
-
-def scan_target(domain, output_file):
+def kill_group(proc):
+    # Stops subfinder and anything it started, then reaps it
     try:
-        cmd = ["subfinder", "-d", domain, "-silent"]
-        result = subprocess.run(cmd, capture_output=True, text=True, check=False)
-
-        if result.returncode == 0 and result.stdout:
-            subs = [s.strip() for s in result.stdout.split('\n') if s.strip()]
-            if subs:
-                with write_lock:
-                    with open(output_file, 'a') as f:
-                        for s in subs:
-                            f.write(s + '\n')
-                return len(subs)
-    except Exception:
+        if os.name == 'posix':
+            os.killpg(proc.pid, signal.SIGTERM)
+        else:
+            proc.terminate()
+        proc.wait(KILL_GRACE)
+    except subprocess.TimeoutExpired:
+        if os.name == 'posix':
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+        proc.wait()
+    except (ProcessLookupError, PermissionError):
         pass
-    return 0
+
+def kill_running():
+    # Kills every running subfinder group; none start after this
+    stopping.set()
+    with running_lock:
+        procs = list(running)
+    for proc in procs:
+        kill_group(proc)
+
+def terminate(signum, frame):
+    # SIGTERM handler: stop the subfinder groups as Ctrl+C does, then exit
+    kill_running()
+    raise SystemExit(128 + signum)
+
+atexit.register(kill_running)
+
+def stream_subfinder(args, timeout, on_line, idle_timeout=None, max_time=None):
+    # Runs subfinder in its own process group and calls on_line(line) for
+    # each line of output as it arrives. The whole group is killed after
+    # `timeout` seconds, or after idle_timeout seconds without output; lines
+    # printed before that are kept. max_time (seconds per domain) plus
+    # MAX_TIME_MARGIN goes to subfinder's -max-time, only as a backstop.
+    # Returns (exit code, timed out).
+    if stopping.is_set():
+        return -signal.SIGTERM, False
+    minutes = max(1, math.ceil(((max_time or timeout) + MAX_TIME_MARGIN) / 60))
+    cmd = ["subfinder", *args, "-silent", "-max-time", str(minutes)]
+    started = time.monotonic()
+    last_output = [started]
+    finished = threading.Event()
+    expired = threading.Event()
+    with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True, errors="ignore",
+                          bufsize=1, start_new_session=os.name == 'posix') as proc:
+        with running_lock:
+            running.add(proc)
+        if stopping.is_set():
+            kill_group(proc)
+
+        def watchdog():
+            step = min(WATCHDOG_INTERVAL, timeout, idle_timeout or timeout)
+            while not finished.wait(step):
+                now = time.monotonic()
+                if now - started > timeout or idle_timeout and now - last_output[0] > idle_timeout:
+                    expired.set()
+                    kill_group(proc)
+                    return
+
+        threading.Thread(target=watchdog, daemon=True).start()
+        try:
+            for line in proc.stdout:
+                last_output[0] = time.monotonic()
+                on_line(line)
+        except BaseException:
+            kill_group(proc)
+            raise
+        finally:
+            finished.set()
+            proc.wait()
+            with running_lock:
+                running.discard(proc)
+    return proc.returncode, expired.is_set()
+
+def scan_target(domain, output_file, resolved_file=None, store=None, timeout=FAST_TIMEOUT):
+    # Returns (names found, names new to the output file, timed out).
+    # Names printed before a timeout are still saved.
+    subs = []
+
+    def collect(line):
+        line = line.strip()
+        if line:
+            subs.append(line)
+
+    code, timed_out = stream_subfinder(["-d", domain], timeout, collect)
+    if (code == 0 or timed_out) and subs:
+        # Names go into the dedup index only once they are written, so a
+        # failure on the way never hides them from the next run
+        new = store.unseen(subs) if store is not None else subs
+        resolved = resolve_hosts(new) if resolved_file and new else {}
+        with write_lock:
+            with open(output_file, 'a') as f:
+                for s in new:
+                    f.write(s + '\n')
+            if resolved:
+                with open(resolved_file, 'a') as f:
+                    for s in new:
+                        if s in resolved:
+                            f.write(f"{s} {resolved[s]}\n")
+            if store is not None:
+                store.add_new(new)
+        return len(subs), len(new), timed_out
+    return 0, 0, timed_out
+
+def run_per_domain(domains, scheduler, output_file, resolved_file, store, journal, progress,
+                   timeout=FAST_TIMEOUT, tail=None):
+    # One subfinder process per domain, started as the scheduler admits them.
+    # Domains that hit the timeout go to `tail` for a later, longer run; with
+    # tail=None (the last pass) they are recorded with what was salvaged.
+    # Returns names found.
+    found_total = 0
+
+    with ThreadPoolExecutor(max_workers=scheduler.max_jobs) as executor:
+        futures = {executor.submit(scheduler.run, scan_target, d, output_file, resolved_file, store, timeout): d
+                   for d in domains}
+
+        try:
+            for future in as_completed(futures):
+                domain = futures[future]
+                try:
+                    count, new, timed_out = future.result()
+                except Exception as e:
+                    progress["done"] += 1
+                    print(f"{RED}[{progress['done']}/{progress['total']}] {domain} -> Error: {e}{RESET}")
+                    continue
+                if timed_out and tail is not None:
+                    tail.append(domain)
+                    print(f"{YELLOW}[~] {domain} -> slow ({count} salvaged), moved to tail queue{RESET}")
+                    continue
+                progress["done"] += 1
+                found_total += count
+                journal.add(domain)
+                done = f"[{progress['done']}/{progress['total']}] {domain}"
+                if timed_out:
+                    print(f"{YELLOW}{done} -> Found {count} ({new} new), timed out after {timeout}s{RESET}")
+                elif count > 0:
+                    print(f"{GREEN}{done} -> Found {count} ({new} new){RESET}")
+                else:
+                    print(f"{YELLOW}{done} -> 0{RESET}")
+        except (KeyboardInterrupt, SystemExit):
+            # Drop queued domains and kill the running ones (they do not see
+            # Ctrl+C); the journal keeps the finished ones
+            executor.shutdown(wait=False, cancel_futures=True)
+            kill_running()
+            print(f"\n{YELLOW}[!] Interrupted. {progress['done']}/{progress['total']} done, run again to resume.{RESET}")
+            raise
+    return found_total
+
+def make_batches(domains, processes, batch_size=BATCH_SIZE):
+    # Splits domains evenly over the processes, at most batch_size each
+    size = max(1, min(batch_size, -(-len(domains) // max(1, processes))))
+    return [domains[i:i + size] for i in range(0, len(domains), size)]
+
+def normalize_domain(domain):
+    return domain.strip().lower().rstrip('.')
+
+def owner_lookup(domains):
+    # Returns a function mapping a found name to the batch domain it belongs
+    # to (the longest matching one, normalized), or None
+    targets = {normalize_domain(d) for d in domains}
+
+    def owner(name):
+        while '.' in name:
+            if name in targets:
+                return name
+            name = name.split('.', 1)[1]
+        return None
+
+    return owner
+
+def scan_batch(domains, writer, ip_writer=None, store=None, timeout=FAST_TIMEOUT):
+    # Runs one subfinder process over a batch and streams its output: each
+    # name goes to the writer as soon as subfinder prints it. The batch may
+    # take `timeout` seconds per domain and is killed when it prints nothing
+    # for `timeout` seconds. Returns ({domain: (names found,
+    # names new)}, unfinished domains), or None if subfinder failed.
+    # subfinder works through the list in order, so after a timeout every
+    # domain listed before the last one that printed anything is complete.
+    # Names are matched on normalized domains, results keyed by the input ones.
+    targets = [normalize_domain(d) for d in domains]
+    counts = {d: [0, 0] for d in targets}
+    order = []
+    owner = owner_lookup(targets)
+    seen = set() if store is None else None
+    new_names = []
+
+    def collect(line):
+        name = line.strip().lower()
+        domain = owner(name) if name else None
+        if domain is None:
+            return
+        if not counts[domain][0]:
+            order.append(domain)
+        counts[domain][0] += 1
+        if store is not None:
+            if not store.add_new([name]):
+                return
+        elif name in seen:
+            return
+        else:
+            seen.add(name)
+        counts[domain][1] += 1
+        writer.write(name)
+        if ip_writer is not None:
+            new_names.append(name)
+
+    fd, list_file = tempfile.mkstemp(prefix="subfinder_", suffix=".txt")
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write('\n'.join(targets) + '\n')
+        code, timed_out = stream_subfinder(["-dL", list_file], timeout * len(domains), collect,
+                                           idle_timeout=timeout, max_time=timeout)
+    finally:
+        os.remove(list_file)
+    if code != 0 and not timed_out:
+        return None
+
+    if ip_writer is not None and new_names:
+        resolved = resolve_hosts(new_names)
+        for name in new_names:
+            if name in resolved:
+                ip_writer.write(f"{name} {resolved[name]}")
+    finished = set(targets)
+    if timed_out:
+        finished = set(targets[:targets.index(order[-1])]) if order else set()
+    return ({d: tuple(counts[t]) for d, t in zip(domains, targets)},
+            [d for d, t in zip(domains, targets) if t not in finished])
+
+def run_batches(domains, scheduler, output_file, resolved_file, store, journal, progress,
+                timeout=FAST_TIMEOUT, tail=None):
+    # Batch mode loop: one subfinder process per batch, started as the
+    # scheduler admits them. Domains a timed out batch did not finish go to
+    # `tail`. Returns names found.
+    batches = make_batches(domains, scheduler.max_jobs)
+    if not batches:
+        return 0
+    found_total = 0
+    tail = tail if tail is not None else []
+    print(f"{GREEN}[*] Batch mode: {len(batches)} subfinder runs of up to {len(batches[0])} domains{RESET}")
+
+    # ip_writer closes last: writer's final flush still queues journal entries on it
+    with ResultWriter(resolved_file or os.devnull) as ip_writer, ResultWriter(output_file) as writer, \
+            ThreadPoolExecutor(max_workers=scheduler.max_jobs) as executor:
+        futures = {executor.submit(scheduler.run, scan_batch, b, writer, ip_writer if resolved_file else None,
+                                   store, timeout): b
+                   for b in batches}
+        try:
+            for future in as_completed(futures):
+                batch = futures[future]
+                try:
+                    outcome = future.result()
+                except Exception:
+                    outcome = None
+                results, unfinished = outcome or (None, [])
+                for domain in batch:
+                    if domain in unfinished:
+                        tail.append(domain)
+                        print(f"{YELLOW}[~] {domain} -> batch timed out ({results[domain][0]} salvaged), "
+                              f"moved to tail queue{RESET}")
+                        continue
+                    progress["done"] += 1
+                    done = f"[{progress['done']}/{progress['total']}] {domain}"
+                    if results is None:
+                        print(f"{RED}{done} -> Error{RESET}")
+                        continue
+                    count, new = results[domain]
+                    found_total += count
+                    # Journaled once both writers have flushed its rows
+                    writer.after(lambda d=domain: ip_writer.after(lambda: journal.add(d)))
+                    if count > 0:
+                        print(f"{GREEN}{done} -> Found {count} ({new} new){RESET}")
+                    else:
+                        print(f"{YELLOW}{done} -> 0{RESET}")
+        except (KeyboardInterrupt, SystemExit):
+            # Running batches are killed, not journaled, and scanned again
+            executor.shutdown(wait=False, cancel_futures=True)
+            kill_running()
+            print(f"\n{YELLOW}[!] Interrupted. {progress['done']}/{progress['total']} done, run again to resume.{RESET}")
+            raise
+    return found_total
 
 def main():
+    if os.name == 'posix':
+        signal.signal(signal.SIGTERM, terminate)
     clear()
     print(f"{BOLD}{CYAN}=== SUBFINDER (SMART PARALLEL) ==={RESET}")
 
@@ -90,6 +370,25 @@ def main():
     except:
         output_file = output_name
 
+    try:
+        resolve = input(f"{YELLOW}[?] Resolve IPs? (y/n, default: n): {RESET}").strip().lower()
+    except EOFError:
+        return
+    resolved_file = f"{os.path.splitext(output_file)[0]}_resolved.txt" if resolve == 'y' else None
+
+    try:
+        mode = input(f"{YELLOW}[?] Mode (batch/single, default: batch): {RESET}").strip().lower() or 'batch'
+    except EOFError:
+        return
+
+    resume = False
+    if os.path.exists(journal_path(output_file)):
+        try:
+            answer = input(f"{YELLOW}[?] Unfinished scan found. Resume? (y/n, default: y): {RESET}").strip().lower()
+        except EOFError:
+            return
+        resume = answer != 'n'
+
     print(f"\n{CYAN}[*] Reading domains...{RESET}")
     try:
         with open(input_file, 'r') as f:
@@ -102,36 +401,39 @@ def main():
         print(f"{RED}[!] Empty file.{RESET}")
         return
 
-    workers, mode_name = get_optimal_config()
-    print(f"{GREEN}[*] System Analysis: {mode_name} | Threads: {workers}{RESET}")
+    journal = Checkpoint(journal_path(output_file), resume)
+    store = DedupStore(output_file)
+    if resume:
+        domains = list(journal.filter(domains))
+        print(f"{GREEN}[*] Resuming: skipped {journal.skipped} finished domains.{RESET}")
+
+    # Jobs start only while free memory, CPU and load leave room for them
+    scheduler = ResourceScheduler()
+    print(f"{GREEN}[*] System Analysis: {scheduler.describe()} | Max jobs: {scheduler.max_jobs}{RESET}")
     print(f"{GREEN}[*] Loaded {len(domains)} domains.{RESET}")
     time.sleep(1)
 
     print(f"\n{BOLD}Starting Scan...{RESET}")
 
-    total = len(domains)
-    completed = 0
-    found_total = 0
-
-    with ThreadPoolExecutor(max_workers=workers) as executor:
-        futures = {executor.submit(scan_target, d, output_file): d for d in domains}
-
-        for future in as_completed(futures):
-            completed += 1
-            domain = futures[future]
-            try:
-                count = future.result()
-                found_total += count
-                if count > 0:
-                    print(f"{GREEN}[{completed}/{total}] {domain} -> Found {count}{RESET}")
-                else:
-                    print(f"{YELLOW}[{completed}/{total}] {domain} -> 0{RESET}")
-            except:
-                print(f"{RED}[{completed}/{total}] {domain} -> Error{RESET}")
+    runner = run_batches if mode == 'batch' else run_per_domain
+    progress = {"done": 0, "total": len(domains)}
+    tail = []
+    with journal:
+        found_total = runner(domains, scheduler, output_file, resolved_file, store, journal, progress, tail=tail)
+        if tail:
+            print(f"\n{CYAN}[*] Tail queue: {len(tail)} slow domains, retrying with a {TAIL_TIMEOUT}s limit{RESET}")
+            found_total += run_per_domain(tail, scheduler, output_file, resolved_file, store, journal, progress,
+                                          timeout=TAIL_TIMEOUT)
+    journal.finish()
+    store.close()
 
     print(f"\n{BOLD}{GREEN}=== FINISHED ==={RESET}")
     print(f"{BOLD}Total Subdomains: {found_total}{RESET}")
+    print(f"{BOLD}New Subdomains: {store.status()}{RESET}")
+    print(f"{BOLD}Scheduler: {scheduler.status()}{RESET}")
     print(f"{BOLD}Saved to: {output_file}{RESET}")
+    if resolved_file:
+        print(f"{BOLD}IPs saved to: {resolved_file}{RESET}")
 
     print(f"\n{BOLD}{YELLOW}[SYSTEM] Press Enter to return to menu...{RESET}")
     input()
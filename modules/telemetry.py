@@ -0,0 +1,199 @@
+from collections import deque
+import json
+import os
+import threading
+import time
+
+# Renderer refreshes per second. Publishers never touch the console, they
+# only append to the bus.
+REFRESH_RATE = 4
+# Upper bounds of the latency histogram buckets in milliseconds, the last
+# bucket takes everything slower
+LATENCY_BUCKETS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram with running count, sum, min and max."""
+
+    def __init__(self, bounds=LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = 0.0
+
+    def add(self, milliseconds):
+        index = 0
+        while index < len(self.bounds) and milliseconds > self.bounds[index]:
+            index += 1
+        self.counts[index] += 1
+        self.count += 1
+        self.total += milliseconds
+        self.min = milliseconds if self.min is None else min(self.min, milliseconds)
+        self.max = max(self.max, milliseconds)
+
+    def percentile(self, fraction):
+        # Upper bound of the bucket holding the rank, capped at the maximum
+        if not self.count:
+            return 0.0
+        rank = max(1, int(fraction * self.count + 0.5))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= rank:
+                return min(self.bounds[index], self.max) if index < len(self.bounds) else self.max
+        return self.max
+
+    def to_dict(self):
+        labels = [f"<={bound}" for bound in self.bounds] + [f">{self.bounds[-1]}"]
+        return {
+            "count": self.count,
+            "mean_ms": round(self.total / self.count, 1) if self.count else 0.0,
+            "min_ms": round(self.min or 0.0, 1),
+            "max_ms": round(self.max, 1),
+            "p50_ms": round(self.percentile(0.5), 1),
+            "p95_ms": round(self.percentile(0.95), 1),
+            "p99_ms": round(self.percentile(0.99), 1),
+            "buckets": dict(zip(labels, self.counts)),
+        }
+
+
+class SourceMetrics:
+    """Running totals of one source over a run."""
+
+    def __init__(self):
+        self.responses = 0
+        self.failures = 0
+        self.names = 0
+        self.cache = {}
+        self.latency = LatencyHistogram()
+
+    def to_dict(self):
+        return {"responses": self.responses, "failures": self.failures, "names": self.names,
+                "cache": self.cache, "latency": self.latency.to_dict()}
+
+
+class MetricsBus:
+    """Progress and metrics events from the workers, drawn by one renderer.
+
+    Workers call result(), domain_done() and log(); each is a deque append,
+    so none of them waits on the console or Rich's lock. A background thread
+    drains the events REFRESH_RATE times a second, updates the totals and
+    per-source histograms, prints the queued lines in one batch and
+    redraws the progress bar. Use as a context manager around the run.
+    """
+
+    def __init__(self, progress, total, description="Scanning", refresh_rate=REFRESH_RATE):
+        self.progress = progress
+        self.description = description
+        self.interval = 1.0 / refresh_rate
+        self.task_id = progress.add_task(description, total=total)
+        self.sources = {}
+        self.domains = 0
+        self.names = 0
+        self.new = 0
+        self.started = time.time()
+        self.elapsed = 0.0
+        self._events = deque()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._render_loop, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # --- Publishing (any thread or the event loop) --
+
+    def result(self, domain, source, count, seconds, cache_state=None):
+        # One source answered for a domain, count None means it failed
+        self._events.append(("result", domain, source, count, seconds, cache_state))
+
+    def domain_done(self, domain, names, new=None):
+        self._events.append(("domain", domain, names, new))
+
+    def log(self, text):
+        # A line for the console, printed by the renderer
+        self._events.append(("log", text))
+
+    # --- Rendering (renderer thread only) --
+
+    def _render_loop(self):
+        while not self._stop.wait(self.interval):
+            self._render()
+        self._render()
+
+    def _render(self):
+        advance = 0
+        lines = []
+        while self._events:
+            event = self._events.popleft()
+            kind = event[0]
+            if kind == "result":
+                advance += 1
+                self._record(*event[2:])
+            elif kind == "domain":
+                self.domains += 1
+                self.names += event[2]
+                self.new += event[3] or 0
+            else:
+                lines.append(event[1])
+        if lines:
+            self.progress.console.print("\n".join(lines))
+        self.elapsed = time.time() - self.started
+        self.progress.update(self.task_id, advance=advance, description=self._describe())
+        self.progress.refresh()
+
+    def _record(self, source, count, seconds, cache_state):
+        metrics = self.sources.setdefault(source, SourceMetrics())
+        metrics.responses += 1
+        if count is None:
+            metrics.failures += 1
+        else:
+            metrics.names += count
+        if cache_state:
+            metrics.cache[cache_state] = metrics.cache.get(cache_state, 0) + 1
+        if seconds is not None:
+            metrics.latency.add(seconds * 1000)
+
+    def _describe(self):
+        failures = sum(metrics.failures for metrics in self.sources.values())
+        rate = self.names / self.elapsed if self.elapsed else 0.0
+        text = f"{self.description} | {self.domains} done, {self.names} names ({rate:.0f}/s)"
+        return text + (f", [red]{failures} failed[/red]" if failures else "")
+
+    def close(self):
+        # Stops the renderer after a final drain
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    # --- Export --
+
+    def to_dict(self):
+        return {
+            "started": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            "elapsed_s": round(self.elapsed, 2),
+            "totals": {
+                "domains": self.domains,
+                "names": self.names,
+                "new": self.new,
+                "responses": sum(metrics.responses for metrics in self.sources.values()),
+                "failures": sum(metrics.failures for metrics in self.sources.values()),
+                "names_per_s": round(self.names / self.elapsed, 1) if self.elapsed else 0.0,
+            },
+            "sources": {name: metrics.to_dict() for name, metrics in self.sources.items()},
+        }
+
+    def export(self, path):
+        # Writes the run statistics as JSON, returns the path
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as file:
+            json.dump(self.to_dict(), file, indent=2)
+        os.replace(tmp, path)
+        return path